@@ -1,31 +1,124 @@
-# Constants
-from .constants import alphabet
-
-# Types
-from .text import JsonType
-from .url import ParamValue, ParamDict
-from .variables import VariableDict, SummaryDict
-
-# Classes
-from .memory import Memory
-from .time import Stopwatch, Timer, DateRange
-from .variables import Variables, LocalVariables, GlobalVariables, Cache
-
-# Functions
-from .data_transformation import list_batch_split
-from .env import load_dotenv
-from .paths import clean_path, find_template_params
-from .text import camel_to_snake, convert_keys_to_snake_case
-from .time import (
-    is_date_file, sort_dates_descending, sort_dates_ascending,
-    find_last_update_file, transform_date_to_string,
-    transform_date_to_datetime, days_between_dates,
-    today, yesterday
-)
-from .url import (
-    is_valid_url, sanitize_params, url_encode,
-    generate_parameter_combos
-)
+"""Utility functions and classes for all projects.
+
+Submodules are imported on first attribute access (PEP 562), so ``import rsq_utils``
+stays cheap and pandas, numpy, psutil and python-dotenv are only loaded by the
+names that need them.
+"""
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    # Constants
+    from .constants import alphabet
+
+    # Types
+    from .text import JsonType
+    from .url import ParamValue, ParamDict
+    from .variables import VariableDict, SummaryDict
+    from .memory_accounting import BudgetPolicy
+    from .memory_profiler import PeakMode
+    from .memory_watermarks import WatermarkMetric
+    from .url_canonicalization import DedupMode
+    from .metrics import MetricType
+    from .backfill import BackfillExecutor
+
+    # Classes
+    from .memory import Memory, MemorySample
+    from .memory_accounting import MemoryAccountant
+    from .memory_sampler import MemoryRingBuffer, MemorySampler
+    from .memory_profiler import AllocationSite, MemoryProfile, MemoryProfiler
+    from .memory_watermarks import MemoryPressureEvent, MemoryWatermark, MemoryPressureMonitor
+    from .process_tree import ProcessMemory, ProcessTreeSample, ProcessTreeMemory
+    from .parameter_space import ParameterSpace
+    from .url_builder import UrlBuilder
+    from .path_templates import PathTemplate
+    from .path_router import RouteMatch, PathRouter
+    from .url_canonicalization import BloomFilter, UrlDeduplicator
+    from .fetch import RetryPolicy, FetchResult, ConnectionPool, FetchEngine
+    from .rate_limit import TokenBucket, HostRateLimiter, ScheduledResult, HostScheduler
+    from .response_cache import CachedResponse, ResponseCache
+    from .config import ConfigSnapshot, ConfigLoader, ConfigWatcher
+    from .metrics import MetricSample, MetricFamily, Counter, Gauge, Histogram, MetricsRegistry, JsonLinesExporter
+    from .tracing import Span, Tracer
+    from .sampling_profiler import SamplingProfiler
+    from .backfill import BackfillCheckpoint, BackfillProgress, BackfillResult, Backfill
+    from .time import Stopwatch, Timer, DateRange
+    from .variables import Variables, LocalVariables, GlobalVariables, Cache
+    from .shared_memory import SharedMemoryStore, SharedCache
+    from .disk_spill import DiskSpillTier, SpillingCache
+    from .summary import SummaryBudget, SummaryEngine
+    from .snapshots import SnapshotDelta, SnapshotHistory
+
+    # Functions
+    from .data_transformation import list_batch_split
+    from .env import load_dotenv
+    from .config import read_dotenv, load_config, parse_duration
+    from .shared_memory import is_shareable
+    from .summary import estimate_distinct_count
+    from .snapshots import fingerprint
+    from .memory_accounting import deep_sizeof
+    from .memory_profiler import profile_memory
+    from .url_canonicalization import canonicalize_url, url_fingerprint
+    from .rate_limit import get_host
+    from .response_cache import get_cache_ttl
+    from .metrics import get_registry
+    from .tracing import get_tracer, merge_chrome_traces
+    from .paths import clean_path, find_template_params
+    from .text import camel_to_snake, convert_keys_to_snake_case
+    from .time import (
+        is_date_file, sort_dates_descending, sort_dates_ascending,
+        find_last_update_file, transform_date_to_string,
+        transform_date_to_datetime, days_between_dates,
+        today, yesterday
+    )
+    from .url import (
+        is_valid_url, sanitize_params, url_encode,
+        generate_parameter_combos
+    )
+
+_SUBMODULE_EXPORTS: Dict[str, Tuple[str, ...]] = {
+    'constants': ('alphabet',),
+    'text': ('JsonType', 'camel_to_snake', 'convert_keys_to_snake_case'),
+    'url': ('ParamValue', 'ParamDict', 'is_valid_url', 'sanitize_params', 'url_encode', 'generate_parameter_combos'),
+    'variables': ('VariableDict', 'SummaryDict', 'Variables', 'LocalVariables', 'GlobalVariables', 'Cache'),
+    'memory_accounting': ('BudgetPolicy', 'MemoryAccountant', 'deep_sizeof'),
+    'memory_profiler': ('PeakMode', 'AllocationSite', 'MemoryProfile', 'MemoryProfiler', 'profile_memory'),
+    'memory_watermarks': ('WatermarkMetric', 'MemoryPressureEvent', 'MemoryWatermark', 'MemoryPressureMonitor'),
+    'url_canonicalization': ('DedupMode', 'BloomFilter', 'UrlDeduplicator', 'canonicalize_url', 'url_fingerprint'),
+    'memory': ('Memory', 'MemorySample'),
+    'memory_sampler': ('MemoryRingBuffer', 'MemorySampler'),
+    'process_tree': ('ProcessMemory', 'ProcessTreeSample', 'ProcessTreeMemory'),
+    'parameter_space': ('ParameterSpace',),
+    'url_builder': ('UrlBuilder',),
+    'path_templates': ('PathTemplate',),
+    'path_router': ('RouteMatch', 'PathRouter'),
+    'fetch': ('RetryPolicy', 'FetchResult', 'ConnectionPool', 'FetchEngine'),
+    'rate_limit': ('TokenBucket', 'HostRateLimiter', 'ScheduledResult', 'HostScheduler', 'get_host'),
+    'response_cache': ('CachedResponse', 'ResponseCache', 'get_cache_ttl'),
+    'config': ('ConfigSnapshot', 'ConfigLoader', 'ConfigWatcher', 'read_dotenv', 'load_config', 'parse_duration'),
+    'time': (
+        'Stopwatch', 'Timer', 'DateRange', 'is_date_file', 'sort_dates_descending', 'sort_dates_ascending',
+        'find_last_update_file', 'transform_date_to_string', 'transform_date_to_datetime',
+        'days_between_dates', 'today', 'yesterday',
+    ),
+    'shared_memory': ('SharedMemoryStore', 'SharedCache', 'is_shareable'),
+    'disk_spill': ('DiskSpillTier', 'SpillingCache'),
+    'summary': ('SummaryBudget', 'SummaryEngine', 'estimate_distinct_count'),
+    'snapshots': ('SnapshotDelta', 'SnapshotHistory', 'fingerprint'),
+    'data_transformation': ('list_batch_split',),
+    'env': ('load_dotenv',),
+    'paths': ('clean_path', 'find_template_params'),
+    'metrics': (
+        'MetricType', 'MetricSample', 'MetricFamily', 'Counter', 'Gauge', 'Histogram', 'MetricsRegistry',
+        'JsonLinesExporter', 'get_registry',
+    ),
+    'tracing': ('Span', 'Tracer', 'get_tracer', 'merge_chrome_traces'),
+    'sampling_profiler': ('SamplingProfiler',),
+    'backfill': ('BackfillExecutor', 'BackfillCheckpoint', 'BackfillProgress', 'BackfillResult', 'Backfill'),
+}
+_LAZY_IMPORTS: Dict[str, str] = {
+    name: module for module, names in _SUBMODULE_EXPORTS.items() for name in names
+}
 
 __all__ = [
     # Constants
@@ -33,13 +126,32 @@ __all__ = [
     
     # Types
     'JsonType', 'ParamValue', 'ParamDict', 'VariableDict', 'SummaryDict',
+    'BudgetPolicy', 'PeakMode', 'WatermarkMetric', 'DedupMode', 'MetricType',
+    'BackfillExecutor',
     
     # Classes
-    'Memory', 'Stopwatch', 'Timer', 'DateRange',
+    'Memory', 'MemorySample', 'MemoryAccountant', 'MemoryRingBuffer', 'MemorySampler',
+    'AllocationSite', 'MemoryProfile', 'MemoryProfiler',
+    'MemoryPressureEvent', 'MemoryWatermark', 'MemoryPressureMonitor',
+    'ProcessMemory', 'ProcessTreeSample', 'ProcessTreeMemory', 'ParameterSpace',
+    'UrlBuilder', 'PathTemplate', 'RouteMatch', 'PathRouter',
+    'BloomFilter', 'UrlDeduplicator',
+    'RetryPolicy', 'FetchResult', 'ConnectionPool', 'FetchEngine',
+    'TokenBucket', 'HostRateLimiter', 'ScheduledResult', 'HostScheduler',
+    'CachedResponse', 'ResponseCache', 'ConfigSnapshot', 'ConfigLoader', 'ConfigWatcher',
+    'MetricSample', 'MetricFamily', 'Counter', 'Gauge', 'Histogram', 'MetricsRegistry', 'JsonLinesExporter',
+    'Span', 'Tracer', 'SamplingProfiler',
+    'BackfillCheckpoint', 'BackfillProgress', 'BackfillResult', 'Backfill',
+    'Stopwatch', 'Timer', 'DateRange',
     'Variables', 'LocalVariables', 'GlobalVariables', 'Cache',
+    'SharedMemoryStore', 'SharedCache', 'DiskSpillTier', 'SpillingCache',
+    'SummaryBudget', 'SummaryEngine', 'SnapshotDelta', 'SnapshotHistory',
     
     # Functions
-    'list_batch_split', 'load_dotenv',
+    'list_batch_split', 'load_dotenv', 'read_dotenv', 'load_config', 'parse_duration',
+    'is_shareable', 'estimate_distinct_count', 'fingerprint', 'deep_sizeof',
+    'profile_memory', 'canonicalize_url', 'url_fingerprint', 'get_host', 'get_cache_ttl', 'get_registry',
+    'get_tracer', 'merge_chrome_traces',
     'clean_path', 'find_template_params',
     'camel_to_snake', 'convert_keys_to_snake_case',
     'is_date_file', 'sort_dates_descending', 'sort_dates_ascending',
@@ -49,3 +161,16 @@ __all__ = [
     'is_valid_url', 'sanitize_params', 'url_encode',
     'generate_parameter_combos'
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
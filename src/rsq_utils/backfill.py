@@ -0,0 +1,301 @@
+"""Resumable date-range backfills with a local checkpoint of completed intervals."""
+import bisect
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Literal, Optional, TextIO, Tuple, Union
+
+from .time import DateRange, Stopwatch
+
+Interval = Tuple[str, str]
+BackfillExecutor = Literal["thread", "process"]
+
+
+class BackfillCheckpoint:
+    """Completed date intervals, kept as merged ranges in a small text file.
+
+    Each completed interval is appended to the file as a "start end" line as soon
+    as it finishes, so a crash loses at most the interval being written; a partial
+    last line is ignored when the file is read back. Touching and overlapping
+    intervals are merged in memory, and ``compact`` rewrites the file with the
+    merged ranges, so a finished backfill of any length is stored as one line.
+    Dates are compared as "YYYY-MM-DD" strings.
+
+    Args:
+        path: Checkpoint file; created on the first completed interval.
+
+    Example:
+    >>> checkpoint = BackfillCheckpoint("checkpoints/orders.txt")
+    >>> checkpoint.add("2024-01-01", "2024-01-02")
+    >>> checkpoint.is_completed("2024-01-01", "2024-01-02")
+    True
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path: Path = Path(path)
+        self._ranges: List[Interval] = []
+        self._file: Optional[TextIO] = None
+        if self.path.exists():
+            self.__load()
+
+    @property
+    def ranges(self) -> List[Interval]:
+        """Merged completed ranges, in date order."""
+        return list(self._ranges)
+
+    def is_completed(self, start: str, end: str) -> bool:
+        """Check whether an interval lies within the completed ranges.
+
+        Args:
+            start: First date of the interval.
+            end: Last date of the interval.
+
+        Returns:
+            True if the whole interval has been completed.
+        """
+        index = bisect.bisect_right(self._ranges, (start, "\uffff")) - 1
+        return index >= 0 and self._ranges[index][1] >= end
+
+    def add(self, start: str, end: str) -> None:
+        """Record an interval as completed and append it to the file.
+
+        Args:
+            start: First date of the interval.
+            end: Last date of the interval.
+
+        Raises:
+            ValueError: If start is after end.
+        """
+        if start > end:
+            raise ValueError("start must not be after end")
+        self.__merge(start, end)
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a")
+        self._file.write(f"{start} {end}\n")
+        self._file.flush()
+
+    def compact(self) -> None:
+        """Rewrite the file atomically with one line per merged range."""
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(descriptor, "w") as file:
+                file.writelines(f"{start} {end}\n" for start, end in self._ranges)
+            os.replace(temporary_name, self.path)
+        except BaseException:
+            Path(temporary_name).unlink(missing_ok=True)
+            raise
+
+    def clear(self) -> None:
+        """Forget every completed interval and delete the file."""
+        self.close()
+        self._ranges.clear()
+        self.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Close the file, if open."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __merge(self, start: str, end: str) -> None:
+        index = bisect.bisect_left(self._ranges, (start, end))
+        if index > 0 and self._ranges[index - 1][1] >= start:
+            index -= 1
+            start = self._ranges[index][0]
+            end = max(end, self._ranges[index][1])
+            del self._ranges[index]
+        while index < len(self._ranges) and self._ranges[index][0] <= end:
+            end = max(end, self._ranges[index][1])
+            del self._ranges[index]
+        self._ranges.insert(index, (start, end))
+
+    def __load(self) -> None:
+        with open(self.path) as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) == 2 and line.endswith("\n") and parts[0] <= parts[1]:
+                    self.__merge(parts[0], parts[1])
+
+
+@dataclass(frozen=True)
+class BackfillProgress:
+    """Progress of a backfill run.
+
+    Attributes:
+        total: Intervals in the date range.
+        skipped: Intervals already completed by earlier runs.
+        completed: Intervals completed by this run.
+        failed: Intervals that raised in this run; retried by the next run.
+        elapsed: Seconds since the run started.
+        rate: Intervals completed per second in this run.
+        eta: Estimated seconds until the remaining intervals finish, if known.
+    """
+    total: int
+    skipped: int
+    completed: int
+    failed: int
+    elapsed: float
+    rate: float
+    eta: Optional[float]
+
+    @property
+    def remaining(self) -> int:
+        """Intervals not yet completed, failed or skipped."""
+        return self.total - self.skipped - self.completed - self.failed
+
+
+@dataclass(frozen=True)
+class BackfillResult:
+    """Outcome of one interval run by Backfill.
+
+    Attributes:
+        interval: (start, end) dates passed to the work function.
+        value: Return value, if the call succeeded.
+        error: Exception raised by the call, if any.
+    """
+    interval: Interval
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class Backfill:
+    """Runs a work function over the date pairs of a DateRange, resuming where it left off.
+
+    Intervals come from ``DateRange.pair_dates``. Each one that returns without
+    raising is recorded in the checkpoint, and intervals already recorded are
+    skipped, so a crashed or interrupted backfill restarts with only the missing
+    work. Failed intervals are reported and left for the next run. Intervals run
+    on a thread pool, or on a process pool for CPU-bound work, in which case the
+    work function must be picklable. Progress and the ETA are derived from the
+    throughput measured with a Stopwatch since the run started.
+
+    Args:
+        work: Called with (start, end) date strings for each interval.
+        date_range: DateRange with a generated date range.
+        checkpoint: Checkpoint, or the path of its file.
+        executor: "thread" or "process" pool.
+        max_workers: Intervals running at once.
+        on_progress: Called with the progress after each interval finishes.
+
+    Example:
+    >>> date_range = DateRange()
+    >>> date_range.generate_date_range("2024-01-01", "2024-12-31")
+    >>> backfill = Backfill(load_day, date_range, "checkpoints/orders.txt", max_workers=8,
+    ...                     on_progress=lambda progress: print(progress.completed, progress.eta))
+    >>> failures = [result for result in backfill.run() if result.error]
+    """
+
+    def __init__(
+        self,
+        work: Callable[[str, str], Any],
+        date_range: DateRange,
+        checkpoint: Union[str, Path, BackfillCheckpoint],
+        executor: BackfillExecutor = "thread",
+        max_workers: int = 4,
+        on_progress: Optional[Callable[[BackfillProgress], None]] = None,
+    ) -> None:
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be 'thread' or 'process'")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.work: Callable[[str, str], Any] = work
+        self.date_range: DateRange = date_range
+        self.checkpoint: BackfillCheckpoint = (
+            checkpoint if isinstance(checkpoint, BackfillCheckpoint) else BackfillCheckpoint(checkpoint)
+        )
+        self.executor: BackfillExecutor = executor
+        self.max_workers: int = max_workers
+        self.on_progress: Optional[Callable[[BackfillProgress], None]] = on_progress
+        self.stopwatch: Stopwatch = Stopwatch()
+        self._total: int = 0
+        self._skipped: int = 0
+        self._completed: int = 0
+        self._failed: int = 0
+
+    @property
+    def progress(self) -> BackfillProgress:
+        """Progress of the current or last run."""
+        elapsed = 0.0
+        if self.stopwatch.end_time is not None and self.stopwatch.time_elapsed is not None:
+            elapsed = self.stopwatch.time_elapsed
+        elif self.stopwatch.start_time is not None:
+            elapsed = self.stopwatch.get_time_elapsed()
+        rate = self._completed / elapsed if elapsed > 0 else 0.0
+        remaining = self._total - self._skipped - self._completed - self._failed
+        eta: Optional[float] = None
+        if remaining == 0:
+            eta = 0.0
+        elif rate > 0:
+            eta = remaining / rate
+        return BackfillProgress(self._total, self._skipped, self._completed, self._failed, elapsed, rate, eta)
+
+    def get_pending(self) -> List[Interval]:
+        """Get the intervals not yet recorded in the checkpoint.
+
+        Returns:
+            (start, end) pairs, in date order.
+        """
+        return [pair for pair in self.date_range.pair_dates() if not self.checkpoint.is_completed(*pair)]
+
+    def run(self) -> List[BackfillResult]:
+        """Run every pending interval, checkpointing each one that succeeds.
+
+        If the run is interrupted, intervals not yet started are cancelled, the
+        running ones are waited for, and every interval that succeeded, including
+        those still unreported, stays in the checkpoint.
+
+        Returns:
+            One BackfillResult per interval run, in completion order.
+        """
+        pairs = self.date_range.pair_dates()
+        pending = [pair for pair in pairs if not self.checkpoint.is_completed(*pair)]
+        self._total = len(pairs)
+        self._skipped = len(pairs) - len(pending)
+        self._completed = 0
+        self._failed = 0
+        self.stopwatch.start()
+        results: List[BackfillResult] = []
+        futures: Dict["Future[Any]", Interval] = {}
+        executor = self.__create_executor()
+        try:
+            queue = iter(pending)
+            while True:
+                for pair in queue:
+                    futures[executor.submit(self.work, *pair)] = pair
+                    if len(futures) >= self.max_workers * 2:
+                        break
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pair = futures.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self.checkpoint.add(*pair)
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+                    results.append(BackfillResult(pair, None if error else future.result(), error))
+                    if self.on_progress is not None:
+                        self.on_progress(self.progress)
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            for future, pair in futures.items():
+                if not future.cancelled() and future.exception() is None:
+                    self.checkpoint.add(*pair)
+                    self._completed += 1
+            self.stopwatch.stop()
+            self.checkpoint.compact()
+        return results
+
+    def __create_executor(self) -> Executor:
+        if self.executor == "process":
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rsq-backfill")
@@ -0,0 +1,474 @@
+"""Layered .env configuration with parse caching, typed snapshots and change watching."""
+import functools
+import os
+import re
+import threading
+from datetime import timedelta
+from pathlib import Path
+from types import MappingProxyType, TracebackType
+from typing import (
+    Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Type, TypeVar, Union
+)
+
+from dotenv import dotenv_values
+
+FileSignature = Tuple[str, int, int]
+ConfigCallback = Callable[["ConfigSnapshot"], None]
+T = TypeVar("T")
+
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on", "y", "t"})
+_FALSE_VALUES = frozenset({"0", "false", "no", "off", "n", "f", ""})
+_DURATION_UNITS: Dict[str, float] = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, "d": 86400.0, "w": 604800.0}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*(ms|s|m|h|d|w)")
+_MISSING: Any = object()
+
+
+def get_file_signature(path: Union[str, Path]) -> Optional[FileSignature]:
+    """Get the resolved path, modification time and size that identify a file's contents.
+
+    Args:
+        path: File to check.
+
+    Returns:
+        (resolved path, mtime in nanoseconds, size in bytes), or None if the file does not exist.
+    """
+    resolved = Path(path).resolve()
+    try:
+        stat = resolved.stat()
+    except FileNotFoundError:
+        return None
+    return str(resolved), stat.st_mtime_ns, stat.st_size
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_dotenv(path: str, mtime_ns: int, size: int) -> Mapping[str, str]:
+    values = dotenv_values(path, interpolate=False)
+    return MappingProxyType({key: value for key, value in values.items() if value is not None})
+
+
+def read_dotenv(path: Union[str, Path]) -> Mapping[str, str]:
+    """Parse a .env file, reusing the previous result while the file is unchanged.
+
+    Results are cached on the file's path, modification time and size, so repeated
+    reads of an unchanged file cost one ``stat``. Values are not interpolated and
+    keys without a value are skipped.
+
+    Args:
+        path: Path to the .env file.
+
+    Returns:
+        Read-only mapping of variable names to values.
+
+    Raises:
+        ValueError: If the file does not exist.
+    """
+    signature = get_file_signature(path)
+    if signature is None or not Path(signature[0]).is_file():
+        raise ValueError(f"Environment file not found at: {path}")
+    return _parse_dotenv(*signature)
+
+
+def parse_duration(text: str) -> timedelta:
+    """Parse a duration such as "90", "1.5s", "250ms" or "1h30m".
+
+    Bare numbers are seconds. Units are ms, s, m, h, d and w.
+
+    Args:
+        text: Duration to parse.
+
+    Returns:
+        The duration.
+
+    Raises:
+        ValueError: If the text is not a duration.
+
+    Examples:
+        >>> parse_duration("1h30m")
+        datetime.timedelta(seconds=5400)
+        >>> parse_duration("250ms").total_seconds()
+        0.25
+    """
+    cleaned = text.strip().lower()
+    try:
+        return timedelta(seconds=float(cleaned))
+    except ValueError:
+        pass
+    position = 0
+    seconds = 0.0
+    for match in _DURATION_PART.finditer(cleaned):
+        if cleaned[position:match.start()].strip():
+            break
+        seconds += float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+        position = match.end()
+    if position == 0 or cleaned[position:].strip():
+        raise ValueError(f"Invalid duration: {text!r}")
+    return timedelta(seconds=seconds)
+
+
+def _parse_bool(text: str) -> bool:
+    cleaned = text.strip().lower()
+    if cleaned in _TRUE_VALUES:
+        return True
+    if cleaned in _FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean: {text!r}")
+
+
+class ConfigSnapshot(Mapping[str, str]):
+    """Immutable view of merged configuration values with typed accessors.
+
+    Each typed accessor converts a value the first time it is asked for and
+    remembers the result, so hot paths can read config without re-parsing.
+
+    Args:
+        values: Variable names and raw string values.
+        sources: Signatures of the files the values were read from.
+
+    Example:
+    >>> snapshot = ConfigSnapshot({"WORKERS": "8", "DEBUG": "yes", "HOSTS": "a, b", "TIMEOUT": "1m"})
+    >>> snapshot.get_int("WORKERS"), snapshot.get_bool("DEBUG"), snapshot.get_list("HOSTS")
+    (8, True, ['a', 'b'])
+    >>> snapshot.get_duration("TIMEOUT").total_seconds()
+    60.0
+    """
+    __slots__ = ("_values", "_coerced", "sources")
+
+    def __init__(self, values: Mapping[str, str], sources: Tuple[FileSignature, ...] = ()) -> None:
+        self._values: Mapping[str, str] = MappingProxyType(dict(values))
+        self._coerced: Dict[Tuple[str, str], Any] = {}
+        self.sources: Tuple[FileSignature, ...] = sources
+
+    def __getitem__(self, key: str) -> str:
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"ConfigSnapshot({dict(self._values)!r})"
+
+    def get_str(self, key: str, default: Any = _MISSING) -> str:
+        """Get a value as a string.
+
+        Args:
+            key: Variable name.
+            default: Returned when the variable is not set.
+
+        Returns:
+            The value.
+
+        Raises:
+            KeyError: If the variable is not set and there is no default.
+        """
+        return self.__coerce(key, "str", str, default)
+
+    def get_int(self, key: str, default: Any = _MISSING) -> int:
+        """Get a value as an integer.
+
+        Args:
+            key: Variable name.
+            default: Returned when the variable is not set.
+
+        Returns:
+            The value.
+
+        Raises:
+            KeyError: If the variable is not set and there is no default.
+            ValueError: If the value is not an integer.
+        """
+        return self.__coerce(key, "int", lambda text: int(text.strip()), default)
+
+    def get_float(self, key: str, default: Any = _MISSING) -> float:
+        """Get a value as a float.
+
+        Args:
+            key: Variable name.
+            default: Returned when the variable is not set.
+
+        Returns:
+            The value.
+
+        Raises:
+            KeyError: If the variable is not set and there is no default.
+            ValueError: If the value is not a number.
+        """
+        return self.__coerce(key, "float", float, default)
+
+    def get_bool(self, key: str, default: Any = _MISSING) -> bool:
+        """Get a value as a boolean.
+
+        "1", "true", "yes", "on", "y" and "t" are True; "0", "false", "no", "off",
+        "n", "f" and empty values are False, ignoring case.
+
+        Args:
+            key: Variable name.
+            default: Returned when the variable is not set.
+
+        Returns:
+            The value.
+
+        Raises:
+            KeyError: If the variable is not set and there is no default.
+            ValueError: If the value is not a boolean.
+        """
+        return self.__coerce(key, "bool", _parse_bool, default)
+
+    def get_list(self, key: str, default: Any = _MISSING, separator: str = ",") -> List[str]:
+        """Get a value as a list of stripped, non-empty items.
+
+        Args:
+            key: Variable name.
+            default: Returned when the variable is not set.
+            separator: Item separator.
+
+        Returns:
+            A new list of the items, or default when the variable is not set.
+
+        Raises:
+            KeyError: If the variable is not set and there is no default.
+        """
+        if default is not _MISSING and key not in self._values:
+            return default  # type: ignore[no-any-return]
+        items = self.__coerce(
+            key, f"list{separator}", lambda text: tuple(item.strip() for item in text.split(separator) if item.strip()),
+            _MISSING,
+        )
+        return list(items)
+
+    def get_duration(self, key: str, default: Any = _MISSING) -> timedelta:
+        """Get a value as a duration, parsed with ``parse_duration``.
+
+        Args:
+            key: Variable name.
+            default: Returned when the variable is not set.
+
+        Returns:
+            The value.
+
+        Raises:
+            KeyError: If the variable is not set and there is no default.
+            ValueError: If the value is not a duration.
+        """
+        return self.__coerce(key, "duration", parse_duration, default)
+
+    def __coerce(self, key: str, kind: str, convert: Callable[[str], T], default: Any) -> T:
+        cache_key = (key, kind)
+        try:
+            return self._coerced[cache_key]  # type: ignore[no-any-return]
+        except KeyError:
+            pass
+        if key not in self._values:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default  # type: ignore[no-any-return]
+        try:
+            value = convert(self._values[key])
+        except ValueError as e:
+            raise ValueError(f"Invalid value for {key}: {e}") from e
+        self._coerced[cache_key] = value
+        return value
+
+
+class ConfigLoader:
+    """Merges several .env files into ConfigSnapshots, re-reading only changed files.
+
+    Later paths take precedence over earlier ones, so pass shared defaults first
+    and local overrides last. When ``include_environ`` is set, environment
+    variables override file values for the same names. Loading an unchanged set
+    of files returns the same snapshot, so its converted values are reused.
+
+    Args:
+        paths: .env files in increasing order of precedence.
+        include_environ: Whether environment variables override file values.
+        required: Whether missing files raise instead of being skipped.
+
+    Example:
+    >>> loader = ConfigLoader([".env.defaults", ".env", ".env.local"])
+    >>> config = loader.load()
+    >>> workers = config.get_int("WORKERS", 4)
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[Union[str, Path]],
+        include_environ: bool = True,
+        required: bool = False,
+    ) -> None:
+        if not paths:
+            raise ValueError("paths must not be empty")
+        self.paths: Tuple[Path, ...] = tuple(Path(path) for path in paths)
+        self.include_environ: bool = include_environ
+        self.required: bool = required
+        self._lock: threading.Lock = threading.Lock()
+        self._key: Optional[Tuple[Any, ...]] = None
+        self._snapshot: Optional[ConfigSnapshot] = None
+
+    def get_signatures(self) -> Tuple[Optional[FileSignature], ...]:
+        """Get the current signature of every path.
+
+        Returns:
+            One signature per path, None for missing files.
+
+        Raises:
+            ValueError: If a file is missing and required is set.
+        """
+        signatures = tuple(get_file_signature(path) for path in self.paths)
+        if self.required:
+            for path, signature in zip(self.paths, signatures):
+                if signature is None:
+                    raise ValueError(f"Environment file not found at: {path}")
+        return signatures
+
+    def load(self) -> ConfigSnapshot:
+        """Get a snapshot of the merged configuration.
+
+        Returns:
+            The previous snapshot if no file or overriding environment variable
+            changed, otherwise a new one.
+
+        Raises:
+            ValueError: If a file is missing and required is set.
+        """
+        signatures = self.get_signatures()
+        layers = [_parse_dotenv(*signature) for signature in signatures if signature is not None]
+        names = sorted({name for layer in layers for name in layer})
+        environ = tuple(os.environ.get(name) for name in names) if self.include_environ else ()
+        key = (signatures, environ)
+
+        with self._lock:
+            if self._snapshot is not None and key == self._key:
+                return self._snapshot
+            values: Dict[str, str] = {}
+            for layer in layers:
+                values.update(layer)
+            for name, value in zip(names, environ):
+                if value is not None:
+                    values[name] = value
+            self._snapshot = ConfigSnapshot(values, tuple(signature for signature in signatures if signature))
+            self._key = key
+            return self._snapshot
+
+
+_loaders: Dict[Tuple[Tuple[Path, ...], bool], ConfigLoader] = {}
+_loaders_lock = threading.Lock()
+
+
+def load_config(*paths: Union[str, Path], include_environ: bool = True) -> ConfigSnapshot:
+    """Load merged configuration from .env files, cached across calls in this process.
+
+    Args:
+        *paths: .env files in increasing order of precedence. Defaults to ".env".
+        include_environ: Whether environment variables override file values.
+
+    Returns:
+        The configuration snapshot; the same object while nothing changed.
+
+    Examples:
+        >>> config = load_config(".env", ".env.local")
+        >>> config.get_duration("REQUEST_TIMEOUT", timedelta(seconds=30))
+        datetime.timedelta(seconds=30)
+    """
+    key = (tuple(Path(path) for path in paths or (".env",)), include_environ)
+    with _loaders_lock:
+        loader = _loaders.get(key)
+        if loader is None:
+            loader = _loaders[key] = ConfigLoader(key[0], include_environ)
+    return loader.load()
+
+
+class ConfigWatcher:
+    """Polls a ConfigLoader's files and reloads when one of them changes.
+
+    Only a ``stat`` per file is done on each poll; files are re-parsed when their
+    modification time or size changes, and callbacks receive the new snapshot.
+    Exceptions raised by callbacks or while reloading are stored in ``last_error``.
+
+    Args:
+        loader: Loader whose files to watch.
+        interval: Seconds between polls.
+        on_change: Called with the new snapshot after each reload.
+
+    Example:
+    >>> watcher = ConfigWatcher(ConfigLoader([".env", ".env.local"]), interval=5.0,
+    ...                         on_change=lambda config: pool.resize(config.get_int("WORKERS")))
+    >>> with watcher:
+    ...     run_jobs(lambda: watcher.snapshot)
+    """
+
+    def __init__(self, loader: ConfigLoader, interval: float = 1.0, on_change: Optional[ConfigCallback] = None) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.loader: ConfigLoader = loader
+        self.interval: float = interval
+        self.callbacks: List[ConfigCallback] = [on_change] if on_change is not None else []
+        self.last_error: Optional[BaseException] = None
+        self.reload_count: int = 0
+        self._signatures: Tuple[Optional[FileSignature], ...] = loader.get_signatures()
+        self.snapshot: ConfigSnapshot = loader.load()
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the watcher thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def check(self) -> bool:
+        """Reload if any watched file changed since the last check.
+
+        Returns:
+            True if the configuration was reloaded.
+        """
+        signatures = self.loader.get_signatures()
+        if signatures == self._signatures:
+            return False
+        self.snapshot = self.loader.load()
+        self._signatures = signatures
+        self.reload_count += 1
+        for callback in list(self.callbacks):
+            try:
+                callback(self.snapshot)
+            except Exception as e:
+                self.last_error = e
+        return True
+
+    def start(self) -> None:
+        """Start polling in a daemon thread.
+
+        Raises:
+            RuntimeError: If the watcher is already running.
+        """
+        if self.is_running:
+            raise RuntimeError("Watcher already running")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.__run, name="rsq-config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling and wait for the thread to finish."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "ConfigWatcher":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.stop()
+
+    def __run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.last_error = e
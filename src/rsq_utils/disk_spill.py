@@ -0,0 +1,356 @@
+"""Disk spill utilities for moving cold cache entries out of memory and back."""
+import hashlib
+import mmap
+import pickle
+import shutil
+import struct
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Literal, Optional, Union
+
+import numpy as np
+
+from .variables import Cache, VariableDict
+
+DEFAULT_SPILL_BYTES: int = 1024 ** 3
+BUFFER_ALIGNMENT: int = 64
+MmapMode = Literal["r", "r+", "c"]
+_LENGTH_FORMAT: str = "<q"
+_LENGTH_BYTES: int = struct.calcsize(_LENGTH_FORMAT)
+
+
+@dataclass
+class SpillEntry:
+    """Location and size of a value written to disk."""
+    path: Path
+    size_bytes: int
+    is_array: bool
+
+
+def _aligned(offset: int) -> int:
+    return (offset + BUFFER_ALIGNMENT - 1) // BUFFER_ALIGNMENT * BUFFER_ALIGNMENT
+
+
+def write_pickle_out_of_band(path: Path, value: Any) -> None:
+    """Pickle a value with protocol 5, writing its large buffers out-of-band.
+
+    The file holds a header with the buffer count and lengths, the pickle stream,
+    then each buffer aligned to 64 bytes so it can be mapped back without copying.
+
+    Args:
+        path: File to write.
+        value: Value to pickle.
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    payload = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+    lengths = [len(payload), len(raw_buffers)] + [len(raw) for raw in raw_buffers]
+    header = struct.pack(f"<{len(lengths)}q", *lengths)
+
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(payload)
+        for raw in raw_buffers:
+            file.write(b"\0" * (_aligned(file.tell()) - file.tell()))
+            file.write(raw)
+
+
+def read_pickle_out_of_band(path: Path) -> Any:
+    """Load a value written by write_pickle_out_of_band.
+
+    Out-of-band buffers are memory-mapped copy-on-write, so large arrays are paged
+    in lazily and stay writable without modifying the file.
+
+    Args:
+        path: File to read.
+
+    Returns:
+        The unpickled value.
+    """
+    with open(path, "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    view = memoryview(mapping)
+    (payload_length,) = struct.unpack_from(_LENGTH_FORMAT, view, 0)
+    (buffer_count,) = struct.unpack_from(_LENGTH_FORMAT, view, _LENGTH_BYTES)
+    buffer_lengths = struct.unpack_from(f"<{buffer_count}q", view, 2 * _LENGTH_BYTES)
+    offset = (buffer_count + 2) * _LENGTH_BYTES
+    payload = view[offset:offset + payload_length]
+    offset += payload_length
+
+    buffers: List[memoryview] = []
+    for length in buffer_lengths:
+        offset = _aligned(offset)
+        buffers.append(view[offset:offset + length])
+        offset += length
+    return pickle.loads(payload, buffers=buffers)
+
+
+class DiskSpillTier:
+    """Local directory store for values spilled out of memory.
+
+    Numpy arrays are written as ``.npy`` files and reloaded with ``np.load(mmap_mode=...)``.
+    Every other value is pickled with protocol 5 and out-of-band buffers, which are
+    memory-mapped on reload. The tier has its own size limit and evicts its least
+    recently used entries to stay under it.
+
+    Args:
+        directory: Directory to write to. Defaults to a new temporary directory that
+            is removed on close.
+        max_bytes: Maximum bytes on disk before least recently used entries are deleted.
+        mmap_mode: Mode passed to ``np.load`` when reloading arrays.
+
+    Example:
+    >>> tier = DiskSpillTier(max_bytes=10 * 1024 ** 2)
+    >>> tier.put("prices", np.arange(5.0))
+    True
+    >>> tier.pop("prices")
+    memmap([0., 1., 2., 3., 4.])
+    >>> tier.close()
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        max_bytes: int = DEFAULT_SPILL_BYTES,
+        mmap_mode: MmapMode = "c",
+    ) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self._owns_directory: bool = directory is None
+        self.directory: Path = Path(directory or tempfile.mkdtemp(prefix="rsq_spill_"))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes: int = max_bytes
+        self.mmap_mode: MmapMode = mmap_mode
+        self.size_bytes: int = 0
+        self._entries: "OrderedDict[str, SpillEntry]" = OrderedDict()
+
+    def put(self, key: str, value: Any) -> bool:
+        """Write a value to disk, evicting least recently used entries if needed.
+
+        Args:
+            key: Key to store the value under.
+            value: Value to write.
+
+        Returns:
+            True if the value was stored, False if it alone exceeds max_bytes.
+        """
+        if key in self._entries:
+            self.remove(key)
+
+        is_array = isinstance(value, np.ndarray) and not value.dtype.hasobject
+        file_name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        path = self.directory / (file_name + (".npy" if is_array else ".pkl"))
+        if is_array:
+            np.save(path, value, allow_pickle=False)
+        else:
+            write_pickle_out_of_band(path, value)
+
+        size_bytes = path.stat().st_size
+        if size_bytes > self.max_bytes:
+            path.unlink()
+            return False
+
+        self._entries[key] = SpillEntry(path=path, size_bytes=size_bytes, is_array=is_array)
+        self.size_bytes += size_bytes
+        self.__evict()
+        return True
+
+    def get(self, key: str) -> Any:
+        """Load a value, keeping it on disk.
+
+        Args:
+            key: Key to load.
+
+        Returns:
+            The stored value; arrays are memory-mapped.
+
+        Raises:
+            KeyError: If the key is not stored.
+        """
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        if entry.is_array:
+            return np.load(entry.path, mmap_mode=self.mmap_mode)
+        return read_pickle_out_of_band(entry.path)
+
+    def pop(self, key: str) -> Any:
+        """Load a value and remove it from disk.
+
+        Memory-mapped data stays valid after the file is removed.
+
+        Args:
+            key: Key to load.
+
+        Returns:
+            The stored value.
+
+        Raises:
+            KeyError: If the key is not stored.
+        """
+        value = self.get(key)
+        self.remove(key)
+        return value
+
+    def remove(self, key: str) -> None:
+        """Delete a stored value.
+
+        Args:
+            key: Key to delete.
+
+        Raises:
+            KeyError: If the key is not stored.
+        """
+        entry = self._entries.pop(key)
+        self.size_bytes -= entry.size_bytes
+        entry.path.unlink(missing_ok=True)
+
+    def keys(self) -> List[str]:
+        """List stored keys from least to most recently used.
+
+        Returns:
+            Stored keys.
+        """
+        return list(self._entries.keys())
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Delete every stored value."""
+        for key in list(self._entries):
+            self.remove(key)
+
+    def close(self) -> None:
+        """Delete every stored value and the directory if the tier created it."""
+        self.clear()
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __evict(self) -> None:
+        while self.size_bytes > self.max_bytes and self._entries:
+            self.remove(next(iter(self._entries)))
+
+
+class SpillingCache(Cache):
+    """Cache that spills its least recently used entries to a DiskSpillTier.
+
+    The in-memory tier holds at most ``max_memory_entries`` values; older ones are
+    written to disk instead of being dropped. Reading a spilled key with ``[]`` or
+    ``get`` promotes it back into memory. ``in`` checks both tiers, while ``len``,
+    ``keys`` and ``get_summary`` only see the in-memory tier.
+
+    Args:
+        variables: Initial dictionary of variables to store. Defaults to None.
+        max_memory_entries: Maximum number of values kept in memory.
+        spill_tier: Disk tier to spill to. Defaults to a new DiskSpillTier.
+
+    Example:
+    >>> cache = SpillingCache({"a": 1, "b": 2}, max_memory_entries=1)
+    >>> cache.spilled_keys()
+    ['a']
+    >>> cache["a"]
+    1
+    >>> cache.spilled_keys()
+    ['b']
+    """
+
+    def __init__(
+        self,
+        variables: Optional[VariableDict] = None,
+        max_memory_entries: int = 128,
+        spill_tier: Optional[DiskSpillTier] = None,
+    ) -> None:
+        if max_memory_entries < 1:
+            raise ValueError("max_memory_entries must be at least 1")
+        self.max_memory_entries: int = max_memory_entries
+        self.spill_tier: DiskSpillTier = spill_tier if spill_tier is not None else DiskSpillTier()
+        super().__init__(variables)
+        self.__enforce_memory_limit()
+
+    def __getitem__(self, key: str) -> Any:
+        if dict.__contains__(self, key):
+            value = dict.pop(self, key)
+            dict.__setitem__(self, key, value)
+            return value
+        if key in self.spill_tier:
+            value = self.spill_tier.pop(key)
+            dict.__setitem__(self, key, value)
+            self.__enforce_memory_limit()
+            return value
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self.spill_tier:
+            self.spill_tier.remove(key)
+        dict.pop(self, key, None)
+        dict.__setitem__(self, key, value)
+        self.__enforce_memory_limit()
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self.spill_tier
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a value from either tier, promoting it into memory.
+
+        Args:
+            key: Variable to get.
+            default: Value returned if the key is in neither tier.
+
+        Returns:
+            The stored value or default.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update_variables(self, new_variables: VariableDict) -> None:
+        """Update variables, spilling the least recently used ones past the memory limit.
+
+        Args:
+            new_variables: Dictionary of new variables to add/update.
+        """
+        for key in new_variables:
+            if key in self.spill_tier:
+                self.spill_tier.remove(key)
+            dict.pop(self, key, None)
+        super().update_variables(new_variables)
+        self.__enforce_memory_limit()
+
+    def spill(self, count: int = 1) -> List[str]:
+        """Move the least recently used in-memory values to disk.
+
+        Useful as a memory-pressure callback. A value larger than the spill tier's
+        max_bytes cannot be written and is dropped.
+
+        Args:
+            count: Number of values to spill.
+
+        Returns:
+            Keys that were spilled.
+        """
+        spilled: List[str] = []
+        for key in list(dict.keys(self))[:count]:
+            value = dict.pop(self, key)
+            if self.spill_tier.put(key, value):
+                spilled.append(key)
+        return spilled
+
+    def spilled_keys(self) -> List[str]:
+        """List keys currently held on disk.
+
+        Returns:
+            Spilled keys from least to most recently used.
+        """
+        return self.spill_tier.keys()
+
+    def __enforce_memory_limit(self) -> None:
+        overflow = len(self) - self.max_memory_entries
+        if overflow > 0:
+            self.spill(overflow)
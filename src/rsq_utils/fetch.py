@@ -0,0 +1,414 @@
+"""Concurrent HTTP fetching over per-host keep-alive connection pools."""
+import asyncio
+import heapq
+import http.client
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import (
+    Any, AsyncIterator, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Type, Union
+)
+from urllib.parse import urlsplit
+
+from .rate_limit import HostRateLimiter
+from .url_builder import UrlBuilder
+
+HostKey = Tuple[str, str, int]
+_RETRY_STATUSES: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a failed request.
+
+    Connection errors and responses with a status in ``retry_statuses`` are retried
+    with exponential backoff. A Retry-After header in seconds overrides the backoff,
+    capped at ``max_backoff_seconds``.
+
+    Attributes:
+        max_attempts: Attempts per URL, including the first.
+        backoff_seconds: Delay before the first retry.
+        backoff_multiplier: Factor applied to the delay after each retry.
+        max_backoff_seconds: Upper bound on any delay.
+        jitter: Random fraction added to or removed from each delay.
+        retry_statuses: HTTP statuses that are retried.
+    """
+    max_attempts: int = 3
+    backoff_seconds: float = 0.5
+    backoff_multiplier: float = 2.0
+    max_backoff_seconds: float = 30.0
+    jitter: float = 0.1
+    retry_statuses: FrozenSet[int] = _RETRY_STATUSES
+
+    def get_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Get the delay before the next attempt.
+
+        Args:
+            attempt: Number of attempts made so far, starting at 1.
+            retry_after: Value of the Retry-After header, if any.
+
+        Returns:
+            Delay in seconds.
+        """
+        if retry_after is not None and retry_after.strip().isdigit():
+            return min(float(retry_after), self.max_backoff_seconds)
+        delay = min(self.backoff_seconds * self.backoff_multiplier ** (attempt - 1), self.max_backoff_seconds)
+        return max(delay * (1 + random.uniform(-self.jitter, self.jitter)), 0.0)
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    """Outcome of fetching one URL.
+
+    Attributes:
+        url: Requested URL.
+        index: Position of the URL in the input.
+        status: HTTP status, or None if no response was received.
+        headers: Response headers with lower-case names.
+        body: Response body; large bodies served by a ResponseCache are memory-mapped views.
+        elapsed_seconds: Time spent on every attempt, including backoff.
+        attempts: Number of attempts made.
+        error: Last exception if no response was received.
+        params: Parameters the URL was built from, when fetched from combos.
+        from_cache: Whether the body was served from a ResponseCache.
+    """
+    url: str
+    index: int
+    status: Optional[int] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Union[bytes, memoryview] = b""
+    elapsed_seconds: float = 0.0
+    attempts: int = 0
+    error: Optional[BaseException] = None
+    params: Optional[Mapping[str, Any]] = None
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Whether a response with a 2xx status was received."""
+        return self.status is not None and 200 <= self.status < 300
+
+
+class ConnectionPool:
+    """Thread-safe pools of idle keep-alive connections, one pool per host.
+
+    At most ``max_connections_per_host`` connections to a host are in use at once;
+    further acquires block until one is released. Released connections are reused
+    most-recently-used first, which keeps the number of open sockets small.
+
+    Args:
+        max_connections_per_host: Connections allowed in use per host.
+        timeout: Socket timeout in seconds for new connections.
+    """
+
+    def __init__(self, max_connections_per_host: int = 8, timeout: float = 30.0) -> None:
+        if max_connections_per_host < 1:
+            raise ValueError("max_connections_per_host must be at least 1")
+        self.max_connections_per_host: int = max_connections_per_host
+        self.timeout: float = timeout
+        self._idle: Dict[HostKey, List[http.client.HTTPConnection]] = {}
+        self._slots: Dict[HostKey, threading.BoundedSemaphore] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self.connections_created: int = 0
+
+    def acquire(self, key: HostKey) -> Tuple[http.client.HTTPConnection, bool]:
+        """Get a connection to a host, waiting for a free slot.
+
+        Args:
+            key: (scheme, host, port) of the host.
+
+        Returns:
+            The connection and whether it is a reused keep-alive connection.
+        """
+        with self._lock:
+            slots = self._slots.get(key)
+            if slots is None:
+                slots = self._slots[key] = threading.BoundedSemaphore(self.max_connections_per_host)
+        slots.acquire()
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+            self.connections_created += 1
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def release(self, key: HostKey, connection: http.client.HTTPConnection, reusable: bool) -> None:
+        """Return a connection to its host's pool, or close it.
+
+        Args:
+            key: (scheme, host, port) of the host.
+            connection: Connection from acquire.
+            reusable: Whether the connection can serve another request.
+        """
+        if reusable:
+            with self._lock:
+                self._idle.setdefault(key, []).append(connection)
+        else:
+            connection.close()
+        self._slots[key].release()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+
+class FetchEngine:
+    """Fetches many URLs concurrently over keep-alive connection pools.
+
+    Requests run on a thread pool using ``http.client``; each host gets its own pool
+    of persistent connections, bounded by ``max_connections_per_host``. Input
+    iterables are consumed lazily and at most ``max_in_flight`` requests are queued
+    at once, so a ParameterSpace of any size can be fetched with bounded memory.
+    Results are streamed in completion order as they arrive; ``FetchResult.index``
+    gives the input position. Redirects are returned as-is, not followed.
+
+    Args:
+        max_workers: Threads issuing requests.
+        max_connections_per_host: Concurrent connections allowed per host.
+        timeout: Socket timeout in seconds.
+        retry: Retry policy. Defaults to RetryPolicy().
+        headers: Headers sent with every request.
+        max_in_flight: Requests submitted but not yet delivered. Defaults to twice max_workers.
+            Up to as many again may wait for a rate-limit token.
+        rate_limiter: Per-host rate limits applied before every attempt. When
+            streaming, the first attempt's token is taken before the request is
+            handed to a worker, so requests waiting on a throttled host hold no
+            thread and other hosts keep being fetched; retries wait in the worker,
+            like their backoff.
+
+    Example:
+    >>> with FetchEngine(max_workers=32) as engine:
+    ...     space = ParameterSpace({"page": list(range(1, 1001))})
+    ...     for result in engine.fetch_combos("https://api.example.com/items", space):
+    ...         if result.ok:
+    ...             store(result.params, result.body)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        max_connections_per_host: int = 8,
+        timeout: float = 30.0,
+        retry: Optional[RetryPolicy] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        max_in_flight: Optional[int] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers: int = max_workers
+        self.retry: RetryPolicy = retry or RetryPolicy()
+        self.headers: Dict[str, str] = dict(headers or {})
+        self.max_in_flight: int = max_in_flight if max_in_flight is not None else 2 * max_workers
+        self.rate_limiter: Optional[HostRateLimiter] = rate_limiter
+        self.pool: ConnectionPool = ConnectionPool(max_connections_per_host, timeout)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rsq-fetch")
+
+    def __enter__(self) -> "FetchEngine":
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker threads and close pooled connections."""
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+    def fetch(
+        self,
+        url: str,
+        index: int = 0,
+        params: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> FetchResult:
+        """Fetch one URL in the calling thread, with retries.
+
+        Args:
+            url: URL to fetch.
+            index: Position reported in the result.
+            params: Parameters reported in the result.
+            headers: Extra headers for this request, added to the engine's headers.
+
+        Returns:
+            FetchResult; failures are reported in it rather than raised.
+        """
+        return self.__fetch(url, index, params, headers, False)
+
+    def __fetch(
+        self,
+        url: str,
+        index: int,
+        params: Optional[Mapping[str, Any]],
+        headers: Optional[Mapping[str, str]],
+        has_token: bool,
+    ) -> FetchResult:
+        start = time.perf_counter()
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return FetchResult(url, index, error=ValueError(f"Invalid URL: {url}"), params=params)
+        key: HostKey = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        request_headers = {**self.headers, **headers} if headers else self.headers
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None and not (has_token and attempt == 1):
+                self.rate_limiter.acquire(key[1])
+            try:
+                status, response_headers, body = self.__request(key, target, request_headers)
+            except (OSError, http.client.HTTPException) as e:
+                if attempt >= self.retry.max_attempts:
+                    return FetchResult(url, index, elapsed_seconds=time.perf_counter() - start,
+                                       attempts=attempt, error=e, params=params)
+                time.sleep(self.retry.get_delay(attempt))
+                continue
+
+            if status in self.retry.retry_statuses and attempt < self.retry.max_attempts:
+                time.sleep(self.retry.get_delay(attempt, response_headers.get("retry-after")))
+                continue
+            return FetchResult(url, index, status, response_headers, body, time.perf_counter() - start, attempt,
+                               params=params)
+
+    def fetch_many(self, urls: Iterable[str]) -> Iterator[FetchResult]:
+        """Fetch URLs concurrently, yielding results as they complete.
+
+        Args:
+            urls: URLs to fetch; consumed lazily.
+
+        Yields:
+            One FetchResult per URL, in completion order.
+        """
+        return self.__stream((url, None) for url in urls)
+
+    def fetch_combos(self, base_url: str, combos: Iterable[Mapping[str, Any]]) -> Iterator[FetchResult]:
+        """Fetch one URL per parameter combination, yielding results as they complete.
+
+        URLs are built with UrlBuilder, so they are identical to ``url_encode``.
+
+        Args:
+            base_url: Base URL to append parameters to.
+            combos: Parameter dictionaries, such as a ParameterSpace.
+
+        Yields:
+            One FetchResult per combination, in completion order, with params set.
+        """
+        builder = UrlBuilder(base_url)
+        return self.__stream((builder.build(combo), combo) for combo in combos)
+
+    async def fetch_many_async(self, urls: Iterable[str]) -> AsyncIterator[FetchResult]:
+        """Fetch URLs concurrently from asyncio code, yielding results as they complete.
+
+        Requests run on the engine's thread pool, so the event loop is never blocked
+        and the same keep-alive pools are shared with the synchronous methods.
+
+        Args:
+            urls: URLs to fetch; consumed lazily.
+
+        Yields:
+            One FetchResult per URL, in completion order.
+        """
+        loop = asyncio.get_running_loop()
+        pending: Set["asyncio.Future[FetchResult]"] = set()
+
+        async def run(url: str, index: int) -> FetchResult:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(url)
+            return await loop.run_in_executor(self._executor, self.__fetch, url, index, None, None,
+                                              self.rate_limiter is not None)
+
+        for index, url in enumerate(urls):
+            pending.add(asyncio.ensure_future(run(url, index)))
+            if len(pending) >= self.max_in_flight:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    def __stream(self, requests: Iterable[Tuple[str, Optional[Mapping[str, Any]]]]) -> Iterator[FetchResult]:
+        pending: Set[Future[FetchResult]] = set()
+        throttled: List[Tuple[float, int, str, Optional[Mapping[str, Any]]]] = []
+        iterator = enumerate(requests)
+        exhausted = False
+
+        def dispatch(index: int, url: str, params: Optional[Mapping[str, Any]]) -> None:
+            if self.rate_limiter is not None:
+                bucket = self.rate_limiter.get_bucket(url)
+                if not bucket.try_acquire():
+                    ready_at = time.monotonic() + max(bucket.time_until_available(), 1e-4)
+                    heapq.heappush(throttled, (ready_at, index, url, params))
+                    return
+            pending.add(self._executor.submit(self.__fetch, url, index, params, None, self.rate_limiter is not None))
+
+        try:
+            while True:
+                while throttled and throttled[0][0] <= time.monotonic() and len(pending) < self.max_in_flight:
+                    _, index, url, params = heapq.heappop(throttled)
+                    dispatch(index, url, params)
+                while not exhausted and len(pending) < self.max_in_flight and len(throttled) < self.max_in_flight:
+                    try:
+                        index, (url, params) = next(iterator)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    dispatch(index, url, params)
+
+                if exhausted and not pending and not throttled:
+                    return
+                timeout: Optional[float] = None
+                if throttled and len(pending) < self.max_in_flight:
+                    timeout = max(throttled[0][0] - time.monotonic(), 0.0)
+                if not pending:
+                    time.sleep(timeout or 0.0)
+                    continue
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def __request(self, key: HostKey, target: str, headers: Mapping[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        connection, reused = self.pool.acquire(key)
+        reusable = False
+        try:
+            try:
+                response = self.__send(connection, target, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                connection.close()
+                response = self.__send(connection, target, headers)
+            body = response.read()
+            reusable = not response.will_close
+            headers = {name.lower(): value for name, value in response.getheaders()}
+            return response.status, headers, body
+        finally:
+            self.pool.release(key, connection, reusable)
+
+    def __send(
+        self, connection: http.client.HTTPConnection, target: str, headers: Mapping[str, str]
+    ) -> http.client.HTTPResponse:
+        connection.request("GET", target, headers=dict(headers))
+        return connection.getresponse()
+
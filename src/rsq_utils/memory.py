@@ -1,50 +1,170 @@
 """Memory management utilities for monitoring system and process memory usage."""
-from typing import Dict, List, Optional
-import psutil
+import os
+import sys
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import psutil
 
 MemoryData = Dict[str, float]
 
+BYTES_PER_GB: float = float(1024 ** 3)
+_PROC_READ_BYTES: int = 8192
+
+
+class MemorySample(NamedTuple):
+    """Compact memory snapshot in gigabytes and percent, in MemoryData key order."""
+    system_memory_total_gb: float
+    system_memory_used_gb: float
+    system_memory_available_gb: float
+    system_memory_used_percent: float
+    process_memory_used_gb: float
+
+    def to_memory_data(self) -> MemoryData:
+        """Convert to the dictionary layout returned by Memory.get_current_memory."""
+        return {
+            "system_memory_total_gb": self.system_memory_total_gb,
+            "system_memory_used_gb": self.system_memory_used_gb,
+            "system_memory_available_gb": self.system_memory_available_gb,
+            "system_memory_used_%": self.system_memory_used_percent,
+            "process_memory_used_gb": self.process_memory_used_gb,
+        }
+
+
+class _ProcMemoryReader:
+    """Reads process RSS and system memory straight from /proc on Linux.
+
+    Keeps the /proc files open and re-reads them with ``os.pread`` so a sample
+    costs two system calls and no allocation beyond the read buffers.
+    """
+
+    def __init__(self) -> None:
+        self._page_size: int = os.sysconf("SC_PAGE_SIZE")
+        self._process_id: int = -1
+        self._statm_descriptor: int = -1
+        self._meminfo_descriptor: int = -1
+        self._meminfo_descriptor = os.open("/proc/meminfo", os.O_RDONLY)
+        self.__open_statm()
+
+    def read(self) -> MemorySample:
+        if self._process_id != os.getpid():
+            self.__open_statm()
+        rss_bytes = int(os.pread(self._statm_descriptor, 128, 0).split()[1]) * self._page_size
+
+        total_kb = available_kb = -1
+        for line in os.pread(self._meminfo_descriptor, _PROC_READ_BYTES, 0).splitlines():
+            if line.startswith(b"MemTotal:"):
+                total_kb = int(line.split()[1])
+            elif line.startswith(b"MemAvailable:"):
+                available_kb = int(line.split()[1])
+                break
+        if total_kb <= 0 or available_kb < 0:
+            raise OSError("MemTotal or MemAvailable missing from /proc/meminfo")
+
+        total = total_kb * 1024
+        used = total - available_kb * 1024
+        return MemorySample(
+            total / BYTES_PER_GB,
+            used / BYTES_PER_GB,
+            available_kb * 1024 / BYTES_PER_GB,
+            used / total * 100,
+            rss_bytes / BYTES_PER_GB,
+        )
+
+    def __del__(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for descriptor in (self._statm_descriptor, self._meminfo_descriptor):
+            if descriptor >= 0:
+                os.close(descriptor)
+        self._statm_descriptor = self._meminfo_descriptor = -1
+
+    def __open_statm(self) -> None:
+        if self._statm_descriptor >= 0:
+            os.close(self._statm_descriptor)
+        self._process_id = os.getpid()
+        self._statm_descriptor = os.open(f"/proc/{self._process_id}/statm", os.O_RDONLY)
+
+
 class Memory:
     """Memory manager for tracking system and process memory usage over time.
     
     This class provides utilities to monitor memory usage of both the system and the current
     process. It can track memory usage over time by maintaining a history of measurements.
     
+    The process handle is created once and reused. On Linux, samples are read
+    directly from /proc unless ``use_proc`` is False; psutil is the fallback and is
+    only imported when it is first needed.
+    
     Attributes:
         start_memory: Initial memory snapshot taken at instantiation
         memory_history: List of memory snapshots taken over time
         current_memory: Most recent memory snapshot (None until get_current_memory is called)
     """
     
-    def __init__(self) -> None:
-        """Initialize the memory manager with an initial memory snapshot."""
+    def __init__(self, use_proc: bool = True) -> None:
+        """Initialize the memory manager with an initial memory snapshot.
+        
+        Args:
+            use_proc: Read /proc directly on Linux instead of going through psutil.
+        """
+        self._process: Optional["psutil.Process"] = None
+        self._proc_reader: Optional[_ProcMemoryReader] = None
+        if use_proc and sys.platform.startswith("linux"):
+            try:
+                self._proc_reader = _ProcMemoryReader()
+            except OSError:
+                self._proc_reader = None
         self.start_memory: MemoryData = self.__get_memory_data()
         self.memory_history: List[MemoryData] = [self.start_memory]
         self.current_memory: Optional[MemoryData] = None
         
-    def __get_memory_data(self) -> MemoryData:
-        """Get current memory usage data for both system and process.
+    def sample(self) -> MemorySample:
+        """Take a low-overhead memory sample without recording it.
         
         Returns:
-            Dictionary containing memory usage metrics in gigabytes and percentages.
+            MemorySample with the same metrics as get_current_memory.
             
         Raises:
-            psutil.Error: If unable to access system or process memory information.
+            RuntimeError: If unable to access system or process memory information.
         """
+        if self._proc_reader is not None:
+            try:
+                return self._proc_reader.read()
+            except (OSError, ValueError, IndexError):
+                self._proc_reader.close()
+                self._proc_reader = None
+        return self.__sample_with_psutil()
+
+    def __sample_with_psutil(self) -> MemorySample:
+        import psutil
+
         try:
+            if self._process is None or self._process.pid != os.getpid():
+                self._process = psutil.Process()
             system_memory = psutil.virtual_memory()
-            process_memory = psutil.Process()
-
-            return {
-                "system_memory_total_gb": system_memory.total / (1024 ** 3),
-                "system_memory_used_gb": system_memory.used / (1024 ** 3),
-                "system_memory_available_gb": system_memory.available / (1024 ** 3),
-                "system_memory_used_%": system_memory.used / system_memory.total * 100,
-                "process_memory_used_gb": process_memory.memory_info().rss / (1024 ** 3)
-            }
+            return MemorySample(
+                system_memory.total / BYTES_PER_GB,
+                system_memory.used / BYTES_PER_GB,
+                system_memory.available / BYTES_PER_GB,
+                system_memory.used / system_memory.total * 100,
+                self._process.memory_info().rss / BYTES_PER_GB,
+            )
         except psutil.Error as e:
             raise RuntimeError(f"Failed to get memory data: {str(e)}") from e
 
+    def __get_memory_data(self) -> MemoryData:
+        """Get current memory usage data for both system and process.
+        
+        Returns:
+            Dictionary containing memory usage metrics in gigabytes and percentages.
+            
+        Raises:
+            RuntimeError: If unable to access system or process memory information.
+        """
+        return self.sample().to_memory_data()
+
     def append_memory_history(self) -> None:
         """Add current memory snapshot to history."""
         self.memory_history.append(self.__get_memory_data())
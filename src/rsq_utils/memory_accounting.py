@@ -0,0 +1,238 @@
+"""Per-key memory accounting and budgets for variable containers."""
+import sys
+import types
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Literal, Mapping, Optional, Set, Tuple
+
+BudgetPolicy = Literal["reject", "evict"]
+
+_ATOMIC_TYPES = (type(None), bool, int, float, complex, str, bytes, bytearray, range)
+_SHARED_TYPES = (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_sizeof(value: Any) -> int:
+    """Estimate the memory held by a value and everything it references.
+
+    Uses pandas ``memory_usage(deep=True)`` for DataFrames, Series and indexes, and
+    ``sys.getsizeof`` for numpy arrays (which includes the data buffer when the array
+    owns it). Containers and object attributes are walked iteratively; objects reached
+    more than once are counted once, so cycles are safe. Modules, classes and
+    functions are treated as shared program state and not counted. numpy and pandas
+    are never imported here: values of their types can only exist once they are loaded.
+
+    Args:
+        value: Value to measure.
+
+    Returns:
+        Estimated size in bytes.
+
+    Examples:
+        >>> deep_sizeof(np.zeros(1000)) >= 8000
+        True
+        >>> deep_sizeof([1, 2, 3]) > sys.getsizeof([1, 2, 3])
+        True
+    """
+    np = sys.modules.get("numpy")
+    pd = sys.modules.get("pandas")
+    seen: Set[int] = set()
+    pending: List[Any] = [value]
+    total = 0
+    while pending:
+        item = pending.pop()
+        if id(item) in seen or isinstance(item, _SHARED_TYPES):
+            continue
+        seen.add(id(item))
+
+        if pd is not None and isinstance(item, pd.DataFrame):
+            total += int(item.memory_usage(index=True, deep=True).sum())
+        elif pd is not None and isinstance(item, (pd.Series, pd.Index)):
+            total += int(item.memory_usage(deep=True))
+        elif np is not None and isinstance(item, np.ndarray):
+            total += sys.getsizeof(item)
+            if item.dtype.hasobject:
+                pending.extend(item.ravel().tolist())
+        else:
+            total += sys.getsizeof(item)
+            if isinstance(item, _ATOMIC_TYPES):
+                continue
+            elif isinstance(item, dict):
+                pending.extend(item.keys())
+                pending.extend(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset, deque)):
+                pending.extend(item)
+            else:
+                pending.extend(_object_references(item))
+    return total
+
+
+def _object_references(item: Any) -> Iterable[Any]:
+    attributes = getattr(item, "__dict__", None)
+    if attributes is not None:
+        yield attributes
+    for klass in type(item).__mro__:
+        for slot in getattr(klass, "__slots__", ()):
+            if hasattr(item, slot):
+                yield getattr(item, slot)
+
+
+@dataclass
+class _KeySize:
+    value: Any
+    size_bytes: int
+
+
+class MemoryAccountant:
+    """Tracks the deep size of each key in a Variables container and enforces a budget.
+
+    Sizes are measured once per value and remembered against the value object, so
+    after an update only the new values are measured. A key whose object was
+    replaced directly is re-measured on the next reconcile; a value mutated in place
+    keeps its old size until ``refresh`` is called.
+
+    Args:
+        max_bytes: Hard budget for the total size. Defaults to None, meaning no budget.
+        policy: What to do when an update would exceed the budget: "reject" raises
+            ValueError and leaves the variables unchanged, "evict" removes the oldest
+            other keys until the update fits.
+
+    Example:
+    >>> accountant = MemoryAccountant(max_bytes=10 * 1024 ** 2, policy="evict")
+    >>> cache = Cache({"prices": np.zeros(1000)}, memory_accountant=accountant)
+    >>> cache.get_largest_variables(1)
+    [('prices', 8112)]
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, policy: BudgetPolicy = "reject") -> None:
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("max_bytes must be a non-negative integer")
+        if policy not in ("reject", "evict"):
+            raise ValueError("policy must be either 'reject' or 'evict'")
+        self.max_bytes: Optional[int] = max_bytes
+        self.policy: BudgetPolicy = policy
+        self.total_bytes: int = 0
+        self._sizes: Dict[str, _KeySize] = {}
+
+    def get_sizes(self) -> Dict[str, int]:
+        """Get the tracked size of each key.
+
+        Returns:
+            Dictionary of key to size in bytes.
+        """
+        return {key: entry.size_bytes for key, entry in self._sizes.items()}
+
+    def get_largest(self, count: int = 10) -> List[Tuple[str, int]]:
+        """Get the largest tracked keys.
+
+        Args:
+            count: Number of keys to return.
+
+        Returns:
+            (key, size in bytes) pairs, largest first.
+        """
+        return sorted(self.get_sizes().items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def reconcile(self, variables: Mapping[str, Any]) -> None:
+        """Bring tracked sizes in line with the variables, measuring only new or replaced values.
+
+        Args:
+            variables: Variables the accountant tracks.
+        """
+        for key in [key for key in self._sizes if key not in variables]:
+            self.forget(key)
+        for key, value in variables.items():
+            entry = self._sizes.get(key)
+            if entry is None or entry.value is not value:
+                self.track(key, value)
+
+    def track(self, key: str, value: Any) -> int:
+        """Measure and record the size of a key.
+
+        Args:
+            key: Key to record.
+            value: Value stored under key.
+
+        Returns:
+            Size of the value in bytes.
+        """
+        self.forget(key)
+        size_bytes = deep_sizeof(value)
+        self._sizes[key] = _KeySize(value=value, size_bytes=size_bytes)
+        self.total_bytes += size_bytes
+        return size_bytes
+
+    def refresh(self, key: str) -> int:
+        """Re-measure a key whose value was mutated in place.
+
+        Args:
+            key: Key to re-measure.
+
+        Returns:
+            New size in bytes.
+
+        Raises:
+            KeyError: If the key is not tracked.
+        """
+        return self.track(key, self._sizes[key].value)
+
+    def forget(self, key: str) -> None:
+        """Stop tracking a key.
+
+        Args:
+            key: Key to forget. Unknown keys are ignored.
+        """
+        entry = self._sizes.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size_bytes
+
+    def plan_update(self, updates: Mapping[str, Any], current_keys: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        """Measure an update and decide which keys must go to keep within budget.
+
+        Args:
+            updates: New values about to be stored.
+            current_keys: Keys currently stored, oldest first.
+
+        Returns:
+            Measured sizes of the new values and the keys to evict.
+
+        Raises:
+            ValueError: If the update exceeds the budget under the "reject" policy,
+                or cannot fit even after evicting every other key.
+        """
+        new_sizes = {key: deep_sizeof(value) for key, value in updates.items()}
+        if self.max_bytes is None:
+            return new_sizes, []
+
+        replaced_bytes = sum(self._sizes[key].size_bytes for key in updates if key in self._sizes)
+        projected = self.total_bytes - replaced_bytes + sum(new_sizes.values())
+        if projected <= self.max_bytes:
+            return new_sizes, []
+        if self.policy == "reject":
+            raise ValueError(
+                f"Update of {sum(new_sizes.values())} bytes would exceed the memory budget "
+                f"({projected} > {self.max_bytes} bytes)"
+            )
+
+        evictions: List[str] = []
+        for key in current_keys:
+            if projected <= self.max_bytes:
+                break
+            if key in updates or key not in self._sizes:
+                continue
+            evictions.append(key)
+            projected -= self._sizes[key].size_bytes
+        if projected > self.max_bytes:
+            raise ValueError(f"Update does not fit in the memory budget of {self.max_bytes} bytes")
+        return new_sizes, evictions
+
+    def record(self, key: str, value: Any, size_bytes: int) -> None:
+        """Record a size measured by plan_update.
+
+        Args:
+            key: Key to record.
+            value: Value stored under key.
+            size_bytes: Measured size in bytes.
+        """
+        self.forget(key)
+        self._sizes[key] = _KeySize(value=value, size_bytes=size_bytes)
+        self.total_bytes += size_bytes
@@ -0,0 +1,170 @@
+"""Background memory sampling into a fixed-size, array-backed ring buffer."""
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple, Type
+from types import TracebackType
+
+import numpy as np
+import pandas as pd
+
+from .memory import Memory
+
+MEMORY_METRICS: Tuple[str, ...] = (
+    "system_memory_total_gb",
+    "system_memory_used_gb",
+    "system_memory_available_gb",
+    "system_memory_used_%",
+    "process_memory_used_gb",
+)
+
+
+class MemoryRingBuffer:
+    """Preallocated ring buffer holding one float64 array per metric plus timestamps.
+
+    Appending is O(1) and never allocates; once full, the oldest sample is overwritten.
+
+    Args:
+        capacity: Number of samples kept.
+        metrics: Names of the metrics stored per sample.
+
+    Example:
+    >>> ring_buffer = MemoryRingBuffer(capacity=2, metrics=("rss_gb",))
+    >>> for value in [1.0, 2.0, 3.0]:
+    ...     ring_buffer.append(time.time(), (value,))
+    >>> ring_buffer.to_arrays()["rss_gb"]
+    array([2., 3.])
+    """
+
+    def __init__(self, capacity: int, metrics: Sequence[str] = MEMORY_METRICS) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity: int = capacity
+        self.metrics: Tuple[str, ...] = tuple(metrics)
+        self.timestamps: np.ndarray = np.full(capacity, np.nan)
+        self.values: Dict[str, np.ndarray] = {metric: np.full(capacity, np.nan) for metric in self.metrics}
+        self._columns: Tuple[np.ndarray, ...] = tuple(self.values[metric] for metric in self.metrics)
+        self._next_position: int = 0
+        self._count: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        """Record one sample, overwriting the oldest when full.
+
+        Args:
+            timestamp: Time of the sample in seconds since the epoch.
+            values: One value per metric, in the order of ``metrics``.
+        """
+        with self._lock:
+            position = self._next_position
+            self.timestamps[position] = timestamp
+            for column, value in zip(self._columns, values):
+                column[position] = value
+            self._next_position = (position + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+    def clear(self) -> None:
+        """Discard every sample."""
+        with self._lock:
+            self._next_position = 0
+            self._count = 0
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Copy the samples out in chronological order.
+
+        Returns:
+            Dictionary with a "timestamp" array and one array per metric.
+        """
+        with self._lock:
+            start = (self._next_position - self._count) % self.capacity
+            order = (start + np.arange(self._count)) % self.capacity
+            arrays = {"timestamp": self.timestamps[order]}
+            for metric in self.metrics:
+                arrays[metric] = self.values[metric][order]
+        return arrays
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Copy the samples out as a DataFrame indexed by sample time.
+
+        Returns:
+            DataFrame with one column per metric and a DatetimeIndex.
+        """
+        arrays = self.to_arrays()
+        index = pd.to_datetime(arrays.pop("timestamp"), unit="s")
+        df: pd.DataFrame = pd.DataFrame(arrays, index=index)
+        return df
+
+
+class MemorySampler:
+    """Background thread that samples memory at a fixed interval into a MemoryRingBuffer.
+
+    Memory use is bounded by the buffer capacity, so the sampler can run for the
+    lifetime of a service. Usable as a context manager.
+
+    Args:
+        memory: Memory instance used to take samples. Defaults to a new Memory.
+        interval: Seconds between samples.
+        capacity: Number of samples kept in the ring buffer.
+
+    Example:
+    >>> with MemorySampler(interval=0.1, capacity=600) as sampler:
+    ...     run_batch()
+    >>> peak_gb = sampler.buffer.to_dataframe()["process_memory_used_gb"].max()
+    """
+
+    def __init__(self, memory: Optional[Memory] = None, interval: float = 1.0, capacity: int = 3600) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.memory: Memory = memory if memory is not None else Memory()
+        self.interval: float = interval
+        self.buffer: MemoryRingBuffer = MemoryRingBuffer(capacity, MEMORY_METRICS)
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the sampling thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread.
+
+        Raises:
+            RuntimeError: If the sampler is already running.
+        """
+        if self.is_running:
+            raise RuntimeError("Sampler already running")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.__run, name="rsq-memory-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the thread to finish."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def sample_once(self) -> None:
+        """Take one sample immediately."""
+        self.buffer.append(time.time(), self.memory.sample())
+
+    def __enter__(self) -> "MemorySampler":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.stop()
+
+    def __run(self) -> None:
+        while not self._stop_event.is_set():
+            self.sample_once()
+            self._stop_event.wait(self.interval)
@@ -0,0 +1,262 @@
+"""Memory-pressure watermarks that run callbacks when memory crosses a threshold."""
+import threading
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Callable, Dict, List, Literal, Optional, Type
+
+from .memory import Memory, MemorySample
+
+WatermarkMetric = Literal["process_rss_gb", "system_available_gb"]
+PressureCallback = Callable[["MemoryPressureEvent"], None]
+
+
+@dataclass(frozen=True)
+class MemoryPressureEvent:
+    """A watermark entering or leaving memory pressure.
+
+    Attributes:
+        watermark: Name of the watermark that changed state.
+        metric: Metric the watermark watches.
+        value_gb: Metric value that caused the change.
+        under_pressure: True when pressure started, False when it was released.
+        sample: Full memory sample the decision was based on.
+    """
+    watermark: str
+    metric: WatermarkMetric
+    value_gb: float
+    under_pressure: bool
+    sample: MemorySample
+
+
+@dataclass
+class MemoryWatermark:
+    """A pair of thresholds with hysteresis on one memory metric.
+
+    For "process_rss_gb", pressure starts when RSS reaches ``high_gb`` and is released
+    once it falls back to ``low_gb``. For "system_available_gb", pressure starts when
+    available memory drops to ``low_gb`` and is released once it recovers to
+    ``high_gb``. The gap between the two thresholds keeps callbacks from flapping
+    while the metric hovers around a single value.
+    """
+    name: str
+    metric: WatermarkMetric
+    low_gb: float
+    high_gb: float
+    on_pressure: List[PressureCallback] = field(default_factory=list)
+    on_release: List[PressureCallback] = field(default_factory=list)
+    under_pressure: bool = False
+
+    def evaluate(self, value_gb: float) -> Optional[bool]:
+        """Update the pressure state from a new metric value.
+
+        Args:
+            value_gb: Current value of the watched metric.
+
+        Returns:
+            The new pressure state if it changed, otherwise None.
+        """
+        if self.metric == "process_rss_gb":
+            starts, ends = value_gb >= self.high_gb, value_gb <= self.low_gb
+        else:
+            starts, ends = value_gb <= self.low_gb, value_gb >= self.high_gb
+
+        if not self.under_pressure and starts:
+            self.under_pressure = True
+            return True
+        if self.under_pressure and ends:
+            self.under_pressure = False
+            return False
+        return None
+
+
+class MemoryPressureMonitor:
+    """Background thread that checks memory watermarks and runs their callbacks.
+
+    Each check is a single ``Memory.sample`` call compared against every watermark,
+    so hot code never has to poll memory itself. Callbacks run on the monitor thread.
+    An exception from a callback does not stop the monitor; it is kept in
+    ``last_error`` and the remaining callbacks still run.
+
+    Args:
+        memory: Memory instance used to take samples. Defaults to a new Memory.
+        interval: Seconds between checks.
+
+    Example:
+    >>> monitor = MemoryPressureMonitor(interval=0.5)
+    >>> monitor.add_watermark("rss", "process_rss_gb", low_gb=6, high_gb=8,
+    ...                       on_pressure=lambda event: cache.spill(64))
+    >>> monitor.add_watermark("system", "system_available_gb", low_gb=1, high_gb=2,
+    ...                       on_pressure=lambda event: intake.pause(),
+    ...                       on_release=lambda event: intake.resume())
+    >>> with monitor:
+    ...     run_batches()
+    """
+
+    def __init__(self, memory: Optional[Memory] = None, interval: float = 1.0) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.memory: Memory = memory if memory is not None else Memory()
+        self.interval: float = interval
+        self.last_error: Optional[BaseException] = None
+        self._watermarks: Dict[str, MemoryWatermark] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the monitor thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_watermark(
+        self,
+        name: str,
+        metric: WatermarkMetric,
+        low_gb: float,
+        high_gb: float,
+        on_pressure: Optional[PressureCallback] = None,
+        on_release: Optional[PressureCallback] = None,
+    ) -> MemoryWatermark:
+        """Add or replace a watermark.
+
+        Args:
+            name: Name of the watermark.
+            metric: "process_rss_gb" or "system_available_gb".
+            low_gb: Lower threshold in gigabytes.
+            high_gb: Upper threshold in gigabytes.
+            on_pressure: Called when pressure starts.
+            on_release: Called when pressure is released.
+
+        Returns:
+            The added watermark.
+
+        Raises:
+            ValueError: If the metric is unknown or low_gb is not below high_gb.
+        """
+        if metric not in ("process_rss_gb", "system_available_gb"):
+            raise ValueError("metric must be either 'process_rss_gb' or 'system_available_gb'")
+        if not low_gb < high_gb:
+            raise ValueError("low_gb must be below high_gb")
+        watermark = MemoryWatermark(name=name, metric=metric, low_gb=low_gb, high_gb=high_gb)
+        if on_pressure is not None:
+            watermark.on_pressure.append(on_pressure)
+        if on_release is not None:
+            watermark.on_release.append(on_release)
+        with self._lock:
+            self._watermarks[name] = watermark
+        return watermark
+
+    def remove_watermark(self, name: str) -> None:
+        """Remove a watermark.
+
+        Args:
+            name: Name of the watermark. Unknown names are ignored.
+        """
+        with self._lock:
+            self._watermarks.pop(name, None)
+
+    def register_callback(
+        self,
+        name: str,
+        on_pressure: Optional[PressureCallback] = None,
+        on_release: Optional[PressureCallback] = None,
+    ) -> None:
+        """Add callbacks to an existing watermark.
+
+        Args:
+            name: Name of the watermark.
+            on_pressure: Called when pressure starts.
+            on_release: Called when pressure is released.
+
+        Raises:
+            KeyError: If there is no watermark with that name.
+        """
+        with self._lock:
+            watermark = self._watermarks[name]
+            if on_pressure is not None:
+                watermark.on_pressure.append(on_pressure)
+            if on_release is not None:
+                watermark.on_release.append(on_release)
+
+    def is_under_pressure(self, name: Optional[str] = None) -> bool:
+        """Check if a watermark, or any watermark, is under pressure.
+
+        Args:
+            name: Name of the watermark. Checks every watermark if None.
+
+        Returns:
+            True if under pressure.
+        """
+        with self._lock:
+            if name is not None:
+                return self._watermarks[name].under_pressure
+            return any(watermark.under_pressure for watermark in self._watermarks.values())
+
+    def check(self) -> List[MemoryPressureEvent]:
+        """Take one sample, update every watermark and run callbacks for state changes.
+
+        Returns:
+            Events for the watermarks that changed state.
+        """
+        sample = self.memory.sample()
+        values = {
+            "process_rss_gb": sample.process_memory_used_gb,
+            "system_available_gb": sample.system_memory_available_gb,
+        }
+        events: List[MemoryPressureEvent] = []
+        callbacks: List[List[PressureCallback]] = []
+        with self._lock:
+            for watermark in self._watermarks.values():
+                value_gb = values[watermark.metric]
+                under_pressure = watermark.evaluate(value_gb)
+                if under_pressure is None:
+                    continue
+                events.append(MemoryPressureEvent(watermark.name, watermark.metric, value_gb, under_pressure, sample))
+                callbacks.append(list(watermark.on_pressure if under_pressure else watermark.on_release))
+
+        for event, event_callbacks in zip(events, callbacks):
+            for callback in event_callbacks:
+                try:
+                    callback(event)
+                except Exception as e:
+                    self.last_error = e
+        return events
+
+    def start(self) -> None:
+        """Start checking in a daemon thread.
+
+        Raises:
+            RuntimeError: If the monitor is already running.
+        """
+        if self.is_running:
+            raise RuntimeError("Monitor already running")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.__run, name="rsq-memory-pressure", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop checking and wait for the thread to finish."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "MemoryPressureMonitor":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.stop()
+
+    def __run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.check()
+            except RuntimeError as e:
+                self.last_error = e
+            self._stop_event.wait(self.interval)
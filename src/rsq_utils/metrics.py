@@ -0,0 +1,722 @@
+"""Process-wide metrics: counters, gauges and histograms with Prometheus and JSON lines exporters."""
+import abc
+import bisect
+import contextlib
+import itertools
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Tuple, Type, TypeVar, Union
+)
+
+from .memory import Memory
+from .time import Stopwatch
+
+MetricType = Literal["counter", "gauge", "histogram"]
+Collector = Callable[[], Iterable["MetricFamily"]]
+M = TypeVar("M", bound="Metric")
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_NAME_PATTERN = re.compile(r"^[a-zA-Z_:][a-zA-Z0-9_:]*$")
+_LABEL_PATTERN = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+
+@dataclass(frozen=True)
+class MetricSample:
+    """One exported value.
+
+    Attributes:
+        name: Sample name; histograms add _bucket, _sum and _count suffixes.
+        labels: Label names and values.
+        value: Sample value.
+    """
+    name: str
+    labels: Dict[str, str]
+    value: float
+
+
+@dataclass(frozen=True)
+class MetricFamily:
+    """Every sample of one metric, as collected for export.
+
+    Attributes:
+        name: Metric name.
+        type: "counter", "gauge" or "histogram".
+        help: Description of the metric.
+        samples: Current samples, one per label combination (several for histograms).
+    """
+    name: str
+    type: MetricType
+    help: str
+    samples: List[MetricSample] = field(default_factory=list)
+
+
+class _CellOwner:
+    """Lives in a thread's local storage, so it is freed when the thread ends."""
+    __slots__ = ("__weakref__",)
+
+
+class _ThreadCells:
+    """Per-thread accumulators that are summed on read.
+
+    Each thread only ever writes to its own cell, so updates take no lock; the
+    lock is only taken the first time a thread updates and when reading. When a
+    thread ends, its cell is folded into a retired total and dropped, so threads
+    that come and go do not grow memory or slow reads down.
+    """
+
+    def __init__(self, width: int) -> None:
+        self._width: int = width
+        self._local: threading.local = threading.local()
+        self._cells: Dict[int, List[float]] = {}
+        self._retired: List[float] = [0.0] * width
+        self._keys: Iterator[int] = itertools.count()
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self) -> List[float]:
+        try:
+            return self._local.cell  # type: ignore[no-any-return]
+        except AttributeError:
+            cell = [0.0] * self._width
+            owner = _CellOwner()
+            with self._lock:
+                key = next(self._keys)
+                self._cells[key] = cell
+            weakref.finalize(owner, _ThreadCells._retire, weakref.ref(self), key)
+            self._local.owner = owner
+            self._local.cell = cell
+            return cell
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            cells = [self._retired, *self._cells.values()]
+        return [math.fsum(values) for values in zip(*cells)]
+
+    @staticmethod
+    def _retire(reference: "weakref.ref[_ThreadCells]", key: int) -> None:
+        cells = reference()
+        if cells is None:
+            return
+        with cells._lock:
+            cell = cells._cells.pop(key)
+            cells._retired = [math.fsum(values) for values in zip(cells._retired, cell)]
+
+
+def _check_name(name: str) -> None:
+    if not _NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid metric name: {name!r}")
+
+
+class Metric(abc.ABC):
+    """Base class for metrics, optionally split by labels.
+
+    A metric without label names is updated directly. A metric with label names
+    is a family: ``labels(...)`` returns the child for one combination of values,
+    created on first use, and the children are updated instead.
+
+    Args:
+        name: Metric name, as in Prometheus ([a-zA-Z_:][a-zA-Z0-9_:]*).
+        help: Description of the metric.
+        labelnames: Names of the labels that split the metric.
+    """
+    type: MetricType
+
+    def __init__(self, name: str, help: str = "", labelnames: Sequence[str] = ()) -> None:
+        _check_name(name)
+        for label in labelnames:
+            if not _LABEL_PATTERN.match(label) or label == "le":
+                raise ValueError(f"Invalid label name: {label!r}")
+        self.name: str = name
+        self.help: str = help
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "Metric"] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def labels(self: M, *values: Any, **labels: Any) -> M:
+        """Get the child metric for one combination of label values.
+
+        Args:
+            *values: Label values in the order of labelnames.
+            **labels: Label values by name.
+
+        Returns:
+            The child metric.
+
+        Raises:
+            ValueError: If the values do not match labelnames.
+        """
+        if values and labels:
+            raise ValueError("Pass label values either by position or by name")
+        if labels:
+            if set(labels) != set(self.labelnames):
+                raise ValueError(f"Expected labels {self.labelnames}, got {tuple(labels)}")
+            values = tuple(labels[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames) or not self.labelnames:
+            raise ValueError(f"Expected {len(self.labelnames)} label values, got {len(values)}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._make_child()
+        return child  # type: ignore[return-value]
+
+    def collect(self) -> MetricFamily:
+        """Read the current samples.
+
+        Returns:
+            The metric's samples, one group per label combination.
+        """
+        family = MetricFamily(self.name, self.type, self.help)
+        if not self.labelnames:
+            family.samples.extend(self._samples({}))
+            return family
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            family.samples.extend(child._samples(dict(zip(self.labelnames, key))))
+        return family
+
+    def _check_unlabelled(self) -> None:
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} has labels {self.labelnames}; update it through labels()")
+
+    @abc.abstractmethod
+    def _make_child(self) -> "Metric":
+        """Create an unlabelled metric of the same kind for one label combination."""
+
+    @abc.abstractmethod
+    def _samples(self, labels: Dict[str, str]) -> List[MetricSample]:
+        """Read this metric's samples, tagged with labels."""
+
+
+class Counter(Metric):
+    """Monotonically increasing count, such as requests made or rows written.
+
+    Increments go to a per-thread cell and are summed on read, so hot loops in
+    many threads do not contend on a lock.
+
+    Example:
+    >>> requests = Counter("requests_total", "Requests made", ["status"])
+    >>> requests.labels(status="200").inc()
+    >>> requests.labels(status="200").value
+    1.0
+    """
+    type: MetricType = "counter"
+
+    def __init__(self, name: str, help: str = "", labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._cells: _ThreadCells = _ThreadCells(1)
+
+    @property
+    def value(self) -> float:
+        """Current total."""
+        return self._cells.totals()[0]
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Add to the count.
+
+        Args:
+            amount: Non-negative amount to add.
+
+        Raises:
+            ValueError: If amount is negative or the metric has labels.
+        """
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._check_unlabelled()
+        self._cells.get()[0] += amount
+
+    def _make_child(self) -> "Counter":
+        return Counter(self.name, self.help)
+
+    def _samples(self, labels: Dict[str, str]) -> List[MetricSample]:
+        return [MetricSample(self.name, labels, self.value)]
+
+
+class Gauge(Metric):
+    """Value that goes up and down, such as queue length or memory in use.
+
+    A gauge can also read its value from a function at collection time.
+
+    Example:
+    >>> queue_length = Gauge("queue_length", "Items waiting")
+    >>> queue_length.set(3)
+    >>> queue_length.dec()
+    >>> queue_length.value
+    2.0
+    """
+    type: MetricType = "gauge"
+
+    def __init__(self, name: str, help: str = "", labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._value: float = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    @property
+    def value(self) -> float:
+        """Current value."""
+        return float(self._function()) if self._function is not None else self._value
+
+    def set(self, value: float) -> None:
+        """Set the value.
+
+        Raises:
+            ValueError: If the metric has labels.
+        """
+        self._check_unlabelled()
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Add to the value.
+
+        Raises:
+            ValueError: If the metric has labels.
+        """
+        self._check_unlabelled()
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Subtract from the value.
+
+        Raises:
+            ValueError: If the metric has labels.
+        """
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from a function each time the gauge is collected.
+
+        Args:
+            function: Returns the current value.
+
+        Raises:
+            ValueError: If the metric has labels.
+        """
+        self._check_unlabelled()
+        self._function = function
+
+    def _make_child(self) -> "Gauge":
+        return Gauge(self.name, self.help)
+
+    def _samples(self, labels: Dict[str, str]) -> List[MetricSample]:
+        return [MetricSample(self.name, labels, self.value)]
+
+
+class _HistogramTimer(contextlib.ContextDecorator):
+    """Times a block or function call into a histogram."""
+
+    def __init__(self, histogram: "Histogram") -> None:
+        self._histogram: Histogram = histogram
+        self._local: threading.local = threading.local()
+
+    def __enter__(self) -> "_HistogramTimer":
+        self._local.__dict__.setdefault("starts", []).append(time.perf_counter())
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self._histogram.observe(time.perf_counter() - self._local.starts.pop())
+
+
+class Histogram(Metric):
+    """Distribution of observed values counted into fixed buckets, such as request latencies.
+
+    Bucket bounds are upper bounds; a value lands in the first bucket whose bound
+    is at least the value, and anything larger in the implicit +Inf bucket.
+    Observations go to per-thread cells, so timing hot paths in many threads does
+    not contend on a lock.
+
+    Args:
+        name: Metric name.
+        help: Description of the metric.
+        labelnames: Names of the labels that split the metric.
+        buckets: Increasing bucket upper bounds. Defaults to 5 ms to 10 s.
+
+    Example:
+    >>> latency = Histogram("fetch_seconds", "Fetch latency")
+    >>> with latency.time():
+    ...     fetch()
+    >>> @latency.time()
+    ... def parse(body): ...
+    """
+    type: MetricType = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str = "",
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        bounds = [float(bound) for bound in buckets if bound != math.inf]
+        if not bounds or any(low >= high for low, high in zip(bounds, bounds[1:])):
+            raise ValueError("buckets must be a non-empty increasing sequence")
+        self.buckets: Tuple[float, ...] = tuple(bounds)
+        self._cells: _ThreadCells = _ThreadCells(len(bounds) + 2)
+
+    @property
+    def count(self) -> int:
+        """Number of observations."""
+        return int(sum(self._cells.totals()[:-1]))
+
+    @property
+    def sum(self) -> float:
+        """Sum of observed values."""
+        return self._cells.totals()[-1]
+
+    def observe(self, value: float) -> None:
+        """Record one value.
+
+        Raises:
+            ValueError: If the metric has labels.
+        """
+        self._check_unlabelled()
+        cell = self._cells.get()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self) -> _HistogramTimer:
+        """Time a block or function in seconds, as a context manager or decorator.
+
+        Returns:
+            A reusable timer that observes each elapsed time.
+
+        Raises:
+            ValueError: If the metric has labels.
+        """
+        self._check_unlabelled()
+        return _HistogramTimer(self)
+
+    def observe_stopwatch(self, stopwatch: Stopwatch) -> None:
+        """Record the elapsed time of a Stopwatch, stopped or still running.
+
+        Raises:
+            ValueError: If the stopwatch was not started or the metric has labels.
+        """
+        if stopwatch.end_time is not None and stopwatch.time_elapsed is not None:
+            self.observe(stopwatch.time_elapsed)
+        else:
+            self.observe(stopwatch.get_time_elapsed())
+
+    def get_bucket_counts(self) -> Dict[float, int]:
+        """Get the cumulative count of observations at or below each bound, ending with +Inf.
+
+        Returns:
+            Cumulative counts keyed by upper bound.
+        """
+        totals = self._cells.totals()
+        counts: Dict[float, int] = {}
+        cumulative = 0.0
+        for bound, count in zip(self.buckets + (math.inf,), totals[:-1]):
+            cumulative += count
+            counts[bound] = int(cumulative)
+        return counts
+
+    def _make_child(self) -> "Histogram":
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    def _samples(self, labels: Dict[str, str]) -> List[MetricSample]:
+        counts = self.get_bucket_counts()
+        samples = [
+            MetricSample(f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, count)
+            for bound, count in counts.items()
+        ]
+        samples.append(MetricSample(f"{self.name}_sum", labels, self.sum))
+        samples.append(MetricSample(f"{self.name}_count", labels, counts[math.inf]))
+        return samples
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(text: str, quote: bool = True) -> str:
+    text = text.replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quote else text
+
+
+class MetricsRegistry:
+    """Named metrics and collectors that are exported together.
+
+    ``counter``, ``gauge`` and ``histogram`` return the registered metric with
+    that name, creating it on first use, so modules can share metrics by name
+    without passing them around. ``get_registry`` returns the process-wide registry.
+
+    Example:
+    >>> registry = MetricsRegistry()
+    >>> registry.counter("rows_written_total", "Rows written").inc(500)
+    >>> registry.register_memory_gauges()
+    >>> print(registry.to_prometheus())
+    # HELP rows_written_total Rows written
+    # TYPE rows_written_total counter
+    rows_written_total 500
+    ...
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock: threading.Lock = threading.Lock()
+
+    def register(self, metric: M) -> M:
+        """Add a metric.
+
+        Args:
+            metric: Metric to add.
+
+        Returns:
+            The metric.
+
+        Raises:
+            ValueError: If a metric with the same name is registered.
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str) -> None:
+        """Remove a metric. Unknown names are ignored."""
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def get(self, name: str) -> Optional[Metric]:
+        """Get a registered metric by name, or None."""
+        return self._metrics.get(name)
+
+    def counter(self, name: str, help: str = "", labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter.
+
+        Raises:
+            ValueError: If the name is registered as a different metric type or with other labels.
+        """
+        return self.__get_or_create(Counter, name, labelnames, lambda: Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str = "", labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge.
+
+        Raises:
+            ValueError: If the name is registered as a different metric type or with other labels.
+        """
+        return self.__get_or_create(Gauge, name, labelnames, lambda: Gauge(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str = "", labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram.
+
+        Raises:
+            ValueError: If the name is registered as a different metric type or with other labels.
+        """
+        return self.__get_or_create(Histogram, name, labelnames, lambda: Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, collector: Collector) -> None:
+        """Add a function called on every collection to produce extra metric families.
+
+        Args:
+            collector: Returns the families to export.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def register_memory_gauges(self, memory: Optional[Memory] = None, prefix: str = "") -> None:
+        """Export the fields of ``Memory.sample`` as gauges, sampled once per collection.
+
+        Args:
+            memory: Memory instance to sample. Defaults to a new one.
+            prefix: Prefix added to each gauge name, such as "myjob_".
+        """
+        memory = memory if memory is not None else Memory()
+        for name in ("system_memory_total_gb", "process_memory_used_gb"):
+            _check_name(prefix + name)
+
+        def collect() -> List[MetricFamily]:
+            sample = memory.sample()
+            return [
+                MetricFamily(prefix + name, "gauge", name.replace("_", " ").capitalize(),
+                             [MetricSample(prefix + name, {}, value)])
+                for name, value in sample._asdict().items()
+            ]
+        self.register_collector(collect)
+
+    def collect(self) -> List[MetricFamily]:
+        """Read every metric and collector.
+
+        Returns:
+            Metric families in registration order, collectors last.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text.
+        """
+        lines: List[str] = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {_escape(family.help, quote=False)}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+            for sample in family.samples:
+                labels = ",".join(f'{name}="{_escape(value)}"' for name, value in sample.labels.items())
+                lines.append(f"{sample.name}{{{labels}}} {_format_value(sample.value)}" if labels
+                             else f"{sample.name} {_format_value(sample.value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write_prometheus(self, path: Union[str, Path]) -> None:
+        """Write the Prometheus text atomically, for node_exporter's textfile collector.
+
+        Args:
+            path: File to write; replaced in one step so readers never see a partial file.
+        """
+        path = Path(path)
+        descriptor, temporary_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(descriptor, "w") as file:
+                file.write(self.to_prometheus())
+            os.replace(temporary_name, path)
+        except BaseException:
+            Path(temporary_name).unlink(missing_ok=True)
+            raise
+
+    def __get_or_create(
+        self, metric_type: Type[M], name: str, labelnames: Sequence[str], create: Callable[[], M]
+    ) -> M:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = create()
+        if not isinstance(metric, metric_type) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} is already registered as a {metric.type} with labels {metric.labelnames}")
+        return metric
+
+
+_default_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _default_registry
+
+
+class JsonLinesExporter:
+    """Appends the registry's samples to a JSON lines file, once or periodically.
+
+    Each export writes one line per sample, with a shared timestamp:
+    ``{"timestamp": ..., "name": ..., "type": ..., "labels": {...}, "value": ...}``.
+    When running periodically, a final export is written on stop.
+
+    Args:
+        path: File to append to; parent directories are created.
+        registry: Registry to export. Defaults to the process-wide registry.
+        interval: Seconds between periodic exports.
+
+    Example:
+    >>> with JsonLinesExporter("metrics/job.jsonl", interval=30.0):
+    ...     run_job()
+    """
+
+    def __init__(
+        self, path: Union[str, Path], registry: Optional[MetricsRegistry] = None, interval: float = 60.0
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.path: Path = Path(path)
+        self.registry: MetricsRegistry = registry if registry is not None else get_registry()
+        self.interval: float = interval
+        self.last_error: Optional[BaseException] = None
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the export thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def export(self) -> int:
+        """Append the current samples.
+
+        Returns:
+            Number of lines written.
+        """
+        timestamp = time.time()
+        lines = [
+            json.dumps({"timestamp": timestamp, "name": sample.name, "type": family.type,
+                        "labels": sample.labels, "value": sample.value})
+            for family in self.registry.collect()
+            for sample in family.samples
+        ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, "a") as file:
+            file.write("".join(f"{line}\n" for line in lines))
+        return len(lines)
+
+    def start(self) -> None:
+        """Start exporting in a daemon thread.
+
+        Raises:
+            RuntimeError: If the exporter is already running.
+        """
+        if self.is_running:
+            raise RuntimeError("Exporter already running")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.__run, name="rsq-metrics-export", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread, wait for it and write a final export."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.export()
+
+    def __enter__(self) -> "JsonLinesExporter":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.stop()
+
+    def __run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.export()
+            except (OSError, RuntimeError) as e:
+                self.last_error = e
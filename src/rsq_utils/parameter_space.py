@@ -0,0 +1,209 @@
+"""Lazy, indexable Cartesian product of parameter values."""
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union, overload
+
+from .url import ParamDict, ParamValue
+
+
+class ParameterSpace(Sequence[Dict[str, ParamValue]]):
+    """Every combination of parameter values, computed on demand instead of stored.
+
+    Combinations are ordered exactly as ``generate_parameter_combos`` returns them,
+    with the last parameter varying fastest. Each combination has a global index,
+    decoded in O(number of parameters) by treating the index as a mixed-radix
+    number, so the space supports ``len``, random access and slicing without
+    building a single dict up front. Slices, shards and resumed spaces are views
+    that keep the global indices of the full space.
+
+    Args:
+        parameters: Dictionary where each key is a parameter name and each value
+                   is a list of possible values for that parameter.
+
+    Raises:
+        ValueError: If any parameter value is not a list.
+
+    Example:
+    >>> space = ParameterSpace({"type": ["A", "B"], "status": [1, 2, 3]})
+    >>> len(space)
+    6
+    >>> space[4]
+    {'type': 'B', 'status': 2}
+    >>> [len(shard) for shard in space.shards(4)]
+    [2, 2, 1, 1]
+    >>> list(space.resume(5))
+    [{'type': 'B', 'status': 3}]
+    """
+
+    def __init__(self, parameters: ParamDict, indices: Optional[range] = None) -> None:
+        if not all(isinstance(values, list) for values in parameters.values()):
+            raise ValueError("All parameter values must be lists")
+        self.parameters: ParamDict = parameters
+        self._keys: Tuple[str, ...] = tuple(parameters.keys())
+        self._values: Tuple[Tuple[ParamValue, ...], ...] = tuple(tuple(values) for values in parameters.values())
+        self._radices: Tuple[int, ...] = tuple(len(values) for values in self._values)
+
+        size = 0
+        if self._values:
+            size = 1
+            for radix in self._radices:
+                size *= radix
+        self.size: int = size
+        self.indices: range = indices if indices is not None else range(size)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, ParamValue]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ParameterSpace": ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, ParamValue], "ParameterSpace"]:
+        if isinstance(index, slice):
+            return self.__view(self.indices[index])
+        return self.combo_at(self.indices[index])
+
+    def __contains__(self, combo: object) -> bool:
+        if not isinstance(combo, Mapping):
+            return False
+        try:
+            return self.index_of(combo) in self.indices
+        except (KeyError, ValueError):
+            return False
+
+    def __iter__(self) -> Iterator[Dict[str, ParamValue]]:
+        for _, combo in self.items():
+            yield combo
+
+    def __repr__(self) -> str:
+        return f"ParameterSpace(keys={list(self._keys)}, indices={self.indices})"
+
+    def combo_at(self, global_index: int) -> Dict[str, ParamValue]:
+        """Decode a global index into its combination.
+
+        Args:
+            global_index: Index into the full space.
+
+        Returns:
+            Combination at that index.
+
+        Raises:
+            IndexError: If the index is outside the full space.
+        """
+        digits = self.__digits(global_index)
+        return {key: values[digit] for key, values, digit in zip(self._keys, self._values, digits)}
+
+    def index_of(self, combo: Mapping[str, ParamValue]) -> int:
+        """Encode a combination into its global index.
+
+        Args:
+            combo: Combination with a value for every parameter.
+
+        Returns:
+            Global index of the combination.
+
+        Raises:
+            KeyError: If a parameter is missing.
+            ValueError: If a value is not one of the parameter's values.
+        """
+        global_index = 0
+        for key, values, radix in zip(self._keys, self._values, self._radices):
+            global_index = global_index * radix + values.index(combo[key])
+        return global_index
+
+    def items(self) -> Iterator[Tuple[int, Dict[str, ParamValue]]]:
+        """Iterate over (global index, combination) pairs without materializing the space.
+
+        Contiguous views advance the mixed-radix digits like an odometer instead of
+        decoding each index, so iteration costs amortized O(1) per combination on top
+        of building its dict.
+
+        Yields:
+            Global index and combination, in order.
+        """
+        if len(self.indices) == 0:
+            return
+        if self.indices.step != 1:
+            for global_index in self.indices:
+                yield global_index, self.combo_at(global_index)
+            return
+
+        positions = self.__digits(self.indices.start)
+        current: List[ParamValue] = [values[digit] for values, digit in zip(self._values, positions)]
+        last = len(positions) - 1
+        for global_index in self.indices:
+            yield global_index, dict(zip(self._keys, current))
+            position = last
+            while position >= 0:
+                digit = positions[position] + 1
+                if digit < self._radices[position]:
+                    positions[position] = digit
+                    current[position] = self._values[position][digit]
+                    break
+                positions[position] = 0
+                current[position] = self._values[position][0]
+                position -= 1
+
+    def shard(self, shard_index: int, shard_count: int) -> "ParameterSpace":
+        """Get one of shard_count contiguous, near-equal index ranges of this space.
+
+        Args:
+            shard_index: Shard to return, from 0 to shard_count - 1.
+            shard_count: Number of shards, typically the number of workers.
+
+        Returns:
+            View over the shard's combinations.
+
+        Raises:
+            ValueError: If shard_index is not a valid shard.
+        """
+        if shard_count < 1 or not 0 <= shard_index < shard_count:
+            raise ValueError("shard_index must be between 0 and shard_count - 1")
+        base, extra = divmod(len(self.indices), shard_count)
+        start = shard_index * base + min(shard_index, extra)
+        stop = start + base + (1 if shard_index < extra else 0)
+        return self.__view(self.indices[start:stop])
+
+    def shards(self, shard_count: int) -> List["ParameterSpace"]:
+        """Split the space into contiguous shards for shard_count workers.
+
+        Args:
+            shard_count: Number of shards.
+
+        Returns:
+            Shards covering every combination exactly once, in order.
+        """
+        return [self.shard(shard_index, shard_count) for shard_index in range(shard_count)]
+
+    def resume(self, global_index: int) -> "ParameterSpace":
+        """Get the part of this space from a global index onwards, e.g. after a crash.
+
+        Args:
+            global_index: First global index still to process, as yielded by items.
+
+        Returns:
+            View over the combinations at or after global_index in this view's order.
+        """
+        indices = self.indices
+        distance = global_index - indices.start if indices.step > 0 else indices.start - global_index
+        skip = -(-distance // abs(indices.step))
+        return self.__view(indices[max(skip, 0):])
+
+    def __digits(self, global_index: int) -> List[int]:
+        if not 0 <= global_index < self.size:
+            raise IndexError(f"Combination index {global_index} out of range")
+        digits = [0] * len(self._radices)
+        remainder = global_index
+        for position in range(len(self._radices) - 1, -1, -1):
+            remainder, digits[position] = divmod(remainder, self._radices[position])
+        return digits
+
+    def __view(self, indices: range) -> "ParameterSpace":
+        view = ParameterSpace.__new__(ParameterSpace)
+        view.parameters = self.parameters
+        view._keys = self._keys
+        view._values = self._values
+        view._radices = self._radices
+        view.size = self.size
+        view.indices = indices
+        return view
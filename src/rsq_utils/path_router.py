@@ -0,0 +1,193 @@
+"""Segment trie that matches paths against many ``{param}`` templates at once."""
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+from .paths import TEMPLATE_PARAM_PATTERN, clean_path
+
+
+class RouteMatch(NamedTuple):
+    """A path matched to a template, with the parameter values taken from the path."""
+    template: str
+    params: Dict[str, str]
+
+
+class _Route(NamedTuple):
+    template: str
+    param_names: Tuple[str, ...]
+
+
+class _RouteNode:
+    __slots__ = ("literals", "patterns", "wildcard", "route")
+
+    def __init__(self) -> None:
+        self.literals: Dict[str, "_RouteNode"] = {}
+        self.patterns: Dict[str, Tuple[Pattern[str], "_RouteNode"]] = {}
+        self.wildcard: Optional["_RouteNode"] = None
+        self.route: Optional[_Route] = None
+
+
+def _split_segments(path: str) -> List[str]:
+    stripped = clean_path(path).strip("/")
+    return stripped.split("/") if stripped else []
+
+
+class PathRouter:
+    """Matches paths against a set of path templates in time proportional to segment count.
+
+    Templates are normalized with ``clean_path`` and split on "/" into a trie.
+    Each segment is a literal ("users"), a whole-segment parameter ("{id}") or a
+    mixed segment ("{name}.json"), with parameters found by the same rule as
+    ``find_template_params``. At every level literal segments are tried first,
+    then mixed segments, then whole-segment parameters, backtracking only when a
+    more specific branch fails further down. A parameter never matches an empty
+    segment or spans a "/". If two templates have the same shape, the first one
+    added wins.
+
+    Args:
+        templates: Templates to add.
+        cache_size: Number of recent path results remembered by match_many, which
+            makes repeated paths in logs nearly free. 0 disables the cache.
+
+    Example:
+    >>> router = PathRouter(["/api/{version}/users/{id}", "/api/{version}/users/me", "/files/{name}.json"])
+    >>> router.match("/api/v1/users/42")
+    RouteMatch(template='/api/{version}/users/{id}', params={'version': 'v1', 'id': '42'})
+    >>> router.match("/api/v1/users/me").template
+    '/api/{version}/users/me'
+    >>> router.match("/files/report.json").params
+    {'name': 'report'}
+    """
+
+    def __init__(self, templates: Iterable[str] = (), cache_size: int = 100_000) -> None:
+        self.templates: List[str] = []
+        self.cache_size: int = cache_size
+        self._root: _RouteNode = _RouteNode()
+        self._cache: Dict[str, Optional[RouteMatch]] = {}
+        for template in templates:
+            self.add(template)
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def add(self, template: str) -> None:
+        """Add a template to the router.
+
+        Args:
+            template: Path template, e.g. "/api/{version}/{resource}".
+        """
+        node = self._root
+        param_names: List[str] = []
+        for segment in _split_segments(template):
+            names = [match.group(1) for match in TEMPLATE_PARAM_PATTERN.finditer(segment)]
+            if not names:
+                node = node.literals.setdefault(segment, _RouteNode())
+            elif TEMPLATE_PARAM_PATTERN.fullmatch(segment):
+                if node.wildcard is None:
+                    node.wildcard = _RouteNode()
+                node = node.wildcard
+            else:
+                shape = TEMPLATE_PARAM_PATTERN.sub("{}", segment)
+                if shape not in node.patterns:
+                    node.patterns[shape] = (self.__compile_segment(segment), _RouteNode())
+                node = node.patterns[shape][1]
+            param_names.extend(names)
+
+        if node.route is None:
+            node.route = _Route(template, tuple(param_names))
+        self.templates.append(template)
+        self._cache.clear()
+
+    def match(self, path: str) -> Optional[RouteMatch]:
+        """Find the template a path belongs to.
+
+        Any query string or fragment is ignored.
+
+        Args:
+            path: Path to match, with or without leading or trailing slashes.
+
+        Returns:
+            The matched template and parameters, or None if no template matches.
+        """
+        path = path.split("?", 1)[0].split("#", 1)[0]
+        values: List[str] = []
+        route = self.__match_node(self._root, _split_segments(path), 0, values)
+        if route is None:
+            return None
+        return RouteMatch(route.template, dict(zip(route.param_names, values)))
+
+    def match_many(self, paths: Iterable[str]) -> Iterator[Optional[RouteMatch]]:
+        """Match many paths lazily, reusing results for repeated paths.
+
+        Args:
+            paths: Paths to match, such as lines of an access log.
+
+        Yields:
+            One RouteMatch or None per path, in order.
+        """
+        cache = self._cache
+        for path in paths:
+            if path in cache:
+                yield cache[path]
+                continue
+            result = self.match(path)
+            if self.cache_size > 0:
+                if len(cache) >= self.cache_size:
+                    cache.clear()
+                cache[path] = result
+            yield result
+
+    def count_matches(self, paths: Iterable[str]) -> Dict[Optional[str], int]:
+        """Count how many paths fall under each template.
+
+        Args:
+            paths: Paths to classify.
+
+        Returns:
+            Number of paths per template, with unmatched paths counted under None.
+        """
+        counts: Dict[Optional[str], int] = {}
+        for result in self.match_many(paths):
+            template = result.template if result is not None else None
+            counts[template] = counts.get(template, 0) + 1
+        return counts
+
+    def __match_node(self, node: _RouteNode, segments: List[str], position: int, values: List[str]) -> Optional[_Route]:
+        if position == len(segments):
+            return node.route
+        segment = segments[position]
+
+        child = node.literals.get(segment)
+        if child is not None:
+            route = self.__match_node(child, segments, position + 1, values)
+            if route is not None:
+                return route
+
+        for pattern, child in node.patterns.values():
+            match = pattern.fullmatch(segment)
+            if match is None:
+                continue
+            captured = len(values)
+            values.extend(match.groups())
+            route = self.__match_node(child, segments, position + 1, values)
+            if route is not None:
+                return route
+            del values[captured:]
+
+        if node.wildcard is not None and segment:
+            values.append(segment)
+            route = self.__match_node(node.wildcard, segments, position + 1, values)
+            if route is not None:
+                return route
+            values.pop()
+        return None
+
+    @staticmethod
+    def __compile_segment(segment: str) -> Pattern[str]:
+        parts: List[str] = []
+        position = 0
+        for match in TEMPLATE_PARAM_PATTERN.finditer(segment):
+            parts.append(re.escape(segment[position:match.start()]))
+            parts.append("(.+?)")
+            position = match.end()
+        parts.append(re.escape(segment[position:]))
+        return re.compile("".join(parts))
@@ -0,0 +1,81 @@
+"""Compiled path templates that are parsed once and rendered many times."""
+from typing import Any, Iterable, Iterator, List, Mapping, Tuple
+
+from .paths import TEMPLATE_PARAM_PATTERN, clean_path
+
+
+class PathTemplate:
+    """A ``{param}`` path template parsed once into literal and parameter segments.
+
+    Parameters are found with the same rule as ``find_template_params``. When
+    ``clean`` is True the template is normalized with ``clean_path`` at compile time,
+    so rendering never has to. The normalization is decided by the template alone;
+    parameter values containing "." or slashes do not change it.
+
+    Args:
+        template: Path template, e.g. "/api/{version}/{resource}".
+        clean: Normalize the template with clean_path.
+
+    Example:
+    >>> template = PathTemplate("/api/{version}/{resource}")
+    >>> template.path
+    'api/{version}/{resource}/'
+    >>> template.render({"version": "v1", "resource": "users"})
+    'api/v1/users/'
+    >>> list(template.render_many(ParameterSpace({"version": ["v1"], "resource": ["a", "b"]})))
+    ['api/v1/a/', 'api/v1/b/']
+    """
+
+    def __init__(self, template: str, clean: bool = True) -> None:
+        self.template: str = template
+        self.path: str = clean_path(template) if clean else template
+
+        segments: List[str] = []
+        slots: List[Tuple[int, str]] = []
+        position = 0
+        for match in TEMPLATE_PARAM_PATTERN.finditer(self.path):
+            segments.append(self.path[position:match.start()])
+            slots.append((len(segments), match.group(1)))
+            segments.append("")
+            position = match.end()
+        segments.append(self.path[position:])
+
+        self.params: List[str] = [name for _, name in slots]
+        self._segments: Tuple[str, ...] = tuple(segments)
+        self._slots: Tuple[Tuple[int, str], ...] = tuple(slots)
+
+    def __repr__(self) -> str:
+        return f"PathTemplate({self.template!r})"
+
+    def render(self, params: Mapping[str, Any]) -> str:
+        """Fill in the template parameters.
+
+        Args:
+            params: Value for every template parameter. Extra keys are ignored.
+
+        Returns:
+            Rendered path.
+
+        Raises:
+            KeyError: If a template parameter is missing.
+        """
+        if not self._slots:
+            return self.path
+        parts = list(self._segments)
+        for position, name in self._slots:
+            value = params[name]
+            parts[position] = value if type(value) is str else str(value)
+        return "".join(parts)
+
+    def render_many(self, params_iterable: Iterable[Mapping[str, Any]]) -> Iterator[str]:
+        """Render the template for each parameter dictionary, lazily.
+
+        Args:
+            params_iterable: Parameter dictionaries, such as a ParameterSpace.
+
+        Yields:
+            One rendered path per parameter dictionary, in order.
+        """
+        render = self.render
+        for params in params_iterable:
+            yield render(params)
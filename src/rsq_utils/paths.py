@@ -1,6 +1,8 @@
 import re
 from typing import List 
 
+TEMPLATE_PARAM_PATTERN = re.compile(r'{([^}]*)}')
+
 def clean_path(path: str) -> str:
     """
     clean a path string by removing leading and trailing slashes and adding a trailing slash if the path does not have an extension.
@@ -33,8 +35,7 @@ def find_template_params(template: str) -> List[str]:
     >>> find_template_params("/api/{version}/{resource}")
     ["version", "resource"]
     """
-    pattern = r'{([^}]*)}'
-    matches = re.finditer(pattern, template)
+    matches = TEMPLATE_PARAM_PATTERN.finditer(template)
     
     params: List[str] = [match.group(1) for match in matches]
     
@@ -0,0 +1,208 @@
+"""Memory usage aggregated over a process and all of its descendants."""
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import psutil
+
+from .memory import BYTES_PER_GB, MemoryData
+
+
+@dataclass(frozen=True)
+class ProcessMemory:
+    """Memory used by a single process.
+
+    Attributes:
+        pid: Process id.
+        name: Process name.
+        rss_gb: Resident set size, which counts shared pages in every process mapping them.
+        uss_gb: Unique set size, the memory freed if the process exited. None if unavailable.
+        pss_gb: Proportional set size, shared pages split between the processes sharing
+            them. None if unavailable.
+    """
+    pid: int
+    name: str
+    rss_gb: float
+    uss_gb: Optional[float] = None
+    pss_gb: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class ProcessTreeSample:
+    """Memory of a root process and its descendants at one point in time."""
+    root: ProcessMemory
+    children: Tuple[ProcessMemory, ...]
+
+    @property
+    def processes(self) -> Tuple[ProcessMemory, ...]:
+        """The root followed by every descendant."""
+        return (self.root,) + self.children
+
+    @property
+    def total_rss_gb(self) -> float:
+        """Summed RSS. Overstates real usage when processes share pages, as forked workers do."""
+        return sum(process.rss_gb for process in self.processes)
+
+    @property
+    def total_uss_gb(self) -> Optional[float]:
+        """Summed USS, or None if it is unavailable for any process."""
+        return _sum_optional([process.uss_gb for process in self.processes])
+
+    @property
+    def total_pss_gb(self) -> Optional[float]:
+        """Summed PSS, which counts each shared page once. None if unavailable for any process."""
+        return _sum_optional([process.pss_gb for process in self.processes])
+
+    def to_memory_data(self) -> MemoryData:
+        """Convert the totals to a MemoryData dictionary.
+
+        Returns:
+            Dictionary with tree totals in gigabytes and the process count; USS and
+            PSS totals are included only when available.
+        """
+        memory_data: MemoryData = {
+            "process_tree_memory_used_gb": self.total_rss_gb,
+            "process_tree_process_count": float(len(self.processes)),
+        }
+        total_uss_gb = self.total_uss_gb
+        if total_uss_gb is not None:
+            memory_data["process_tree_uss_gb"] = total_uss_gb
+        total_pss_gb = self.total_pss_gb
+        if total_pss_gb is not None:
+            memory_data["process_tree_pss_gb"] = total_pss_gb
+        return memory_data
+
+
+def _sum_optional(values: List[Optional[float]]) -> Optional[float]:
+    total = 0.0
+    for value in values:
+        if value is None:
+            return None
+        total += value
+    return total
+
+
+class ProcessTreeMemory:
+    """Measures memory across a process tree, such as a job and its worker pool.
+
+    Children are rediscovered on every sample. On Linux this walks
+    ``/proc/<pid>/task/<tid>/children`` down from the root, which only touches the
+    tree itself instead of scanning every process on the machine; elsewhere it
+    falls back to psutil. Process handles are kept between samples and reused
+    while the pid still belongs to the same process.
+
+    USS and PSS require reading each process's memory maps, which is much slower
+    than reading RSS, so they are only collected when ``detailed`` is True.
+
+    Args:
+        pid: Root process id. Defaults to the current process.
+        detailed: Collect USS and PSS where the platform and permissions allow.
+
+    Example:
+    >>> tree = ProcessTreeMemory(detailed=True)
+    >>> with multiprocessing.Pool(4) as pool:
+    ...     sample = tree.sample()
+    >>> len(sample.children), sample.total_pss_gb
+    (4, 0.61)
+    """
+
+    def __init__(self, pid: Optional[int] = None, detailed: bool = False) -> None:
+        self.pid: int = pid if pid is not None else os.getpid()
+        self.detailed: bool = detailed
+        self._processes: Dict[int, psutil.Process] = {}
+        self._use_proc_children: bool = sys.platform.startswith("linux") and os.path.exists(
+            f"/proc/{self.pid}/task/{self.pid}/children"
+        )
+
+    def get_children_pids(self) -> List[int]:
+        """Find every descendant of the root process.
+
+        Returns:
+            Descendant pids, parents before their children.
+        """
+        if self._use_proc_children:
+            try:
+                return self.__proc_children_pids()
+            except OSError:
+                self._use_proc_children = False
+        try:
+            return [child.pid for child in self.__process(self.pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+
+    def sample(self) -> ProcessTreeSample:
+        """Measure the root process and every live descendant.
+
+        Descendants that exit, are zombies or deny access while being measured are skipped.
+
+        Returns:
+            ProcessTreeSample with a per-process breakdown.
+
+        Raises:
+            RuntimeError: If the root process cannot be measured.
+        """
+        children_pids = self.get_children_pids()
+        try:
+            root = self.__measure(self.pid)
+        except psutil.Error as e:
+            raise RuntimeError(f"Failed to get memory data for process {self.pid}: {str(e)}") from e
+
+        children: List[ProcessMemory] = []
+        for pid in children_pids:
+            try:
+                children.append(self.__measure(pid))
+            except psutil.Error:
+                self._processes.pop(pid, None)
+
+        live_pids = set(children_pids)
+        live_pids.add(self.pid)
+        for pid in [pid for pid in self._processes if pid not in live_pids]:
+            del self._processes[pid]
+        return ProcessTreeSample(root=root, children=tuple(children))
+
+    def __proc_children_pids(self) -> List[int]:
+        pids: List[int] = []
+        pending = [self.pid]
+        while pending:
+            pid = pending.pop()
+            try:
+                thread_ids = os.listdir(f"/proc/{pid}/task")
+            except FileNotFoundError:
+                continue
+            for thread_id in thread_ids:
+                try:
+                    with open(f"/proc/{pid}/task/{thread_id}/children", "rb") as children_file:
+                        children = [int(child) for child in children_file.read().split()]
+                except FileNotFoundError:
+                    continue
+                pids.extend(children)
+                pending.extend(children)
+        return pids
+
+    def __process(self, pid: int) -> psutil.Process:
+        process = self._processes.get(pid)
+        if process is None or not process.is_running():
+            process = psutil.Process(pid)
+            self._processes[pid] = process
+        return process
+
+    def __measure(self, pid: int) -> ProcessMemory:
+        process = self.__process(pid)
+        with process.oneshot():
+            if process.status() == psutil.STATUS_ZOMBIE:
+                raise psutil.ZombieProcess(pid)
+            name = process.name()
+            if self.detailed:
+                try:
+                    full_info = process.memory_full_info()
+                    pss = getattr(full_info, "pss", None)
+                    return ProcessMemory(
+                        pid=pid,
+                        name=name,
+                        rss_gb=full_info.rss / BYTES_PER_GB,
+                        uss_gb=full_info.uss / BYTES_PER_GB,
+                        pss_gb=pss / BYTES_PER_GB if pss is not None else None,
+                    )
+                except psutil.AccessDenied:
+                    pass
+            return ProcessMemory(pid=pid, name=name, rss_gb=process.memory_info().rss / BYTES_PER_GB)
@@ -0,0 +1,445 @@
+"""Token-bucket rate limiting and per-host scheduling for threads and asyncio."""
+import asyncio
+import heapq
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+)
+from urllib.parse import urlsplit
+
+HostLimit = Tuple[float, Optional[float]]
+
+
+class TokenBucket:
+    """Thread-safe token bucket on the monotonic clock.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``, and the bucket
+    starts full, so up to ``burst`` calls go through at once before the steady rate
+    applies. Waiting callers reserve their tokens up front and sleep for exactly
+    the deficit, so there is no oversleeping and no polling.
+
+    Args:
+        rate: Tokens added per second.
+        burst: Maximum tokens held. Defaults to max(rate, 1).
+        window_seconds: Window over which observed_rate is measured.
+
+    Example:
+    >>> bucket = TokenBucket(rate=10, burst=5)
+    >>> for url in urls:
+    ...     bucket.acquire()
+    ...     fetch(url)
+    >>> bucket.observed_rate
+    9.98
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, window_seconds: float = 10.0) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        burst = burst if burst is not None else max(rate, 1.0)
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate: float = rate
+        self.burst: float = burst
+        self.window_seconds: float = window_seconds
+        self.total_acquired: float = 0.0
+        self._tokens: float = burst
+        self._updated: float = time.monotonic()
+        self._created: float = self._updated
+        self._grants: Deque[Tuple[float, float]] = deque()
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def observed_rate(self) -> float:
+        """Tokens granted per second over the last window_seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self.__trim(now)
+            granted = sum(tokens for granted_at, tokens in self._grants if granted_at <= now)
+            elapsed = min(self.window_seconds, now - self._created)
+        return granted / elapsed if elapsed > 0 else 0.0
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens only if they are available now.
+
+        Args:
+            tokens: Tokens to take.
+
+        Returns:
+            True if the tokens were taken.
+        """
+        self.__check(tokens)
+        with self._lock:
+            now = time.monotonic()
+            self.__refill(now)
+            if self._tokens < tokens:
+                return False
+            self.__grant(now, tokens)
+            return True
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """Get the seconds until tokens could be taken without waiting.
+
+        Args:
+            tokens: Tokens wanted.
+
+        Returns:
+            Seconds to wait; 0.0 if available now.
+        """
+        with self._lock:
+            self.__refill(time.monotonic())
+            return max((tokens - self._tokens) / self.rate, 0.0)
+
+    def reserve(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take tokens now, possibly borrowing from the future, and get the wait owed.
+
+        Args:
+            tokens: Tokens to take.
+            max_wait: Reserve nothing if the wait would be longer than this.
+
+        Returns:
+            Seconds the caller must wait before proceeding, or None if the wait would
+            exceed max_wait.
+        """
+        self.__check(tokens)
+        with self._lock:
+            now = time.monotonic()
+            self.__refill(now)
+            wait_seconds = max((tokens - self._tokens) / self.rate, 0.0)
+            if max_wait is not None and wait_seconds > max_wait:
+                return None
+            self.__grant(now + wait_seconds, tokens)
+            return wait_seconds
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Take tokens, sleeping until the rate allows it.
+
+        Args:
+            tokens: Tokens to take.
+            timeout: Give up without taking anything if the wait would be longer.
+
+        Returns:
+            True once the tokens are taken, False if the timeout would be exceeded.
+        """
+        wait_seconds = self.reserve(tokens, timeout)
+        if wait_seconds is None:
+            return False
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+        return True
+
+    async def acquire_async(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Take tokens from asyncio code, awaiting until the rate allows it.
+
+        Args:
+            tokens: Tokens to take.
+            timeout: Give up without taking anything if the wait would be longer.
+
+        Returns:
+            True once the tokens are taken, False if the timeout would be exceeded.
+        """
+        wait_seconds = self.reserve(tokens, timeout)
+        if wait_seconds is None:
+            return False
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+        return True
+
+    def __check(self, tokens: float) -> None:
+        if not 0 < tokens <= self.burst:
+            raise ValueError(f"tokens must be between 0 and burst ({self.burst})")
+
+    def __refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def __grant(self, granted_at: float, tokens: float) -> None:
+        self._tokens -= tokens
+        self.total_acquired += tokens
+        self._grants.append((granted_at, tokens))
+        self.__trim(granted_at)
+
+    def __trim(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._grants and self._grants[0][0] < cutoff:
+            self._grants.popleft()
+
+
+def get_host(url: str) -> str:
+    """Get the lower-case host of a URL, or the value itself if it is already a host.
+
+    Args:
+        url: URL or host name.
+
+    Returns:
+        Host name.
+
+    Examples:
+        >>> get_host("https://API.example.com:8443/items?page=2")
+        'api.example.com'
+        >>> get_host("api.example.com")
+        'api.example.com'
+    """
+    if "//" in url:
+        return urlsplit(url).hostname or ""
+    return url.lower()
+
+
+class HostRateLimiter:
+    """A TokenBucket per host, created on first use.
+
+    Args:
+        rate: Default requests per second per host.
+        burst: Default burst per host. Defaults to max(rate, 1).
+        host_limits: (rate, burst) overrides for specific hosts.
+        window_seconds: Window over which observed rates are measured.
+
+    Example:
+    >>> limiter = HostRateLimiter(rate=5, host_limits={"api.slow.com": (1, 2)})
+    >>> limiter.acquire("https://api.slow.com/items?page=1")
+    True
+    >>> limiter.get_observed_rates()
+    {'api.slow.com': 0.98}
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        host_limits: Optional[Mapping[str, HostLimit]] = None,
+        window_seconds: float = 10.0,
+    ) -> None:
+        self.rate: float = rate
+        self.burst: Optional[float] = burst
+        self.window_seconds: float = window_seconds
+        self._host_limits: Dict[str, HostLimit] = {host.lower(): limit for host, limit in (host_limits or {}).items()}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def set_limit(self, host: str, rate: float, burst: Optional[float] = None) -> None:
+        """Set the limit for a host, replacing its bucket.
+
+        Args:
+            host: Host name or URL.
+            rate: Requests per second.
+            burst: Maximum burst. Defaults to max(rate, 1).
+        """
+        host = get_host(host)
+        with self._lock:
+            self._host_limits[host] = (rate, burst)
+            self._buckets[host] = TokenBucket(rate, burst, self.window_seconds)
+
+    def get_bucket(self, host: str) -> TokenBucket:
+        """Get the bucket of a host, creating it if needed.
+
+        Args:
+            host: Host name or URL.
+
+        Returns:
+            The host's TokenBucket.
+        """
+        host = get_host(host)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self._host_limits.get(host, (self.rate, self.burst))
+                bucket = self._buckets[host] = TokenBucket(rate, burst, self.window_seconds)
+            return bucket
+
+    def try_acquire(self, url: str, tokens: float = 1.0) -> bool:
+        """Take tokens from a URL's host bucket only if available now."""
+        return self.get_bucket(url).try_acquire(tokens)
+
+    def acquire(self, url: str, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Take tokens from a URL's host bucket, sleeping until allowed."""
+        return self.get_bucket(url).acquire(tokens, timeout)
+
+    async def acquire_async(self, url: str, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Take tokens from a URL's host bucket from asyncio code."""
+        return await self.get_bucket(url).acquire_async(tokens, timeout)
+
+    def get_observed_rates(self) -> Dict[str, float]:
+        """Get the observed requests per second of every host seen.
+
+        Returns:
+            Dictionary of host to observed rate.
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: bucket.observed_rate for host, bucket in buckets.items()}
+
+
+@dataclass(frozen=True)
+class ScheduledResult:
+    """Outcome of one item run by HostScheduler.
+
+    Attributes:
+        item: Input item.
+        host: Host the item was scheduled under.
+        index: Position of the item in the input.
+        value: Return value, if the call succeeded.
+        error: Exception raised by the call, if any.
+    """
+    item: Any
+    host: str
+    index: int
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class HostScheduler:
+    """Runs work items across hosts under per-host rate and concurrency limits.
+
+    Items are queued per host and dispatched from whichever host can go next, so a
+    slow or heavily limited host only delays its own items. Each dispatch takes one
+    token from the host's bucket. Results are streamed in completion order.
+
+    Args:
+        limiter: Per-host rate limits.
+        max_workers: Items running at once across all hosts.
+        max_concurrency_per_host: Items running at once per host.
+        max_pending: Items read ahead from the input and queued; bounds memory.
+
+    Example:
+    >>> scheduler = HostScheduler(HostRateLimiter(rate=5), max_workers=16, max_concurrency_per_host=2)
+    >>> for result in scheduler.map(fetch, urls):
+    ...     store(result.item, result.value)
+    """
+
+    def __init__(
+        self,
+        limiter: HostRateLimiter,
+        max_workers: int = 16,
+        max_concurrency_per_host: int = 4,
+        max_pending: int = 10_000,
+    ) -> None:
+        if max_workers < 1 or max_concurrency_per_host < 1 or max_pending < 1:
+            raise ValueError("max_workers, max_concurrency_per_host and max_pending must be at least 1")
+        self.limiter: HostRateLimiter = limiter
+        self.max_workers: int = max_workers
+        self.max_concurrency_per_host: int = max_concurrency_per_host
+        self.max_pending: int = max_pending
+
+    def map(
+        self,
+        function: Callable[[Any], Any],
+        items: Iterable[Any],
+        get_item_host: Callable[[Any], str] = get_host,
+    ) -> Iterator[ScheduledResult]:
+        """Call function on every item from a thread pool, respecting host limits.
+
+        Args:
+            function: Called with each item.
+            items: Items to process; consumed lazily.
+            get_item_host: Maps an item to its host. Defaults to get_host, for URLs.
+
+        Yields:
+            One ScheduledResult per item, in completion order.
+        """
+        iterator = enumerate(items)
+        exhausted = False
+        queues: Dict[str, Deque[Tuple[int, Any]]] = {}
+        running: Dict[str, int] = {}
+        ready: List[Tuple[float, int, str]] = []
+        scheduled: Set[str] = set()
+        futures: Dict["Future[Any]", Tuple[str, int, Any]] = {}
+        pending_count = 0
+        sequence = 0
+
+        def schedule(host: str, at: float) -> None:
+            nonlocal sequence
+            if host in scheduled or not queues[host] or running.get(host, 0) >= self.max_concurrency_per_host:
+                return
+            heapq.heappush(ready, (at, sequence, host))
+            sequence += 1
+            scheduled.add(host)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rsq-scheduler") as executor:
+            while True:
+                while not exhausted and pending_count < self.max_pending:
+                    try:
+                        index, item = next(iterator)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    host = get_host(get_item_host(item))
+                    queues.setdefault(host, deque()).append((index, item))
+                    pending_count += 1
+                    schedule(host, time.monotonic())
+
+                now = time.monotonic()
+                while ready and ready[0][0] <= now and len(futures) < self.max_workers:
+                    _, _, host = heapq.heappop(ready)
+                    scheduled.discard(host)
+                    bucket = self.limiter.get_bucket(host)
+                    if not bucket.try_acquire():
+                        schedule(host, now + max(bucket.time_until_available(), 1e-4))
+                        continue
+                    index, item = queues[host].popleft()
+                    pending_count -= 1
+                    running[host] = running.get(host, 0) + 1
+                    futures[executor.submit(function, item)] = (host, index, item)
+                    schedule(host, now)
+
+                if exhausted and not futures and not ready:
+                    return
+                timeout: Optional[float] = None
+                if ready and len(futures) < self.max_workers:
+                    timeout = max(ready[0][0] - time.monotonic(), 0.0)
+                if not futures:
+                    time.sleep(timeout or 0.0)
+                    continue
+
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, index, item = futures.pop(future)
+                    running[host] -= 1
+                    error = future.exception()
+                    yield ScheduledResult(item, host, index, None if error else future.result(), error)
+                    schedule(host, time.monotonic())
+
+    async def map_async(
+        self,
+        function: Callable[[Any], Awaitable[Any]],
+        items: Iterable[Any],
+        get_item_host: Callable[[Any], str] = get_host,
+    ) -> AsyncIterator[ScheduledResult]:
+        """Await function on every item as asyncio tasks, respecting host limits.
+
+        Args:
+            function: Coroutine function called with each item.
+            items: Items to process; consumed lazily.
+            get_item_host: Maps an item to its host. Defaults to get_host, for URLs.
+
+        Yields:
+            One ScheduledResult per item, in completion order.
+        """
+        worker_slots = asyncio.Semaphore(self.max_workers)
+        host_slots: Dict[str, asyncio.Semaphore] = {}
+
+        async def run(index: int, item: Any, host: str) -> ScheduledResult:
+            async with host_slots[host]:
+                await self.limiter.acquire_async(host)
+                async with worker_slots:
+                    try:
+                        return ScheduledResult(item, host, index, await function(item))
+                    except Exception as e:
+                        return ScheduledResult(item, host, index, error=e)
+
+        pending: Set["asyncio.Task[ScheduledResult]"] = set()
+        for index, item in enumerate(items):
+            host = get_host(get_item_host(item))
+            if host not in host_slots:
+                host_slots[host] = asyncio.Semaphore(self.max_concurrency_per_host)
+            pending.add(asyncio.ensure_future(run(index, item, host)))
+            if len(pending) >= self.max_pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
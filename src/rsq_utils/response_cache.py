@@ -0,0 +1,501 @@
+"""Persistent, content-addressed HTTP response cache with TTLs and conditional revalidation."""
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Collection, Dict, Mapping, Optional, Tuple, Type, Union
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+from .fetch import FetchEngine, FetchResult
+from .url import sanitize_params
+from .url_canonicalization import canonicalize_url
+
+DEFAULT_CACHE_BYTES: int = 1024 ** 3
+DEFAULT_TTL_SECONDS: float = 3600.0
+DEFAULT_MMAP_THRESHOLD: int = 1024 ** 2
+_INDEX_NAME: str = "index.sqlite3"
+_SCHEMA: str = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    body_hash TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_body_hash ON entries (body_hash);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals SELECT 0, COALESCE(SUM(size), 0) FROM objects;
+CREATE TRIGGER IF NOT EXISTS objects_insert AFTER INSERT ON objects BEGIN
+    UPDATE totals SET size = size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS objects_delete AFTER DELETE ON objects BEGIN
+    UPDATE totals SET size = size - OLD.size;
+END;
+COMMIT;
+"""
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A response read from a ResponseCache.
+
+    Attributes:
+        url: Canonical URL the response is stored under.
+        status: HTTP status.
+        headers: Response headers with lower-case names.
+        body: Response body; bodies of at least ``mmap_threshold`` bytes are
+            read-only memory-mapped views.
+        stored_at: Unix time the response was stored or last revalidated.
+        expires_at: Unix time after which the response must be revalidated.
+        etag: ETag header, used for If-None-Match.
+        last_modified: Last-Modified header, used for If-Modified-Since.
+    """
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Union[bytes, memoryview] = b""
+    stored_at: float = 0.0
+    expires_at: float = 0.0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        """Whether the response can be used without revalidation."""
+        return time.time() < self.expires_at
+
+    def get_revalidation_headers(self) -> Dict[str, str]:
+        """Get conditional request headers that let the server answer 304 Not Modified.
+
+        Returns:
+            If-None-Match and If-Modified-Since headers, for whichever validators are stored.
+        """
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _add_params(url: str, params: Optional[Mapping[str, Any]]) -> str:
+    if not params:
+        return url
+    parts = urlsplit(url)
+    query = urlencode(sanitize_params(dict(params)))
+    return urlunsplit(parts._replace(query=f"{parts.query}&{query}" if parts.query else query))
+
+
+def get_cache_ttl(headers: Mapping[str, str], default_ttl: float) -> Optional[float]:
+    """Get how long a response may be served without revalidation from its Cache-Control header.
+
+    Args:
+        headers: Response headers with lower-case names.
+        default_ttl: TTL in seconds when the header sets no max-age.
+
+    Returns:
+        TTL in seconds; 0 for no-cache, or None for no-store.
+
+    Examples:
+        >>> get_cache_ttl({"cache-control": "public, max-age=60"}, 3600.0)
+        60.0
+        >>> get_cache_ttl({"cache-control": "no-store"}, 3600.0) is None
+        True
+    """
+    ttl = default_ttl
+    for directive in headers.get("cache-control", "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == "no-store":
+            return None
+        if name == "no-cache":
+            return 0.0
+        if name == "max-age" and value.strip('"').isdigit():
+            ttl = float(value.strip('"'))
+    return ttl
+
+
+class ResponseCache:
+    """On-disk HTTP response cache keyed by canonical URL, shared across runs.
+
+    Responses are indexed in a sqlite database and their bodies stored
+    content-addressed under ``objects/<ab>/<hash>``, so identical bodies served at
+    different URLs are kept once. URLs are canonicalized with ``canonicalize_url``,
+    so the key matches ``url_encode`` and ``sanitize_params`` regardless of
+    parameter order. Entries are fresh for their Cache-Control max-age, or
+    ``default_ttl``; stale entries are revalidated with If-None-Match and
+    If-Modified-Since, and a 304 refreshes them without downloading the body
+    again. When the bodies exceed ``max_bytes`` the least recently used entries
+    are evicted. Bodies of at least ``mmap_threshold`` bytes are memory-mapped
+    rather than read into memory.
+
+    The cache is safe to share between threads, and the sqlite index in WAL mode
+    lets several processes use the same directory.
+
+    Args:
+        directory: Directory holding the index and bodies; created if missing.
+        max_bytes: Maximum total size of stored bodies.
+        default_ttl: Seconds a response stays fresh when it has no max-age.
+        mmap_threshold: Body size from which reads are memory-mapped.
+        ignore_params: Parameter names left out of cache keys, such as API keys.
+
+    Example:
+    >>> with ResponseCache(".cache/http") as cache, FetchEngine() as engine:
+    ...     result = cache.fetch(engine, "https://api.example.com/items", {"page": 1})
+    ...     result.from_cache
+    False
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        default_ttl: float = DEFAULT_TTL_SECONDS,
+        mmap_threshold: int = DEFAULT_MMAP_THRESHOLD,
+        ignore_params: Optional[Collection[str]] = None,
+    ) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        if mmap_threshold < 1:
+            raise ValueError("mmap_threshold must be at least 1")
+        self.directory: Path = Path(directory)
+        self.objects_directory: Path = self.directory / "objects"
+        self.objects_directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes: int = max_bytes
+        self.default_ttl: float = default_ttl
+        self.mmap_threshold: int = mmap_threshold
+        self.ignore_params: Optional[Collection[str]] = ignore_params
+        self.hits: int = 0
+        self.misses: int = 0
+        self.revalidations: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            str(self.directory / _INDEX_NAME), check_same_thread=False, isolation_level=None, timeout=30.0
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return int(count)
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str):
+            return False
+        key = self.get_key(url)
+        with self._lock:
+            row = self._connection.execute("SELECT 1 FROM entries WHERE url = ?", (key,)).fetchone()
+        return row is not None
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of stored bodies."""
+        with self._lock:
+            return self.__get_size()
+
+    def get_key(self, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Get the canonical URL a response is stored under.
+
+        Args:
+            url: Requested URL.
+            params: Parameters added to the query.
+
+        Returns:
+            Canonical URL.
+        """
+        return canonicalize_url(url, params, self.ignore_params)
+
+    def get(
+        self, url: str, params: Optional[Dict[str, Any]] = None, allow_stale: bool = False
+    ) -> Optional[CachedResponse]:
+        """Read a stored response.
+
+        Args:
+            url: Requested URL.
+            params: Parameters added to the query.
+            allow_stale: Whether to return responses whose TTL has passed.
+
+        Returns:
+            The stored response, or None if there is none or it is stale.
+        """
+        key = self.get_key(url, params)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body_hash, status, headers, stored_at, expires_at, etag, last_modified, size "
+                "FROM entries JOIN objects ON objects.hash = entries.body_hash WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            body_hash, status, headers, stored_at, expires_at, etag, last_modified, size = row
+            if not allow_stale and time.time() >= expires_at:
+                return None
+            try:
+                body = self.__read_body(body_hash, size)
+            except FileNotFoundError:
+                self.__remove(key)
+                return None
+            self._connection.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), key))
+        return CachedResponse(key, status, json.loads(headers), body, stored_at, expires_at, etag, last_modified)
+
+    def put(
+        self,
+        url: str,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+        params: Optional[Dict[str, Any]] = None,
+        ttl: Optional[float] = None,
+    ) -> bool:
+        """Store a response, evicting least recently used entries if needed.
+
+        Args:
+            url: Requested URL.
+            status: HTTP status.
+            headers: Response headers with lower-case names.
+            body: Response body.
+            params: Parameters added to the query.
+            ttl: Seconds the response stays fresh. Defaults to the Cache-Control
+                max-age, or default_ttl.
+
+        Returns:
+            True if stored, False if the response is marked no-store or is larger than max_bytes.
+        """
+        if ttl is None:
+            ttl = get_cache_ttl(headers, self.default_ttl)
+        if ttl is None or len(body) > self.max_bytes:
+            return False
+
+        key = self.get_key(url, params)
+        body_hash = hashlib.blake2b(body, digest_size=16).hexdigest()
+        path = self.__get_object_path(body_hash)
+        if not path.exists():
+            self.__write_atomic(path, body)
+
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute("SELECT body_hash FROM entries WHERE url = ?", (key,)).fetchone()
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO objects (hash, size) VALUES (?, ?)", (body_hash, len(body))
+                )
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, body_hash, status, json.dumps(dict(headers)), now, now + ttl,
+                     headers.get("etag"), headers.get("last-modified"), now),
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            if previous is not None and previous[0] != body_hash:
+                self.__release_object(previous[0])
+            self.__evict()
+        return True
+
+    def refresh(
+        self,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        ttl: Optional[float] = None,
+    ) -> bool:
+        """Mark a stored response fresh again, after the server answered 304 Not Modified.
+
+        Args:
+            url: Requested URL.
+            headers: Headers of the 304 response; new validators replace the stored ones.
+            params: Parameters added to the query.
+            ttl: Seconds the response stays fresh. Defaults to the Cache-Control
+                max-age of headers, or default_ttl.
+
+        Returns:
+            True if a stored response was refreshed, False if there is none or the 304 is marked no-store.
+        """
+        headers = headers or {}
+        if ttl is None:
+            ttl = get_cache_ttl(headers, self.default_ttl)
+        key = self.get_key(url, params)
+        with self._lock:
+            if ttl is None:
+                self.__remove(key)
+                return False
+            now = time.time()
+            cursor = self._connection.execute(
+                "UPDATE entries SET stored_at = ?, expires_at = ?, last_access = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (now, now + ttl, now, headers.get("etag"), headers.get("last-modified"), key),
+            )
+        return cursor.rowcount > 0
+
+    def remove(self, url: str, params: Optional[Dict[str, Any]] = None) -> bool:
+        """Delete a stored response.
+
+        Args:
+            url: Requested URL.
+            params: Parameters added to the query.
+
+        Returns:
+            True if a response was deleted.
+        """
+        key = self.get_key(url, params)
+        with self._lock:
+            return self.__remove(key)
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Delete least recently used entries until the stored bodies fit a size.
+
+        Args:
+            max_bytes: Size to shrink to. Defaults to the cache's max_bytes.
+
+        Returns:
+            Number of entries deleted.
+        """
+        with self._lock:
+            return self.__evict(self.max_bytes if max_bytes is None else max_bytes)
+
+    def clear(self) -> None:
+        """Delete every stored response."""
+        with self._lock:
+            for (key,) in self._connection.execute("SELECT url FROM entries").fetchall():
+                self.__remove(key)
+
+    def close(self) -> None:
+        """Close the index; stored responses stay on disk."""
+        with self._lock:
+            self._connection.close()
+
+    def fetch(
+        self, engine: FetchEngine, url: str, params: Optional[Dict[str, Any]] = None, index: int = 0
+    ) -> FetchResult:
+        """Fetch a URL through the cache.
+
+        The request is sent to url with params appended, unchanged; the canonical
+        URL, without ignored parameters, is only used as the cache key. Fresh
+        responses are served without a request. Stale ones are revalidated
+        with a conditional request and served from disk if the server answers 304.
+        Other successful responses are stored.
+
+        Args:
+            engine: Engine used for requests that reach the network.
+            url: URL to fetch.
+            params: Parameters added to the query.
+            index: Position reported in the result.
+
+        Returns:
+            The result, with from_cache set when the body came from disk.
+        """
+        start = time.perf_counter()
+        key = self.get_key(url, params)
+        cached = self.get(key, allow_stale=True)
+        if cached is not None and cached.is_fresh:
+            self.hits += 1
+            return self.__to_result(cached, url, index, params, start, attempts=0)
+
+        result = engine.fetch(_add_params(url, params), index, params, cached.get_revalidation_headers() if cached else None)
+        if cached is not None and result.status == 304:
+            self.revalidations += 1
+            self.refresh(key, result.headers)
+            return self.__to_result(cached, url, index, params, start, result.attempts)
+
+        self.misses += 1
+        if result.ok and result.status is not None:
+            self.put(key, result.status, result.headers, bytes(result.body))
+        return FetchResult(url, index, result.status, result.headers, result.body, time.perf_counter() - start,
+                           result.attempts, result.error, params)
+
+    @staticmethod
+    def __to_result(
+        cached: CachedResponse, url: str, index: int, params: Optional[Mapping[str, Any]], start: float, attempts: int
+    ) -> FetchResult:
+        return FetchResult(url, index, cached.status, cached.headers, cached.body, time.perf_counter() - start,
+                           attempts, params=params, from_cache=True)
+
+    def __get_object_path(self, body_hash: str) -> Path:
+        return self.objects_directory / body_hash[:2] / body_hash
+
+    def __write_atomic(self, path: Path, body: bytes) -> None:
+        path.parent.mkdir(exist_ok=True)
+        descriptor, temporary_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(body)
+            os.replace(temporary_name, path)
+        except BaseException:
+            Path(temporary_name).unlink(missing_ok=True)
+            raise
+
+    def __read_body(self, body_hash: str, size: int) -> Union[bytes, memoryview]:
+        path = self.__get_object_path(body_hash)
+        if size < self.mmap_threshold:
+            return path.read_bytes()
+        with open(path, "rb") as file:
+            return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __remove(self, key: str) -> bool:
+        row = self._connection.execute("SELECT body_hash FROM entries WHERE url = ?", (key,)).fetchone()
+        if row is None:
+            return False
+        self._connection.execute("DELETE FROM entries WHERE url = ?", (key,))
+        self.__release_object(row[0])
+        return True
+
+    def __release_object(self, body_hash: str) -> None:
+        if self._connection.execute("SELECT 1 FROM entries WHERE body_hash = ?", (body_hash,)).fetchone():
+            return
+        self._connection.execute("DELETE FROM objects WHERE hash = ?", (body_hash,))
+        try:
+            self.__get_object_path(body_hash).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def __evict(self, max_bytes: Optional[int] = None) -> int:
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        evicted = 0
+        while self.__get_size() > limit:
+            row: Optional[Tuple[str]] = self._connection.execute(
+                "SELECT url FROM entries ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self.__remove(row[0])
+            evicted += 1
+        return evicted
+
+    def __get_size(self) -> int:
+        # Kept up to date by triggers on objects, so it is never summed per put.
+        (size,) = self._connection.execute("SELECT size FROM totals").fetchone()
+        return int(size)
@@ -0,0 +1,229 @@
+"""Low-overhead sampling profiler that aggregates thread stacks into collapsed-stack counts."""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType, TracebackType
+from typing import Dict, List, Optional, Tuple, Type, Union
+
+from .time import Stopwatch
+
+_StackKey = Tuple[str, Tuple[CodeType, ...], bool]
+
+DEFAULT_INTERVAL: float = 0.005
+DEFAULT_MAX_STACKS: int = 10_000
+DEFAULT_MAX_DEPTH: int = 128
+_TRUNCATED: str = "[truncated]"
+
+
+class SamplingProfiler:
+    """Samples the stacks of running threads from a background thread.
+
+    Every ``interval`` seconds the profiler reads ``sys._current_frames()`` and
+    counts each thread's stack; nothing is installed in the profiled code, so the
+    cost is paid by the sampling thread alone and grows with the sample rate, not
+    with the number of calls. Samples are wall-clock: threads waiting on I/O or
+    locks are counted where they wait.
+
+    Memory is bounded: at most ``max_stacks`` distinct stacks are kept, further
+    new stacks are counted in ``dropped_samples``, and stacks deeper than
+    ``max_depth`` keep their innermost frames under a "[truncated]" root.
+
+    The profiler runs between ``start`` and ``stop``, or as a context manager,
+    and times the region with a Stopwatch, which can be passed in to share it
+    with other timing code. Results accumulate across runs until ``clear``.
+
+    Args:
+        interval: Seconds between samples.
+        max_stacks: Distinct stacks kept.
+        max_depth: Frames kept per stack.
+        stopwatch: Stopwatch started and stopped with the profiler. Defaults to a new one.
+        group_by_thread: Whether each stack starts with its thread's name.
+
+    Example:
+    >>> with SamplingProfiler(interval=0.01) as profiler:
+    ...     run_backfill()
+    >>> profiler.write_collapsed("profiles/backfill.folded")
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        max_stacks: int = DEFAULT_MAX_STACKS,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        stopwatch: Optional[Stopwatch] = None,
+        group_by_thread: bool = True,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if max_stacks < 1 or max_depth < 1:
+            raise ValueError("max_stacks and max_depth must be at least 1")
+        self.interval: float = interval
+        self.max_stacks: int = max_stacks
+        self.max_depth: int = max_depth
+        self.stopwatch: Stopwatch = stopwatch if stopwatch is not None else Stopwatch()
+        self.group_by_thread: bool = group_by_thread
+        self.sample_count: int = 0
+        self.dropped_samples: int = 0
+        self.sampling_seconds: float = 0.0
+        self._stacks: Dict[_StackKey, int] = {}
+        self._labels: Dict[CodeType, str] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the sampling thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def overhead(self) -> float:
+        """Fraction of the profiled wall time spent taking samples."""
+        if self.stopwatch.start_time is None:
+            return 0.0
+        elapsed = self.stopwatch.time_elapsed if self.stopwatch.end_time else self.stopwatch.get_time_elapsed()
+        return self.sampling_seconds / elapsed if elapsed else 0.0
+
+    def start(self) -> None:
+        """Start the stopwatch and the sampling thread.
+
+        Raises:
+            RuntimeError: If the profiler is already running.
+        """
+        if self.is_running:
+            raise RuntimeError("Profiler already running")
+        self._stop_event.clear()
+        self.stopwatch.start()
+        self._thread = threading.Thread(target=self.__run, name="rsq-sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling, wait for the thread and stop the stopwatch."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.stopwatch.stop()
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.stop()
+
+    def sample(self) -> None:
+        """Take one sample of every thread except the calling one."""
+        start = time.perf_counter()
+        own_ident = threading.get_ident()
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                key = self.__stack_key(ident, frame)
+                count = self._stacks.get(key)
+                if count is not None:
+                    self._stacks[key] = count + 1
+                elif len(self._stacks) < self.max_stacks:
+                    self._stacks[key] = 1
+                else:
+                    self.dropped_samples += 1
+            self.sample_count += 1
+        del frames
+        self.sampling_seconds += time.perf_counter() - start
+
+    def get_stack_counts(self) -> Dict[str, int]:
+        """Get the sample count of every distinct stack.
+
+        Returns:
+            Counts keyed by stack, with frames from outermost to innermost joined by ";".
+        """
+        with self._lock:
+            stacks = list(self._stacks.items())
+        counts: Dict[str, int] = {}
+        for (thread_name, codes, truncated), count in stacks:
+            frames = [self.__label(code) for code in codes]
+            if truncated:
+                frames.insert(0, _TRUNCATED)
+            if self.group_by_thread:
+                frames.insert(0, thread_name.replace(";", ":"))
+            stack = ";".join(frames)
+            counts[stack] = counts.get(stack, 0) + count
+        return counts
+
+    def get_top_functions(self, count: int = 10) -> List[Tuple[str, int]]:
+        """Get the functions most often at the top of a stack, where the samples were taken.
+
+        Args:
+            count: Number of functions to return.
+
+        Returns:
+            (function, samples) pairs, most sampled first.
+        """
+        totals: "Counter[str]" = Counter()
+        with self._lock:
+            stacks = list(self._stacks.items())
+        for (_, codes, _), samples in stacks:
+            if codes:
+                totals[self.__label(codes[-1])] += samples
+        return totals.most_common(count)
+
+    def to_collapsed(self) -> str:
+        """Render the samples in the collapsed-stack format read by flamegraph.pl, speedscope and inferno.
+
+        Returns:
+            One "frame;frame;frame count" line per stack, sorted by stack.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.get_stack_counts().items()))
+
+    def write_collapsed(self, path: Union[str, Path]) -> None:
+        """Write the collapsed stacks to a file.
+
+        Args:
+            path: File to write; parent directories are created.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_collapsed())
+
+    def clear(self) -> None:
+        """Forget every sample."""
+        with self._lock:
+            self._stacks.clear()
+            self.sample_count = 0
+            self.dropped_samples = 0
+            self.sampling_seconds = 0.0
+
+    def __stack_key(self, ident: int, frame: Optional[FrameType]) -> _StackKey:
+        codes: List[CodeType] = []
+        while frame is not None and len(codes) < self.max_depth:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        thread_name = self._thread_names.get(ident)
+        if thread_name is None:
+            self._thread_names = {thread.ident: thread.name for thread in threading.enumerate() if thread.ident}
+            thread_name = self._thread_names.get(ident, f"thread-{ident}")
+        codes.reverse()
+        return thread_name, tuple(codes), frame is not None
+
+    def __label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def __run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
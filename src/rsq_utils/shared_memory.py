@@ -0,0 +1,571 @@
+"""Shared memory utilities for storing numpy arrays and DataFrames once across processes."""
+import ctypes
+import multiprocessing
+import os
+import pickle
+import struct
+import sys
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory, util
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .variables import Cache, VariableDict
+
+SHAREABLE_DTYPE_KINDS: str = "biufcmM"
+SEGMENT_HEADER_BYTES: int = 64
+REGISTRY_HEADER_BYTES: int = 8
+DEFAULT_REGISTRY_BYTES: int = 1024 * 1024
+DEFAULT_LOCK_TIMEOUT: float = 60.0
+_COUNTER_FORMAT: str = "q"
+
+
+@dataclass(frozen=True)
+class SharedArrayHandle:
+    """Picklable description of a numpy array stored in a shared memory segment."""
+    segment_name: str
+    dtype: str
+    shape: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class SharedBlockHandle:
+    """A 2D block of same-dtype DataFrame columns stored as (columns, rows)."""
+    array: SharedArrayHandle
+    column_positions: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class SharedDataFrameHandle:
+    """Picklable description of a DataFrame split into shared column blocks.
+
+    The index, column labels and any columns that cannot be shared zero-copy are
+    pickled into ``metadata`` and rebuilt per process.
+    """
+    blocks: Tuple[SharedBlockHandle, ...]
+    metadata: SharedArrayHandle
+
+
+SharedHandle = Union[SharedArrayHandle, SharedDataFrameHandle]
+
+
+def is_shareable_array(value: Any) -> bool:
+    """Check if a value is a numeric numpy array that can be attached zero-copy.
+
+    Args:
+        value: Value to check.
+
+    Returns:
+        True if value is a numpy array with a numeric, boolean or datetime dtype.
+    """
+    return isinstance(value, np.ndarray) and value.dtype.kind in SHAREABLE_DTYPE_KINDS
+
+
+def is_shareable(value: Any) -> bool:
+    """Check if a value can be stored by a SharedMemoryStore.
+
+    Args:
+        value: Value to check.
+
+    Returns:
+        True for numeric numpy arrays and DataFrames, False otherwise.
+
+    Examples:
+        >>> is_shareable(np.arange(3))
+        True
+        >>> is_shareable([1, 2, 3])
+        False
+    """
+    return is_shareable_array(value) or isinstance(value, pd.DataFrame)
+
+
+@contextmanager
+def _acquire(lock: Any, timeout: Optional[float]) -> Iterator[None]:
+    """Hold a lock, giving up after a timeout instead of waiting forever on a dead holder."""
+    if timeout is None:
+        lock.acquire()
+    elif not lock.acquire(True, timeout):
+        raise TimeoutError(
+            f"Timed out after {timeout}s waiting for the shared memory store lock; a process "
+            "may have been killed while holding it, e.g. by Pool.terminate()"
+        )
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class _SharedSegment(shared_memory.SharedMemory):
+    """SharedMemory whose mapping stays alive until the last numpy view onto it is gone.
+
+    Numpy releases the buffer export of the object it wraps, so a view built on ``buf``
+    dangles once the segment is closed. Views are built on a ctypes array instead,
+    which holds an export on the mapping for as long as any view references it, and
+    ``close`` leaves such a mapping to be unmapped with its last view.
+    """
+
+    @classmethod
+    def attach(cls, name: str) -> "_SharedSegment":
+        """Attach to an existing segment, leaving its registration with the resource tracker as it is.
+
+        Processes started by multiprocessing share their parent's resource tracker,
+        which holds the creator's registration until the segment is unlinked. Before
+        Python 3.13 attaching registers the name again, which the tracker ignores.
+        """
+        if sys.version_info >= (3, 13):
+            return cls(name=name, track=False)
+        return cls(name=name)
+
+    def unlink(self) -> None:
+        """Destroy the segment and its tracker registration, unless it is already destroyed."""
+        try:
+            super().unlink()
+        except FileNotFoundError:
+            return
+        if not getattr(self, "_track", True):
+            resource_tracker.unregister(self._name, "shared_memory")  # type: ignore[attr-defined]
+
+    def view_buffer(self) -> Any:
+        mapping: Any = self._mmap
+        return (ctypes.c_char * self.size).from_buffer(mapping)
+
+    def close(self) -> None:
+        try:
+            super().close()
+        except BufferError:
+            self._mmap = None
+            file_descriptor: int = getattr(self, "_fd", -1)
+            if file_descriptor >= 0:
+                os.close(file_descriptor)
+                self._fd = -1
+
+
+def _segment_handles(handle: SharedHandle) -> List[SharedArrayHandle]:
+    if isinstance(handle, SharedArrayHandle):
+        return [handle]
+    return [block.array for block in handle.blocks] + [handle.metadata]
+
+
+class SharedMemoryStore:
+    """Registry of shared memory segments with cross-process reference counting.
+
+    Values are published under a key in a small registry that lives in its own
+    shared memory segment, so any process holding the store can look them up by
+    key. Each data segment carries a reference count in its header: the registry
+    holds one reference per published segment and every process that attaches a
+    segment holds one more. A segment is unlinked when its count reaches zero, and
+    ``unlink`` destroys every published segment whatever its count.
+
+    The store is picklable while a process is being started, so it can be passed to
+    ``multiprocessing.Pool(initializer=..., initargs=(store,))`` or ``Process(args=...)``.
+    A child process releases its references when it calls ``close``, when its copy
+    of the store is garbage collected, or when it exits normally. Shut pools down
+    with ``close()`` and ``join()``: a worker killed by ``terminate()`` keeps its
+    references, and if it held the lock, other processes raise TimeoutError after
+    ``lock_timeout`` seconds instead of waiting forever.
+
+    Args:
+        lock: Cross-process lock guarding the registry and reference counts.
+            Defaults to a new ``multiprocessing.RLock``.
+        registry_bytes: Capacity of the registry segment in bytes.
+        lock_timeout: Seconds to wait for the lock before raising TimeoutError,
+            or None to wait forever.
+
+    Example:
+    >>> store = SharedMemoryStore()
+    >>> store.put("prices", np.arange(5.0))
+    True
+    >>> store.get("prices")
+    array([0., 1., 2., 3., 4.])
+    >>> store.unlink()
+    """
+
+    def __init__(
+        self,
+        lock: Optional[ContextManager[Any]] = None,
+        registry_bytes: int = DEFAULT_REGISTRY_BYTES,
+        lock_timeout: Optional[float] = DEFAULT_LOCK_TIMEOUT,
+    ) -> None:
+        self._lock: ContextManager[Any] = lock if lock is not None else multiprocessing.RLock()
+        self.lock_timeout: Optional[float] = lock_timeout
+        self._registry_segment: shared_memory.SharedMemory = _SharedSegment(
+            name=f"rsq_registry_{uuid.uuid4().hex[:16]}",
+            create=True,
+            size=REGISTRY_HEADER_BYTES + registry_bytes,
+        )
+        self._is_owner: bool = True
+        self._initialise_local_state()
+        with _acquire(self._lock, self.lock_timeout):
+            self._write_registry({})
+
+    def _initialise_local_state(self) -> None:
+        self._process_id: int = os.getpid()
+        self._attached_segments: Dict[str, _SharedSegment] = {}
+        self._needs_exit_release: bool = not self._is_owner
+
+    def _ensure_process_state(self) -> None:
+        """Drop attachments inherited through fork, which belong to the parent process."""
+        if self._process_id != os.getpid():
+            self._is_owner = False
+            self._initialise_local_state()
+
+    @property
+    def name(self) -> str:
+        """Name of the registry segment."""
+        return self._registry_segment.name
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self.name, "lock": self._lock, "lock_timeout": self.lock_timeout}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._lock = state["lock"]
+        self.lock_timeout = state["lock_timeout"]
+        self._registry_segment = _SharedSegment.attach(state["name"])
+        self._is_owner = False
+        self._initialise_local_state()
+
+    def put(self, key: str, value: Any) -> bool:
+        """Store a value in shared memory and publish it under a key.
+
+        Any value previously published under the same key is released.
+
+        Args:
+            key: Registry key.
+            value: Numeric numpy array or DataFrame to share.
+
+        Returns:
+            True if the value was shared, False if it cannot be shared.
+        """
+        if is_shareable_array(value):
+            handle: SharedHandle = self.__create_array(value)
+        elif isinstance(value, pd.DataFrame):
+            handle = self.__create_dataframe(value)
+        else:
+            return False
+
+        self._ensure_process_state()
+        with _acquire(self._lock, self.lock_timeout):
+            registry = self._read_registry()
+            previous = registry.get(key)
+            registry[key] = handle
+            try:
+                self._write_registry(registry)
+            except ValueError:
+                self.__release_handle(handle)
+                raise
+            if previous is not None:
+                self.__release_handle(previous)
+        return True
+
+    def get(self, key: str) -> Any:
+        """Attach to a published value without copying its data.
+
+        Returned arrays are read-only views onto the shared segment.
+
+        Args:
+            key: Registry key.
+
+        Returns:
+            Numpy array or DataFrame backed by shared memory.
+
+        Raises:
+            KeyError: If no value is published under the key.
+        """
+        self._ensure_process_state()
+        with _acquire(self._lock, self.lock_timeout):
+            handle = self._read_registry()[key]
+            for segment_handle in _segment_handles(handle):
+                self.__attach(segment_handle.segment_name)
+
+        if isinstance(handle, SharedArrayHandle):
+            return self.__view(handle)
+        return self.__dataframe_view(handle)
+
+    def remove(self, key: str) -> None:
+        """Unpublish a key and release the registry's reference to its segments.
+
+        Args:
+            key: Registry key.
+
+        Raises:
+            KeyError: If no value is published under the key.
+        """
+        self._ensure_process_state()
+        with _acquire(self._lock, self.lock_timeout):
+            registry = self._read_registry()
+            handle = registry.pop(key)
+            self._write_registry(registry)
+            self.__release_handle(handle)
+
+    def keys(self) -> List[str]:
+        """List the published keys.
+
+        Returns:
+            Keys currently in the registry.
+        """
+        with _acquire(self._lock, self.lock_timeout):
+            return list(self._read_registry().keys())
+
+    def __contains__(self, key: object) -> bool:
+        with _acquire(self._lock, self.lock_timeout):
+            return key in self._read_registry()
+
+    def get_reference_count(self, key: str) -> int:
+        """Get the reference count of the first segment published under a key.
+
+        Args:
+            key: Registry key.
+
+        Returns:
+            Number of references held by the registry and attached processes.
+        """
+        with _acquire(self._lock, self.lock_timeout):
+            segment_name = _segment_handles(self._read_registry()[key])[0].segment_name
+            segment = _SharedSegment.attach(segment_name)
+            try:
+                return self.__read_counter(segment)
+            finally:
+                segment.close()
+
+    def close(self) -> None:
+        """Release every segment this process attached and detach from the registry."""
+        self._ensure_process_state()
+        self._release(self._lock, self.lock_timeout, self._attached_segments, self._registry_segment)
+
+    def unlink(self) -> None:
+        """Remove every published key, destroy its segments and destroy the registry.
+
+        Segments are destroyed even while processes that never released their
+        references still count against them; processes already attached keep their
+        views. Call once from the process that created the store when all work is done.
+        """
+        self._ensure_process_state()
+        with _acquire(self._lock, self.lock_timeout):
+            registry = self._read_registry()
+            self._write_registry({})
+            for handle in registry.values():
+                self.__release_handle(handle, force=True)
+        self.close()
+        if self._is_owner:
+            self._registry_segment.unlink()
+
+    @staticmethod
+    def _release(
+        lock: Any,
+        lock_timeout: Optional[float],
+        attached_segments: Dict[str, _SharedSegment],
+        registry_segment: shared_memory.SharedMemory,
+    ) -> None:
+        """Release a process's references and detach from the registry; run by close and at exit."""
+        if attached_segments:
+            with _acquire(lock, lock_timeout):
+                while attached_segments:
+                    SharedMemoryStore.__detach_segment(attached_segments.popitem()[1])
+        registry_segment.close()
+
+    def _read_registry(self) -> Dict[str, SharedHandle]:
+        buffer = self.__buffer(self._registry_segment)
+        (length,) = struct.unpack_from(_COUNTER_FORMAT, buffer, 0)
+        registry: Dict[str, SharedHandle] = pickle.loads(
+            bytes(buffer[REGISTRY_HEADER_BYTES:REGISTRY_HEADER_BYTES + length])
+        )
+        return registry
+
+    def _write_registry(self, registry: Dict[str, SharedHandle]) -> None:
+        payload = pickle.dumps(registry, protocol=pickle.HIGHEST_PROTOCOL)
+        buffer = self.__buffer(self._registry_segment)
+        if REGISTRY_HEADER_BYTES + len(payload) > len(buffer):
+            raise ValueError("Shared memory registry is full")
+        buffer[REGISTRY_HEADER_BYTES:REGISTRY_HEADER_BYTES + len(payload)] = payload
+        struct.pack_into(_COUNTER_FORMAT, buffer, 0, len(payload))
+
+    def __create_array(self, array: np.ndarray) -> SharedArrayHandle:
+        contiguous = np.ascontiguousarray(array)
+        segment = _SharedSegment(
+            name=f"rsq_{uuid.uuid4().hex[:16]}",
+            create=True,
+            size=SEGMENT_HEADER_BYTES + contiguous.nbytes,
+        )
+        struct.pack_into(_COUNTER_FORMAT, self.__buffer(segment), 0, 1)
+        handle = SharedArrayHandle(
+            segment_name=segment.name,
+            dtype=contiguous.dtype.str,
+            shape=tuple(contiguous.shape),
+        )
+        destination: np.ndarray = np.ndarray(
+            handle.shape, dtype=contiguous.dtype, buffer=self.__buffer(segment), offset=SEGMENT_HEADER_BYTES
+        )
+        destination[...] = contiguous
+        del destination
+        segment.close()
+        return handle
+
+    def __create_dataframe(self, df: pd.DataFrame) -> SharedDataFrameHandle:
+        positions_by_dtype: Dict[np.dtype, List[int]] = {}
+        fallback_columns: Dict[int, pd.Series] = {}
+        for position in range(df.shape[1]):
+            column = df.iloc[:, position]
+            if isinstance(column.dtype, np.dtype) and column.dtype.kind in SHAREABLE_DTYPE_KINDS:
+                positions_by_dtype.setdefault(column.dtype, []).append(position)
+            else:
+                fallback_columns[position] = column
+
+        blocks: List[SharedBlockHandle] = []
+        for dtype, positions in positions_by_dtype.items():
+            block = np.empty((len(positions), df.shape[0]), dtype=dtype)
+            for row, position in enumerate(positions):
+                block[row] = df.iloc[:, position].to_numpy()
+            blocks.append(SharedBlockHandle(array=self.__create_array(block), column_positions=tuple(positions)))
+
+        metadata = pickle.dumps((df.index, df.columns, fallback_columns), protocol=pickle.HIGHEST_PROTOCOL)
+        return SharedDataFrameHandle(
+            blocks=tuple(blocks),
+            metadata=self.__create_array(np.frombuffer(metadata, dtype=np.uint8)),
+        )
+
+    def __view(self, handle: SharedArrayHandle) -> np.ndarray:
+        array: np.ndarray = np.ndarray(
+            handle.shape,
+            dtype=np.dtype(handle.dtype),
+            buffer=self._attached_segments[handle.segment_name].view_buffer(),
+            offset=SEGMENT_HEADER_BYTES,
+        )
+        array.flags.writeable = False
+        return array
+
+    def __dataframe_view(self, handle: SharedDataFrameHandle) -> pd.DataFrame:
+        index, columns, fallback_columns = pickle.loads(self.__view(handle.metadata).tobytes())
+        data: Dict[int, Any] = {}
+        for block in handle.blocks:
+            block_view = self.__view(block.array)
+            for row, position in enumerate(block.column_positions):
+                data[position] = block_view[row]
+        for position, column in fallback_columns.items():
+            data[position] = column.to_numpy() if isinstance(column.dtype, np.dtype) else column.array
+
+        df: pd.DataFrame = pd.DataFrame(
+            {position: data[position] for position in range(len(columns))}, index=index, copy=False
+        )
+        df.columns = columns
+        return df
+
+    def __attach(self, segment_name: str) -> None:
+        if segment_name in self._attached_segments:
+            return
+        if self._needs_exit_release:
+            # Registered on first use: a process being started clears finalizers
+            # registered while its arguments were unpickled.
+            util.Finalize(
+                self,
+                SharedMemoryStore._release,
+                args=(self._lock, self.lock_timeout, self._attached_segments, self._registry_segment),
+                exitpriority=0,
+            )
+            self._needs_exit_release = False
+        segment = _SharedSegment.attach(segment_name)
+        self.__add_to_counter(segment, 1)
+        self._attached_segments[segment_name] = segment
+
+    @staticmethod
+    def __detach_segment(segment: _SharedSegment) -> None:
+        if SharedMemoryStore.__add_to_counter(segment, -1) == 0:
+            segment.unlink()
+        segment.close()
+
+    def __release_handle(self, handle: SharedHandle, force: bool = False) -> None:
+        for segment_handle in _segment_handles(handle):
+            segment = _SharedSegment.attach(segment_handle.segment_name)
+            if self.__add_to_counter(segment, -1) == 0 or force:
+                segment.unlink()
+            segment.close()
+            if segment_handle.segment_name in self._attached_segments:
+                self.__detach_segment(self._attached_segments.pop(segment_handle.segment_name))
+
+    @staticmethod
+    def __add_to_counter(segment: shared_memory.SharedMemory, delta: int) -> int:
+        count = SharedMemoryStore.__read_counter(segment) + delta
+        struct.pack_into(_COUNTER_FORMAT, SharedMemoryStore.__buffer(segment), 0, count)
+        return count
+
+    @staticmethod
+    def __read_counter(segment: shared_memory.SharedMemory) -> int:
+        (count,) = struct.unpack_from(_COUNTER_FORMAT, SharedMemoryStore.__buffer(segment), 0)
+        return int(count)
+
+    @staticmethod
+    def __buffer(segment: shared_memory.SharedMemory) -> memoryview:
+        buffer = segment.buf
+        if buffer is None:
+            raise ValueError(f"Shared memory segment {segment.name} is closed")
+        return buffer
+
+
+class SharedCache(Cache):
+    """Cache that stores numpy arrays and DataFrames once in shared memory.
+
+    Shareable values are published to a SharedMemoryStore and held as read-only,
+    zero-copy views. Values the store cannot share fall back to per-process storage
+    with the usual deep copy. Creating a SharedCache from a store attaches every
+    value already published, so worker processes see the parent's data without
+    copying it.
+
+    Args:
+        variables: Initial dictionary of variables to store. Defaults to None.
+        store: Shared memory store to publish to. Defaults to a new store.
+
+    Example:
+    >>> cache = SharedCache({"prices": np.arange(5.0), "label": "daily"})
+    >>> cache.is_shared("prices"), cache.is_shared("label")
+    (True, False)
+    """
+
+    def __init__(self, variables: Optional[VariableDict] = None, store: Optional[SharedMemoryStore] = None) -> None:
+        self.store: SharedMemoryStore = store if store is not None else SharedMemoryStore()
+        super().__init__()
+        for key in self.store.keys():
+            dict.__setitem__(self, key, self.store.get(key))
+        self.update_variables(variables or {})
+
+    def update_variables(self, new_variables: VariableDict) -> None:
+        """Update variables, publishing shareable values to shared memory.
+
+        Args:
+            new_variables: Dictionary of new variables to add/update.
+        """
+        per_process: VariableDict = {}
+        for key, value in new_variables.items():
+            if self.store.put(key, value):
+                dict.__setitem__(self, key, self.store.get(key))
+            else:
+                if key in self.store:
+                    self.store.remove(key)
+                per_process[key] = value
+        super().update_variables(per_process)
+
+    def remove_variable(self, key: str) -> None:
+        """Remove a variable, releasing its shared segments if it was shared.
+
+        Args:
+            key: Variable to remove.
+
+        Raises:
+            KeyError: If the variable does not exist.
+        """
+        del self[key]
+        if key in self.store:
+            self.store.remove(key)
+
+    def is_shared(self, key: str) -> bool:
+        """Check if a variable is stored in shared memory.
+
+        Args:
+            key: Variable to check.
+
+        Returns:
+            True if the variable is published to the shared memory store.
+        """
+        return key in self.store
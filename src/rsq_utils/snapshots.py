@@ -0,0 +1,258 @@
+"""Incremental snapshots of variables that store only what changed between checkpoints."""
+import hashlib
+import itertools
+import pickle
+import types
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Type
+
+import numpy as np
+import pandas as pd
+
+from .variables import Variables, VariableDict
+
+_MAX_FINGERPRINT_DEPTH: int = 4
+_unhashable_tokens: Iterator[int] = itertools.count()
+_IMMUTABLE_TYPES = (type(None), bool, int, float, complex, str, bytes, frozenset, types.ModuleType)
+
+
+@dataclass
+class SnapshotDelta:
+    """Keys added, changed and removed since the previous checkpoint.
+
+    Values are deep copies taken at capture time.
+    """
+    added: VariableDict = field(default_factory=dict)
+    changed: VariableDict = field(default_factory=dict)
+    removed: List[str] = field(default_factory=list)
+    is_full: bool = False
+
+    def is_empty(self) -> bool:
+        """Check if nothing changed."""
+        return not (self.added or self.changed or self.removed)
+
+
+@dataclass
+class _KeyState:
+    value: Any
+    fingerprint: bytes
+
+
+def fingerprint(
+    value: Any,
+    sample_bytes: Optional[int] = None,
+    sample_items: Optional[int] = None,
+) -> bytes:
+    """Compute a content fingerprint of a value.
+
+    By default every byte and item is hashed, so any change gives a different
+    fingerprint. Setting sample_bytes or sample_items bounds the cost by hashing
+    large arrays, DataFrames, strings and containers from their type, shape and an
+    evenly spaced sample of their contents; this is lossy, as a change outside the
+    sample goes unnoticed. Values that cannot be pickled get a new fingerprint on
+    every call, so they always count as changed.
+
+    Args:
+        value: Value to fingerprint.
+        sample_bytes: Maximum bytes of array, DataFrame or string data hashed.
+            Defaults to None, meaning all of it.
+        sample_items: Maximum number of container items hashed. Defaults to None,
+            meaning all of them.
+
+    Returns:
+        16-byte blake2b digest.
+
+    Examples:
+        >>> fingerprint([1, 2, 3]) == fingerprint([1, 2, 3])
+        True
+        >>> fingerprint([1, 2, 3]) == fingerprint([1, 2, 4])
+        False
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _update_fingerprint(digest, value, sample_bytes, sample_items, 0)
+    return digest.digest()
+
+
+def _evenly_spaced(length: int, count: Optional[int]) -> np.ndarray:
+    if count is None or length <= count:
+        return np.arange(length)
+    return np.linspace(0, length - 1, count).astype(np.int64)
+
+
+def _update_fingerprint(
+    digest: Any, value: Any, sample_bytes: Optional[int], sample_items: Optional[int], depth: int
+) -> None:
+    digest.update(type(value).__qualname__.encode())
+    if value is None or isinstance(value, (bool, int, float, complex)):
+        digest.update(repr(value).encode())
+    elif isinstance(value, (str, bytes)):
+        data = value.encode("utf-8", "surrogatepass") if isinstance(value, str) else value
+        digest.update(len(data).to_bytes(8, "little"))
+        if sample_bytes is None or len(data) <= sample_bytes:
+            digest.update(data)
+        else:
+            half = sample_bytes // 2
+            digest.update(data[:half])
+            digest.update(data[-half:])
+    elif isinstance(value, types.ModuleType):
+        digest.update(value.__name__.encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype.str}{value.shape}".encode())
+        flat = value.reshape(-1)
+        if value.dtype.hasobject:
+            for position in _evenly_spaced(flat.size, sample_items):
+                _update_fingerprint(digest, flat[position], sample_bytes, sample_items, depth + 1)
+        elif sample_bytes is None:
+            digest.update(np.ascontiguousarray(flat).view(np.uint8))
+        else:
+            count = max(sample_bytes // max(value.itemsize, 1), 1)
+            digest.update(np.ascontiguousarray(flat[_evenly_spaced(flat.size, count)]).tobytes())
+    elif isinstance(value, pd.DataFrame):
+        digest.update(f"{value.shape}{list(value.columns)}{list(value.dtypes)}".encode())
+        sample = value
+        if sample_bytes is not None:
+            row_count = max(sample_bytes // max(8 * value.shape[1], 1), 1)
+            sample = value.iloc[_evenly_spaced(len(value), row_count)]
+        try:
+            digest.update(pd.util.hash_pandas_object(sample, index=True).to_numpy().tobytes())
+        except TypeError:
+            _update_pickled(digest, sample)
+    elif isinstance(value, (list, tuple, dict, set, frozenset)) and depth < _MAX_FINGERPRINT_DEPTH:
+        items: List[Any] = list(value.items()) if isinstance(value, dict) else list(value)
+        if isinstance(value, (set, frozenset)):
+            items = sorted(items, key=repr)
+        digest.update(len(items).to_bytes(8, "little"))
+        for position in _evenly_spaced(len(items), sample_items):
+            _update_fingerprint(digest, items[position], sample_bytes, sample_items, depth + 1)
+    else:
+        _update_pickled(digest, value)
+
+
+def _update_pickled(digest: Any, value: Any) -> None:
+    try:
+        digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        digest.update(next(_unhashable_tokens).to_bytes(8, "little"))
+
+
+class SnapshotHistory:
+    """Sequence of checkpoints that records only keys added, changed or removed.
+
+    The first checkpoint is a full snapshot; each later one is a SnapshotDelta. A key
+    holding the same immutable object as before is unchanged without further work;
+    any other value is unchanged if its fingerprint matches, whether or not it is the
+    same object. Only changed values are deep-copied, so a checkpoint costs
+    O(changed state) rather than O(total state), plus one full hash of every
+    mutable value. Any checkpoint is rebuilt from the nearest full snapshot before
+    it plus the deltas after that.
+
+    Args:
+        full_snapshot_interval: Take a full snapshot every this many checkpoints to
+            bound rebuild cost. Defaults to None, meaning only the first is full.
+        sample_bytes: Bytes of array, DataFrame or string data hashed per
+            fingerprint. Defaults to None, meaning all of it. Setting it is lossy:
+            in-place edits outside the sample are not recorded.
+        sample_items: Container items hashed per fingerprint. Defaults to None,
+            meaning all of them; lossy in the same way when set.
+
+    Example:
+    >>> history = SnapshotHistory()
+    >>> local_variables = LocalVariables({"a": 1, "b": [1, 2]})
+    >>> history.capture(local_variables).added
+    {'a': 1, 'b': [1, 2]}
+    >>> local_variables.update_variables({"a": 2})
+    >>> history.capture(local_variables).changed
+    {'a': 2}
+    >>> history.rebuild(0)
+    {'a': 1, 'b': [1, 2]}
+    """
+
+    def __init__(
+        self,
+        full_snapshot_interval: Optional[int] = None,
+        sample_bytes: Optional[int] = None,
+        sample_items: Optional[int] = None,
+    ) -> None:
+        if full_snapshot_interval is not None and full_snapshot_interval < 1:
+            raise ValueError("full_snapshot_interval must be a positive integer")
+        self.full_snapshot_interval: Optional[int] = full_snapshot_interval
+        self.sample_bytes: Optional[int] = sample_bytes
+        self.sample_items: Optional[int] = sample_items
+        self.checkpoints: List[SnapshotDelta] = []
+        self._states: Dict[str, _KeyState] = {}
+        self._variables_class: Type[Variables] = Variables
+
+    def __len__(self) -> int:
+        return len(self.checkpoints)
+
+    def capture(self, variables: Mapping[str, Any]) -> SnapshotDelta:
+        """Record a checkpoint of the keys that changed since the previous one.
+
+        Args:
+            variables: Variables to capture, typically LocalVariables or GlobalVariables.
+
+        Returns:
+            The recorded checkpoint.
+        """
+        if isinstance(variables, Variables):
+            self._variables_class = type(variables)
+
+        is_full = not self.checkpoints or (
+            self.full_snapshot_interval is not None and len(self.checkpoints) % self.full_snapshot_interval == 0
+        )
+        added: VariableDict = {}
+        changed: VariableDict = {}
+        states: Dict[str, _KeyState] = {}
+        for key, value in variables.items():
+            previous = self._states.get(key)
+            if previous is not None and previous.value is value and isinstance(value, _IMMUTABLE_TYPES):
+                value_fingerprint = previous.fingerprint
+            else:
+                value_fingerprint = self.__fingerprint(value)
+            states[key] = _KeyState(value=value, fingerprint=value_fingerprint)
+
+            if previous is None or is_full:
+                added[key] = value
+            elif previous.fingerprint != value_fingerprint:
+                changed[key] = value
+
+        delta = SnapshotDelta(
+            added=dict(Variables(added)),
+            changed=dict(Variables(changed)),
+            removed=[] if is_full else [key for key in self._states if key not in states],
+            is_full=is_full,
+        )
+        self._states = states
+        self.checkpoints.append(delta)
+        return delta
+
+    def rebuild(self, index: int = -1) -> Variables:
+        """Rebuild the variables as they were at a checkpoint.
+
+        Args:
+            index: Checkpoint index; negative values count from the end.
+
+        Returns:
+            New instance of the captured variables class holding copies of the values.
+
+        Raises:
+            IndexError: If there is no checkpoint at index.
+        """
+        if not -len(self.checkpoints) <= index < len(self.checkpoints):
+            raise IndexError(f"No checkpoint at index {index}")
+        index %= len(self.checkpoints)
+
+        start = index
+        while not self.checkpoints[start].is_full:
+            start -= 1
+
+        state: VariableDict = {}
+        for delta in self.checkpoints[start:index + 1]:
+            for key in delta.removed:
+                state.pop(key, None)
+            state.update(delta.added)
+            state.update(delta.changed)
+        return self._variables_class(state)
+
+    def __fingerprint(self, value: Any) -> bytes:
+        return fingerprint(value, self.sample_bytes, self.sample_items)
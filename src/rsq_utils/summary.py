@@ -0,0 +1,239 @@
+"""Bounded-cost summaries of variables using sampling and per-key caching."""
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .variables import SummaryDict
+
+
+@dataclass(frozen=True)
+class SummaryBudget:
+    """Limits on the work done by a single SummaryEngine.summarize call.
+
+    Attributes:
+        max_seconds: Wall-clock budget for the whole call. Keys not reached in time,
+            or with any nested value not reached in time, get a truncated summary
+            and are retried on the next call.
+        max_rows: DataFrames with more rows are summarized from a random sample of this size.
+        max_depth: Nested dicts and lists deeper than this are described by type and length only.
+        max_items: Number of keys or elements summarized per dict or list.
+    """
+    max_seconds: float = 1.0
+    max_rows: int = 10_000
+    max_depth: int = 3
+    max_items: int = 10
+
+
+def estimate_distinct_count(sample: pd.Series, population_size: int) -> int:
+    """Estimate the number of distinct values in a column from a uniform sample.
+
+    Uses the Haas-Stokes Duj1 estimator, n * d / (n - f1 + f1 * n / N), where d is
+    the distinct count and f1 the number of values seen once in a sample of n out of
+    N rows. Exact when the sample is the whole column.
+
+    Args:
+        sample: Sampled values.
+        population_size: Number of rows in the full column.
+
+    Returns:
+        Estimated distinct count.
+
+    Examples:
+        >>> estimate_distinct_count(pd.Series([1, 2, 2]), 3)
+        2
+        >>> estimate_distinct_count(pd.Series([1, 2, 3]), 300)
+        300
+    """
+    sample_size = len(sample)
+    frequencies = sample.value_counts(dropna=True)
+    distinct = len(frequencies)
+    if sample_size == 0 or sample_size >= population_size:
+        return distinct
+    singletons = int((frequencies == 1).sum())
+    denominator = sample_size - singletons + singletons * sample_size / population_size
+    return int(round(min(sample_size * distinct / denominator, population_size)))
+
+
+class SummaryEngine:
+    """Summarizes variables within a time and row budget and caches the results per key.
+
+    Produces the same summary layout as ``Variables.get_summary``. Large DataFrames
+    are summarized from a row sample, so distinct counts and deep memory usage are
+    estimates; ``is_estimate`` and ``sampled_rows`` record when that happened.
+
+    A key's summary is cached together with the value it describes and reused while
+    the key still holds that same object, so summarizing unchanged keys is free.
+    Replacing a key invalidates its summary; mutating a value in place does not.
+
+    Args:
+        budget: Limits applied to each summarize call. Defaults to SummaryBudget().
+        random_state: Seed for row sampling.
+
+    Example:
+    >>> engine = SummaryEngine(SummaryBudget(max_rows=1000))
+    >>> variables = Variables({"df": pd.DataFrame({"a": range(1_000_000)})})
+    >>> variables.get_summary(summary_engine=engine)["df"]["is_estimate"]
+    True
+    """
+
+    def __init__(self, budget: Optional[SummaryBudget] = None, random_state: int = 0) -> None:
+        self.budget: SummaryBudget = budget or SummaryBudget()
+        self._random_state: int = random_state
+        self._cache: Dict[str, Tuple[Any, SummaryDict]] = {}
+        self._deadline: float = 0.0
+
+    def summarize(self, variables: Mapping[str, Any]) -> SummaryDict:
+        """Summarize every key, reusing cached summaries of unchanged keys.
+
+        Args:
+            variables: Mapping of variable names to values.
+
+        Returns:
+            Dictionary containing summaries of all variables.
+        """
+        self._deadline = time.perf_counter() + self.budget.max_seconds
+        for key in list(self._cache):
+            if key not in variables:
+                del self._cache[key]
+
+        summaries: SummaryDict = {}
+        for key, value in variables.items():
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] is value:
+                summaries[key] = cached[1]
+                continue
+
+            summary = self._summarize(value, 0)
+            summaries[key] = summary
+            if not summary.get("truncated", False):
+                self._cache[key] = (value, summary)
+        return summaries
+
+    def summarize_value(self, value: Any) -> SummaryDict:
+        """Summarize a single value within the budget, without caching.
+
+        Args:
+            value: Value to summarize.
+
+        Returns:
+            Summary dictionary appropriate for the value type.
+        """
+        self._deadline = time.perf_counter() + self.budget.max_seconds
+        return self._summarize(value, 0)
+
+    def _summarize(self, value: Any, depth: int) -> SummaryDict:
+        if self.__is_out_of_time():
+            return {"type": self.__type_name(value), "truncated": True}
+        if isinstance(value, pd.DataFrame):
+            return self.__dataframe_summary(value)
+        elif isinstance(value, dict):
+            return self.__dict_summary(value, depth)
+        elif isinstance(value, list):
+            return self.__list_summary(value, depth)
+        else:
+            return self.__other_variables_summary(value)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop cached summaries.
+
+        Args:
+            key: Key to drop. Drops every key if None.
+        """
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    def __dataframe_summary(self, df: pd.DataFrame) -> SummaryDict:
+        row_count = len(df)
+        sample = df
+        if row_count > self.budget.max_rows:
+            positions = np.random.default_rng(self._random_state).choice(
+                row_count, size=self.budget.max_rows, replace=False
+            )
+            sample = df.iloc[np.sort(positions)]
+
+        number_of_unique_values: Dict[Any, int] = {}
+        truncated = False
+        for position, column in enumerate(df.columns):
+            if self.__is_out_of_time():
+                truncated = True
+                break
+            number_of_unique_values[column] = estimate_distinct_count(sample.iloc[:, position], row_count)
+
+        return {
+            "type": "pandas.DataFrame",
+            "shape": str(df.shape),
+            "columns": list(df.columns),
+            "data_types": df.dtypes.to_dict(),
+            "data_examples": df.head(10).to_dict(),
+            "number_of_unique_values": number_of_unique_values,
+            "memory_usage": self.__estimate_memory_usage(df, sample),
+            "sampled_rows": len(sample),
+            "is_estimate": len(sample) < row_count,
+            "truncated": truncated,
+        }
+
+    @staticmethod
+    def __estimate_memory_usage(df: pd.DataFrame, sample: pd.DataFrame) -> float:
+        """Exact shallow memory plus the sampled, scaled deep memory of variable-width columns."""
+        if len(sample) == len(df):
+            return float(df.memory_usage(index=True, deep=True).sum())
+
+        is_variable_width = np.array([
+            not (isinstance(dtype, np.dtype) and dtype.kind in "biufcmM") for dtype in df.dtypes
+        ], dtype=bool)
+        deep_sample = sample.memory_usage(index=False, deep=True).to_numpy()
+        shallow_sample = sample.memory_usage(index=False, deep=False).to_numpy()
+        extra = float((deep_sample - shallow_sample)[is_variable_width].sum())
+        scale = len(df) / max(len(sample), 1)
+        return float(df.memory_usage(index=True, deep=False).sum()) + extra * scale
+
+    def __dict_summary(self, value: Dict[Any, Any], depth: int) -> SummaryDict:
+        summary: SummaryDict = {
+            "type": "dict",
+            "keys": list(value.keys())[:self.budget.max_items],
+        }
+        if depth >= self.budget.max_depth:
+            summary["length"] = len(value)
+            return summary
+        summary["summary"] = {
+            k: self._summarize(v, depth + 1)
+            for k, v in list(value.items())[:self.budget.max_items]
+        }
+        if any(child.get("truncated", False) for child in summary["summary"].values()):
+            summary["truncated"] = True
+        return summary
+
+    def __list_summary(self, value: List[Any], depth: int) -> SummaryDict:
+        summary: SummaryDict = {"type": "list", "length": len(value)}
+        if depth < self.budget.max_depth:
+            summary["first_elements"] = [
+                self._summarize(v, depth + 1) for v in value[:self.budget.max_items]
+            ]
+            if any(child.get("truncated", False) for child in summary["first_elements"]):
+                summary["truncated"] = True
+        return summary
+
+    @staticmethod
+    def __other_variables_summary(value: Any) -> SummaryDict:
+        try:
+            return {
+                "type": type(value).__name__,
+                "summary": value.get_summary(),
+            }
+        except Exception:
+            return {
+                "type": type(value).__name__,
+                "value": value[:100] if isinstance(value, str) else str(value)[:100],
+            }
+
+    @staticmethod
+    def __type_name(value: Any) -> str:
+        return "pandas.DataFrame" if isinstance(value, pd.DataFrame) else type(value).__name__
+
+    def __is_out_of_time(self) -> bool:
+        return time.perf_counter() > self._deadline
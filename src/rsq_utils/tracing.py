@@ -0,0 +1,261 @@
+"""Nested span tracing written as Chrome trace-event JSON, for viewing in Perfetto or chrome://tracing."""
+import functools
+import json
+import os
+import random
+import threading
+import weakref
+from collections import deque
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple, Type, TypeVar, Union, cast
+
+from .time import Stopwatch
+
+F = TypeVar("F", bound=Callable[..., Any])
+_SpanEvent = Tuple[str, str, float, float, int, int, Optional[Dict[str, Any]]]
+
+DEFAULT_MAX_EVENTS: int = 100_000
+_tracers: "weakref.WeakSet[Tracer]" = weakref.WeakSet()
+
+
+class Span:
+    """One timed operation, recorded when it ends.
+
+    Spans are created with ``Tracer.span`` and used as context managers; spans
+    opened inside another span on the same thread nest under it in the viewer.
+    Timing uses a Stopwatch, whose wall-clock start times line up across processes.
+    """
+    __slots__ = ("tracer", "name", "category", "args", "stopwatch", "sampled")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str = "", args: Optional[Dict[str, Any]] = None) -> None:
+        self.tracer: Tracer = tracer
+        self.name: str = name
+        self.category: str = category
+        self.args: Optional[Dict[str, Any]] = args
+        self.stopwatch: Stopwatch = Stopwatch()
+        self.sampled: bool = False
+
+    def set(self, **args: Any) -> None:
+        """Attach arguments shown with the span in the viewer."""
+        if self.args is None:
+            self.args = {}
+        self.args.update(args)
+
+    def __enter__(self) -> "Span":
+        self.sampled = self.tracer._push()
+        if self.sampled:
+            self.stopwatch.start()
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.tracer._pop()
+        if not self.sampled:
+            return
+        self.stopwatch.stop()
+        if exception_type is not None:
+            self.set(error=exception_type.__name__)
+        start_time = cast(float, self.stopwatch.start_time)
+        elapsed = cast(float, self.stopwatch.time_elapsed)
+        self.tracer._record(self.name, self.category, start_time * 1e6, elapsed * 1e6, self.args)
+
+
+class Tracer:
+    """Records nested spans from every thread into a bounded in-memory buffer.
+
+    Sampling is decided once per top-level span and inherited by the spans
+    nested in it, so sampled traces are always complete. The buffer keeps the
+    most recent ``max_events`` spans and counts the ones it drops, so tracing can
+    stay on in long-running jobs. ``write`` saves the buffer as Chrome trace-event
+    JSON; traces written by several processes can be combined with
+    ``merge_chrome_traces``. After a fork the child starts with an empty buffer.
+
+    Args:
+        max_events: Spans kept in the buffer.
+        sample_rate: Fraction of top-level spans recorded, between 0 and 1.
+        enabled: Whether spans are recorded at all.
+
+    Example:
+    >>> tracer = Tracer(sample_rate=0.1)
+    >>> @tracer.trace()
+    ... def parse(body): ...
+    >>> with tracer.span("batch", "backfill", day="2024-01-01"):
+    ...     parse(fetch())
+    >>> tracer.write("traces/backfill.json")
+    """
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS, sample_rate: float = 1.0, enabled: bool = True) -> None:
+        if max_events < 1:
+            raise ValueError("max_events must be at least 1")
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.max_events: int = max_events
+        self.sample_rate: float = sample_rate
+        self.enabled: bool = enabled
+        self.dropped_events: int = 0
+        self._events: Deque[_SpanEvent] = deque(maxlen=max_events)
+        self._thread_names: Dict[int, str] = {}
+        self._local: threading.local = threading.local()
+        self._pid: int = os.getpid()
+        _tracers.add(self)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def span(self, name: str, category: str = "", **args: Any) -> Span:
+        """Create a span to use as a context manager.
+
+        Args:
+            name: Span name.
+            category: Category, used for filtering in the viewer.
+            **args: Arguments shown with the span.
+
+        Returns:
+            The span.
+        """
+        return Span(self, name, category, args or None)
+
+    def trace(self, name: Optional[str] = None, category: str = "") -> Callable[[F], F]:
+        """Decorate a function so every call is recorded as a span.
+
+        Args:
+            name: Span name. Defaults to the function's qualified name.
+            category: Category, used for filtering in the viewer.
+
+        Returns:
+            The decorator.
+        """
+        def decorator(function: F) -> F:
+            span_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with Span(self, span_name, category):
+                    return function(*args, **kwargs)
+            return cast(F, wrapper)
+        return decorator
+
+    def get_events(self) -> List[Dict[str, Any]]:
+        """Get the buffered spans as Chrome trace events, with thread and process name metadata.
+
+        Returns:
+            Complete ("X") events in microseconds, followed by metadata ("M") events.
+        """
+        events: List[Dict[str, Any]] = []
+        for name, category, start, duration, pid, tid, args in list(self._events):
+            event: Dict[str, Any] = {"name": name, "cat": category, "ph": "X", "ts": start, "dur": duration,
+                                     "pid": pid, "tid": tid}
+            if args:
+                event["args"] = args
+            events.append(event)
+        events.append({"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0,
+                       "args": {"name": f"pid {self._pid}"}})
+        for tid, thread_name in list(self._thread_names.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                           "args": {"name": thread_name}})
+        return events
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Get the buffer as a Chrome trace JSON object.
+
+        Returns:
+            A dictionary with "traceEvents", ready for json.dump.
+        """
+        return {
+            "traceEvents": self.get_events(),
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_events": self.dropped_events, "sample_rate": self.sample_rate},
+        }
+
+    def write(self, path: Union[str, Path], clear: bool = False) -> None:
+        """Write the buffer as Chrome trace JSON.
+
+        Args:
+            path: File to write; parent directories are created.
+            clear: Whether to empty the buffer after writing.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(self.to_chrome_trace(), file)
+        if clear:
+            self.clear()
+
+    def clear(self) -> None:
+        """Empty the buffer and reset the dropped event count."""
+        self._events.clear()
+        self.dropped_events = 0
+
+    def _push(self) -> bool:
+        stack: Optional[List[bool]] = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        if stack:
+            sampled = stack[-1]
+        else:
+            sampled = self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+        stack.append(sampled)
+        return sampled
+
+    def _pop(self) -> None:
+        self._local.stack.pop()
+
+    def _record(self, name: str, category: str, start: float, duration: float, args: Optional[Dict[str, Any]]) -> None:
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        if len(self._events) == self.max_events:
+            self.dropped_events += 1
+        self._events.append((name, category, start, duration, self._pid, tid, args))
+
+    def _after_fork(self) -> None:
+        self._events.clear()
+        self._thread_names.clear()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self.dropped_events = 0
+
+
+def _reset_tracers_after_fork() -> None:
+    for tracer in list(_tracers):
+        tracer._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_tracers_after_fork)
+
+
+_default_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer."""
+    return _default_tracer
+
+
+def merge_chrome_traces(paths: Iterable[Union[str, Path]], output: Union[str, Path]) -> int:
+    """Combine Chrome trace files, such as one per worker process, into one file.
+
+    Args:
+        paths: Trace files written by ``Tracer.write``.
+        output: File to write the combined trace to.
+
+    Returns:
+        Number of events in the combined trace.
+    """
+    events: List[Dict[str, Any]] = []
+    dropped_events = 0
+    for path in paths:
+        with open(path) as file:
+            trace = json.load(file)
+        events.extend(trace["traceEvents"])
+        dropped_events += trace.get("otherData", {}).get("dropped_events", 0)
+    with open(output, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_events": dropped_events}},
+                  file)
+    return len(events)
@@ -0,0 +1,335 @@
+"""Canonical URLs, stable URL fingerprints and bounded filters for streaming URL dedup."""
+import functools
+import hashlib
+import math
+from collections import deque
+from typing import Any, Collection, Deque, Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, quote, quote_plus, unquote, urlsplit, urlunsplit
+
+import numpy as np
+
+from .url import sanitize_params
+
+DedupMode = Literal["exact", "bloom"]
+
+_DEFAULT_PORTS: Dict[str, int] = {"http": 80, "https": 443, "ftp": 21, "ws": 80, "wss": 443}
+_PATH_SEGMENT_SAFE: str = "!$&'()*+,;=:@~"
+_FINGERPRINT_BYTES: int = 16
+_BATCH_SIZE: int = 10_000
+_CACHE_SIZE: int = 65_536
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _normalize_netloc(scheme: str, netloc: str) -> str:
+    parts = urlsplit(f"//{netloc}")
+    host = (parts.hostname or "").rstrip(".")
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        pass
+    normalized = f"[{host}]" if ":" in host else host
+
+    port = parts.port
+    if port is not None and _DEFAULT_PORTS.get(scheme) != port:
+        normalized = f"{normalized}:{port}"
+    if "@" in netloc:
+        normalized = f"{netloc.rsplit('@', 1)[0]}@{normalized}"
+    return normalized
+
+
+_quote_query = functools.lru_cache(maxsize=_CACHE_SIZE)(quote_plus)
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _normalize_path(path: str) -> str:
+    output: List[str] = []
+    segments = [unquote(segment) for segment in path.split("/")]
+    for segment in segments:
+        if segment == "..":
+            if len(output) > 1:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    if segments and segments[-1] in (".", ".."):
+        output.append("")
+    normalized = "/".join(quote(segment, safe=_PATH_SEGMENT_SAFE) for segment in output)
+    if not normalized.startswith("/"):
+        normalized = f"/{normalized}"
+    return normalized
+
+
+def canonicalize_url(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    ignore_params: Optional[Collection[str]] = None,
+) -> str:
+    """Normalize a URL so that equivalent URLs become the same string.
+
+    Lowercases the scheme and host, drops default ports, the fragment and any
+    trailing dot on the host, removes "." and ".." path segments and re-encodes the
+    path consistently. Query parameters from the URL and from params are merged,
+    None values dropped as in ``sanitize_params``, and sorted by key and value. The
+    query is encoded like ``url_encode``, so "a b", "a+b" and "a%20b" all become "a+b".
+    Host and path normalization and the encoding of each query key and value are
+    cached, since crawls repeat them heavily.
+
+    Args:
+        url: URL to canonicalize, with or without a query string.
+        params: Extra parameters to add to the query.
+        ignore_params: Parameter names to drop, such as tracking parameters.
+
+    Returns:
+        Canonical URL.
+
+    Raises:
+        ValueError: If url is not a valid URL.
+
+    Examples:
+        >>> canonicalize_url("HTTPS://Example.com:443/a/./b/../c?z=1&a=2#top")
+        'https://example.com/a/c?a=2&z=1'
+        >>> canonicalize_url("https://example.com/search", {"q": "red shoes", "page": None})
+        'https://example.com/search?q=red+shoes'
+    """
+    parts = urlsplit(url)
+    if not (parts.scheme and parts.netloc):
+        raise ValueError(f"Invalid URL: {url}")
+    scheme = parts.scheme.lower()
+
+    pairs: List[Tuple[str, str]] = parse_qsl(parts.query, keep_blank_values=True) if parts.query else []
+    if params:
+        pairs.extend(sanitize_params(params).items())
+    if ignore_params:
+        pairs = [pair for pair in pairs if pair[0] not in ignore_params]
+    pairs.sort()
+    query = "&".join(f"{_quote_query(key)}={_quote_query(value)}" for key, value in pairs)
+
+    return urlunsplit((scheme, _normalize_netloc(scheme, parts.netloc), _normalize_path(parts.path), query, ""))
+
+
+def url_fingerprint(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    ignore_params: Optional[Collection[str]] = None,
+) -> bytes:
+    """Compute a stable 16-byte blake2b fingerprint of a URL's canonical form.
+
+    The fingerprint only depends on the canonical URL, so it is stable across
+    processes and runs and can be used as a cache key.
+
+    Args:
+        url: URL to fingerprint.
+        params: Extra parameters to add to the query.
+        ignore_params: Parameter names to drop.
+
+    Returns:
+        16-byte digest.
+
+    Examples:
+        >>> url_fingerprint("https://example.com/?b=2&a=1") == url_fingerprint("https://EXAMPLE.com?a=1&b=2")
+        True
+    """
+    canonical = canonicalize_url(url, params, ignore_params)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=_FINGERPRINT_BYTES).digest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte fingerprints, backed by a numpy bit array.
+
+    Uses double hashing of the two 8-byte halves of the fingerprint to derive the
+    bit positions, so no extra hashing is done per lookup. Memory is fixed at
+    construction: about 1.8 bytes per item for a 0.1% error rate.
+
+    Args:
+        capacity: Number of items the filter is sized for.
+        error_rate: False positive rate at capacity.
+
+    Example:
+    >>> bloom_filter = BloomFilter(capacity=1_000_000, error_rate=0.001)
+    >>> bloom_filter.add(url_fingerprint("https://example.com"))
+    True
+    >>> url_fingerprint("https://example.com/") in bloom_filter
+    True
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity: int = capacity
+        self.error_rate: float = error_rate
+        self.bit_count: int = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hash_count: int = max(int(round(self.bit_count / capacity * math.log(2))), 1)
+        self.count: int = 0
+        self._bits: np.ndarray = np.zeros((self.bit_count + 7) // 8, dtype=np.uint8)
+        self._hash_offsets: np.ndarray = np.arange(self.hash_count, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, fingerprint: object) -> bool:
+        if not isinstance(fingerprint, bytes):
+            return False
+        bits = self._bits
+        for position in self.__positions(fingerprint):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def size_bytes(self) -> int:
+        """Memory used by the bit array."""
+        return int(self._bits.nbytes)
+
+    def add(self, fingerprint: bytes) -> bool:
+        """Add a fingerprint.
+
+        Args:
+            fingerprint: 16-byte fingerprint.
+
+        Returns:
+            True if the fingerprint was not already present, False if it probably was.
+        """
+        bits = self._bits
+        is_new = False
+        for position in self.__positions(fingerprint):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                is_new = True
+        if is_new:
+            self.count += 1
+        return is_new
+
+    def add_many(self, fingerprints: Sequence[bytes]) -> np.ndarray:
+        """Add a batch of fingerprints with vectorized bit operations.
+
+        Args:
+            fingerprints: 16-byte fingerprints.
+
+        Returns:
+            Boolean array marking the fingerprints that were not already present.
+            Repeats within the batch are only new the first time.
+        """
+        if len(fingerprints) == 0:
+            return np.zeros(0, dtype=bool)
+        halves = np.frombuffer(b"".join(fingerprints), dtype="<u8").reshape(-1, 2)
+        first = np.zeros(len(halves), dtype=bool)
+        first[np.unique(halves, axis=0, return_index=True)[1]] = True
+
+        step = halves[:, 1] | np.uint64(1)
+        positions = (halves[:, :1] + self._hash_offsets * step[:, None]) % np.uint64(self.bit_count)
+        byte_positions = (positions >> np.uint64(3)).astype(np.intp)
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        present = ((self._bits[byte_positions] & masks) != 0).all(axis=1)
+
+        is_new: np.ndarray = first & ~present
+        np.bitwise_or.at(self._bits, byte_positions[is_new].ravel(), masks[is_new].ravel())
+        self.count += int(is_new.sum())
+        return is_new
+
+    def __positions(self, fingerprint: bytes) -> Iterator[int]:
+        start = int.from_bytes(fingerprint[:8], "little")
+        step = int.from_bytes(fingerprint[8:16], "little") | 1
+        for offset in range(self.hash_count):
+            yield (start + offset * step) % (1 << 64) % self.bit_count
+
+
+class UrlDeduplicator:
+    """Bounded filter that lets each canonical URL through once.
+
+    In "exact" mode the fingerprints of the most recent ``capacity`` URLs are kept
+    in a set; older ones are forgotten first-in first-out, so a URL repeated after
+    more than ``capacity`` others is let through again. In "bloom" mode a
+    BloomFilter of fixed size is used instead, which remembers everything in
+    about 2 bytes per URL but occasionally drops a new URL as a false positive.
+
+    Args:
+        capacity: Number of URLs remembered (exact) or sized for (bloom).
+        mode: "exact" or "bloom".
+        error_rate: False positive rate of the Bloom filter at capacity.
+        ignore_params: Parameter names ignored when comparing URLs.
+
+    Example:
+    >>> deduplicator = UrlDeduplicator(capacity=100_000_000, mode="bloom")
+    >>> list(deduplicator.filter(["https://a.com/?x=1&y=2", "https://A.com/?y=2&x=1", "https://a.com/b"]))
+    ['https://a.com/?x=1&y=2', 'https://a.com/b']
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10_000_000,
+        mode: DedupMode = "exact",
+        error_rate: float = 0.001,
+        ignore_params: Optional[Collection[str]] = None,
+    ) -> None:
+        if mode not in ("exact", "bloom"):
+            raise ValueError("mode must be either 'exact' or 'bloom'")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity: int = capacity
+        self.mode: DedupMode = mode
+        self.ignore_params: Optional[Collection[str]] = ignore_params
+        self._bloom_filter: Optional[BloomFilter] = BloomFilter(capacity, error_rate) if mode == "bloom" else None
+        self._seen: Set[bytes] = set()
+        self._order: Deque[bytes] = deque()
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str):
+            return False
+        fingerprint = url_fingerprint(url, ignore_params=self.ignore_params)
+        if self._bloom_filter is not None:
+            return fingerprint in self._bloom_filter
+        return fingerprint in self._seen
+
+    def add(self, url: str, params: Optional[Dict[str, Any]] = None) -> bool:
+        """Record a URL.
+
+        Args:
+            url: URL to record.
+            params: Extra parameters, as passed to url_encode.
+
+        Returns:
+            True if the URL was new, False if an equivalent URL was seen before.
+        """
+        return self.__add_fingerprint(url_fingerprint(url, params, self.ignore_params))
+
+    def filter(self, urls: Iterable[str]) -> Iterator[str]:
+        """Yield only the URLs not seen before, in order.
+
+        Args:
+            urls: URLs to deduplicate; consumed lazily.
+
+        Yields:
+            URLs whose canonical form has not been seen.
+        """
+        if self._bloom_filter is None:
+            for url in urls:
+                if self.add(url):
+                    yield url
+            return
+
+        batch: List[str] = []
+        for url in urls:
+            batch.append(url)
+            if len(batch) >= _BATCH_SIZE:
+                yield from self.__filter_batch(self._bloom_filter, batch)
+                batch = []
+        yield from self.__filter_batch(self._bloom_filter, batch)
+
+    def __filter_batch(self, bloom_filter: BloomFilter, batch: List[str]) -> Iterator[str]:
+        fingerprints = [url_fingerprint(url, ignore_params=self.ignore_params) for url in batch]
+        for url, is_new in zip(batch, bloom_filter.add_many(fingerprints)):
+            if is_new:
+                yield url
+
+    def __add_fingerprint(self, fingerprint: bytes) -> bool:
+        if self._bloom_filter is not None:
+            return self._bloom_filter.add(fingerprint)
+        if fingerprint in self._seen:
+            return False
+        self._seen.add(fingerprint)
+        self._order.append(fingerprint)
+        if len(self._order) > self.capacity:
+            self._seen.discard(self._order.popleft())
+        return True
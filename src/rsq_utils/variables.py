@@ -1,8 +1,15 @@
 """Variable management utilities for handling and summarizing Python variables."""
+import sys
 import types
 import copy
-from typing import Any, Dict, List, Optional, TypeVar
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, TypeVar
+
+from .memory_accounting import MemoryAccountant, deep_sizeof
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .summary import SummaryEngine
 
 T = TypeVar('T')
 VariableDict = Dict[str, Any]
@@ -19,11 +26,21 @@ class Variables(dict):
     
     Args:
         variables: Initial dictionary of variables to store. Defaults to None.
+        memory_accountant: Tracks the size of each variable incrementally and
+            enforces its memory budget on every update. Defaults to None.
     """
     
-    def __init__(self, variables: Optional[VariableDict] = None) -> None:
-        deep_copy = self.__deepcopy(variables or {})
-        super().__init__(deep_copy)
+    def __init__(
+        self,
+        variables: Optional[VariableDict] = None,
+        memory_accountant: Optional[MemoryAccountant] = None
+    ) -> None:
+        self.memory_accountant: Optional[MemoryAccountant] = memory_accountant
+        if memory_accountant is None:
+            super().__init__(self.__deepcopy(variables or {}))
+        else:
+            super().__init__()
+            Variables.update_variables(self, variables or {})
 
     def __deepcopy(self, variables: VariableDict) -> VariableDict:
         """Create a deep copy of variables while preserving module references.
@@ -45,25 +62,81 @@ class Variables(dict):
     def update_variables(self, new_variables: VariableDict) -> None:
         """Update variables with new values, maintaining isolation.
         
+        With a memory accountant, only the new values are measured. Under the
+        "evict" policy the oldest other variables are removed to stay in budget.
+        
         Args:
             new_variables: Dictionary of new variables to add/update.
+            
+        Raises:
+            ValueError: If the update does not fit in the memory accountant's budget.
         """
-        super().update(self.__deepcopy(new_variables))
+        deep_copy = self.__deepcopy(new_variables)
+        if self.memory_accountant is None:
+            super().update(deep_copy)
+            return
+
+        self.memory_accountant.reconcile(self)
+        sizes, evictions = self.memory_accountant.plan_update(deep_copy, list(self.keys()))
+        for key in evictions:
+            dict.__delitem__(self, key)
+            self.memory_accountant.forget(key)
+        super().update(deep_copy)
+        for key, value in deep_copy.items():
+            self.memory_accountant.record(key, value, sizes[key])
 
     def copy_variables(self) -> 'Variables':
         """Create a new Variables instance with copied data.
         
+        A copy of budgeted variables gets its own memory accountant with the
+        same max_bytes and policy, so the copy is held to the same budget.
+        
         Returns:
             New Variables instance with copied data.
+            
+        Raises:
+            ValueError: If the variables were changed directly past a "reject" budget.
         """
-        return Variables(self.__deepcopy(self))
+        if self.memory_accountant is None:
+            return Variables(self.__deepcopy(self))
+        accountant = MemoryAccountant(self.memory_accountant.max_bytes, self.memory_accountant.policy)
+        return Variables(self, memory_accountant=accountant)
     
-    def get_summary(self) -> SummaryDict:
+    def get_memory_usage(self) -> Dict[str, int]:
+        """Get the estimated deep size of each variable.
+        
+        Returns:
+            Dictionary of variable name to size in bytes.
+        """
+        if self.memory_accountant is not None:
+            self.memory_accountant.reconcile(self)
+            return self.memory_accountant.get_sizes()
+        return {key: deep_sizeof(value) for key, value in self.items()}
+
+    def get_largest_variables(self, count: int = 10) -> List[Tuple[str, int]]:
+        """Get the variables using the most memory.
+        
+        Args:
+            count: Number of variables to return.
+            
+        Returns:
+            (name, size in bytes) pairs, largest first.
+        """
+        return sorted(self.get_memory_usage().items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def get_summary(self, summary_engine: Optional['SummaryEngine'] = None) -> SummaryDict:
         """Get a comprehensive summary of all variables.
         
+        Args:
+            summary_engine: Engine that bounds the cost with sampling and caches
+                summaries of unchanged keys. Defaults to None, which summarizes
+                every variable exactly.
+            
         Returns:
             Dictionary containing summaries of all variables.
         """
+        if summary_engine is not None:
+            return summary_engine.summarize(self)
         return {key: self.__summarize_variable(value) for key, value in self.items()}
         
     def __summarize_variable(self, value: Any) -> SummaryDict:
@@ -75,7 +148,8 @@ class Variables(dict):
         Returns:
             Summary dictionary appropriate for the variable type.
         """
-        if isinstance(value, pd.DataFrame):
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(value, pd.DataFrame):
             return self.__dataframe_summary(value)
         elif isinstance(value, dict):
             return self.__dict_summary(value)
@@ -84,7 +158,7 @@ class Variables(dict):
         else:
             return self.__other_variables_summary(value)
     
-    def __dataframe_summary(self, df: pd.DataFrame) -> SummaryDict:
+    def __dataframe_summary(self, df: "pd.DataFrame") -> SummaryDict:
         """Generate a summary for a pandas DataFrame.
         
         Args:
@@ -0,0 +1,77 @@
+"""Throughput benchmark of FetchEngine against a local HTTP server.
+
+Compares a serial urllib loop (a new connection per request) with FetchEngine
+using one worker (keep-alive only) and many workers. The server adds a fixed
+latency per request to stand in for a remote API.
+
+Run: python -m tests.benchmarks.benchmark_fetch
+"""
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+from src.rsq_utils.fetch import FetchEngine
+from src.rsq_utils.parameter_space import ParameterSpace
+from src.rsq_utils.url_builder import UrlBuilder
+
+REQUEST_COUNT = 400
+LATENCY_SECONDS = 0.002
+
+class _LatencyHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler that waits LATENCY_SECONDS before answering."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        """Answer every path with a small body."""
+        time.sleep(LATENCY_SECONDS)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        """Silence request logging."""
+
+def _serial_urllib(urls: List[str]) -> None:
+    for url in urls:
+        with urllib.request.urlopen(url) as response:
+            response.read()
+
+def _engine(max_workers: int) -> Callable[[List[str]], None]:
+    def run(urls: List[str]) -> None:
+        with FetchEngine(max_workers=max_workers, max_connections_per_host=max_workers) as engine:
+            for result in engine.fetch_many(urls):
+                assert result.ok
+    return run
+
+def main() -> None:
+    """Print requests per second for each fetch strategy."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _LatencyHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    builder = UrlBuilder(f"http://127.0.0.1:{server.server_address[1]}/items")
+    urls = list(builder.build_many(ParameterSpace({"page": list(range(REQUEST_COUNT))})))
+
+    strategies = {
+        "serial urllib (new connection each)": _serial_urllib,
+        "FetchEngine, 1 worker (keep-alive)": _engine(1),
+        "FetchEngine, 16 workers": _engine(16),
+    }
+    baseline = 0.0
+    try:
+        for name, run in strategies.items():
+            start = time.perf_counter()
+            run(urls)
+            rate = len(urls) / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"{name:<38} {rate:>10,.0f} requests/s  {rate / baseline:>5.1f}x")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
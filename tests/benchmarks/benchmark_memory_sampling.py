@@ -0,0 +1,50 @@
+"""Microbenchmark of memory sampling throughput.
+
+Compares the original approach (a new psutil.Process and a full virtual_memory
+query per call) with Memory.sample through psutil and through /proc.
+
+Run: python -m tests.benchmarks.benchmark_memory_sampling
+"""
+import time
+from typing import Callable, Dict
+
+import psutil
+
+from src.rsq_utils.memory import Memory
+
+def _original_sample() -> Dict[str, float]:
+    """Reproduce the per-call work Memory did before samples reused the process handle."""
+    system_memory = psutil.virtual_memory()
+    process_memory = psutil.Process()
+    return {
+        "system_memory_total_gb": system_memory.total / (1024 ** 3),
+        "system_memory_used_gb": system_memory.used / (1024 ** 3),
+        "system_memory_available_gb": system_memory.available / (1024 ** 3),
+        "system_memory_used_%": system_memory.used / system_memory.total * 100,
+        "process_memory_used_gb": process_memory.memory_info().rss / (1024 ** 3)
+    }
+
+def measure_samples_per_second(sample: Callable[[], object], duration: float = 1.0) -> float:
+    """Call sample repeatedly for duration seconds and return the call rate."""
+    count = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            sample()
+        count += 100
+    return count / (time.perf_counter() - start)
+
+def main() -> None:
+    """Print samples per second for each sampling path."""
+    results = {
+        "original (new Process per call)": measure_samples_per_second(_original_sample),
+        "Memory.sample (psutil, reused Process)": measure_samples_per_second(Memory(use_proc=False).sample),
+        "Memory.sample (/proc fast path)": measure_samples_per_second(Memory().sample),
+    }
+    baseline = results["original (new Process per call)"]
+    for name, rate in results.items():
+        print(f"{name:<42} {rate:>12,.0f} samples/s  {rate / baseline:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
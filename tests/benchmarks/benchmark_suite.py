@@ -0,0 +1,254 @@
+"""Benchmark suite for the package's hot paths, with baseline regression checks.
+
+Runs each workload at several sizes, records the best throughput over a few
+repeats and the peak memory traced by tracemalloc during one run, and writes the
+results as JSON. With a baseline file the results are compared against it, and
+the run fails when throughput drops or peak memory grows past the thresholds.
+Each round runs the whole matrix in a fresh interpreter and the median round is
+kept. Everything runs locally and offline.
+
+Throughput depends on the machine, so the baseline is not committed: record one
+with --update-baseline on the machine that runs the checks, from a commit known
+to be good, and record it again after intended changes. On CI, keep it per
+runner type, for example in the CI cache.
+
+Run: python -m tests.benchmarks.benchmark_suite [--sizes 100 1000 10000] [--rounds 3] [--output results.json]
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from src.rsq_utils.data_transformation import list_batch_split
+from src.rsq_utils.text import camel_to_snake, convert_keys_to_snake_case
+from src.rsq_utils.time import DateRange
+from src.rsq_utils.url import generate_parameter_combos, url_encode
+from src.rsq_utils.variables import Variables
+
+DEFAULT_SIZES = [100, 1_000, 10_000]
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MEMORY_THRESHOLD = 0.25
+MEMORY_NOISE_BYTES = 64 * 1024
+REPEATS = 15
+DEFAULT_ROUNDS = 3
+MIN_REPEAT_SECONDS = 0.02
+
+@dataclass
+class Workload:
+    """A benchmarked operation: setup builds the input for a size and returns the call to time."""
+    name: str
+    setup: Callable[[int], Callable[[], Any]]
+
+def _list_batch_split(size: int) -> Callable[[], Any]:
+    data = list(range(size))
+    return lambda: list_batch_split(data, 10)
+
+def _camel_to_snake(size: int) -> Callable[[], Any]:
+    names = [f"someHTTPResponse{i}FieldName" for i in range(size)]
+    return lambda: [camel_to_snake(name) for name in names]
+
+def _convert_keys_to_snake_case(size: int) -> Callable[[], Any]:
+    records = [
+        {"userId": i, "firstName": "Ada", "lastName": "Lovelace", "homeAddress": {"streetName": "Main", "zipCode": i},
+         "orderHistory": [{"orderId": i, "totalPrice": 1.5}]}
+        for i in range(size)
+    ]
+    return lambda: convert_keys_to_snake_case(records)
+
+def _date_range(size: int) -> Callable[[], Any]:
+    start = datetime(2000, 1, 1)
+
+    def run() -> Any:
+        date_range = DateRange()
+        date_range.generate_date_range(start_date=start, end_date=start + timedelta(days=size - 1))
+        return date_range.pair_dates()
+    return run
+
+def _variables_copy(size: int) -> Callable[[], Any]:
+    variables = Variables({f"variable_{i}": {"values": [i, i + 1, i + 2], "name": f"name {i}"} for i in range(size)})
+    return variables.copy_variables
+
+def _generate_parameter_combos(size: int) -> Callable[[], Any]:
+    parameters = {"page": list(range(max(size // 10, 1))), "kind": [f"k{i}" for i in range(10)], "sort": ["asc"]}
+    return lambda: generate_parameter_combos(parameters)
+
+def _url_encode(size: int) -> Callable[[], Any]:
+    params = [{"q": f"red shoes {i}", "page": i, "sort": "price", "empty": None} for i in range(size)]
+    return lambda: [url_encode("https://api.example.com/v1/search", combo) for combo in params]
+
+WORKLOADS = [
+    Workload("list_batch_split", _list_batch_split),
+    Workload("camel_to_snake", _camel_to_snake),
+    Workload("convert_keys_to_snake_case", _convert_keys_to_snake_case),
+    Workload("DateRange.pair_dates", _date_range),
+    Workload("Variables.copy_variables", _variables_copy),
+    Workload("generate_parameter_combos", _generate_parameter_combos),
+    Workload("url_encode", _url_encode),
+]
+
+def time_call(run: Callable[[], Any]) -> float:
+    """Return the lowest CPU seconds per call of run over REPEATS repeats.
+
+    Each repeat calls run until MIN_REPEAT_SECONDS of CPU time have passed. CPU
+    time rather than wall time keeps other processes on the machine out of the result.
+    Garbage collection is disabled while timing, as in timeit, since when its
+    pauses land depends on everything allocated before.
+    """
+    run()
+    best_seconds = float("inf")
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(REPEATS):
+            calls = 0
+            start = time.process_time()
+            while True:
+                run()
+                calls += 1
+                elapsed = time.process_time() - start
+                if elapsed >= MIN_REPEAT_SECONDS:
+                    break
+            best_seconds = min(best_seconds, elapsed / calls)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best_seconds
+
+def measure(run: Callable[[], Any], size: int) -> Dict[str, float]:
+    """Time run and trace its peak memory.
+
+    Peak memory is measured in a separate call so tracing does not slow the timed ones.
+    """
+    best_seconds = time_call(run)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "size": size,
+        "seconds_per_call": best_seconds,
+        "items_per_second": size / best_seconds,
+        "peak_bytes": peak_bytes,
+    }
+
+def run_matrix(sizes: Sequence[int], names: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Run every selected workload at every size once in this process and return the JSON document."""
+    results: Dict[str, Dict[str, float]] = {}
+    for workload in WORKLOADS:
+        if names and workload.name not in names:
+            continue
+        for size in sizes:
+            results[f"{workload.name}[{size}]"] = measure(workload.setup(size), size)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+def run_suite(sizes: Sequence[int], names: Optional[Sequence[str]] = None, rounds: int = 1) -> Dict[str, Any]:
+    """Run the matrix once per round, each in a fresh interpreter, and keep each benchmark's median round.
+
+    Memory layout differs from one interpreter to the next and can shift a
+    benchmark's speed for the life of the process, so repeating it in one
+    process does not average that out; separate processes do.
+    """
+    command = [sys.executable, "-m", "tests.benchmarks.benchmark_suite", "--worker", "--sizes", *map(str, sizes)]
+    if names:
+        command += ["--only", *names]
+    runs = [
+        json.loads(subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout)
+        for _ in range(rounds)
+    ]
+    document = runs[0]
+    for key in document["results"]:
+        ordered = sorted((run["results"][key] for run in runs), key=lambda result: result["seconds_per_call"])
+        document["results"][key] = ordered[len(ordered) // 2]
+    return document
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    memory_threshold: float = DEFAULT_MEMORY_THRESHOLD,
+) -> List[str]:
+    """List the benchmarks that regressed against the baseline.
+
+    A benchmark regresses when its throughput falls more than threshold below the
+    baseline, or its peak memory grows more than memory_threshold and by more than
+    MEMORY_NOISE_BYTES. Benchmarks missing from either side are ignored.
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            continue
+        speed = result["items_per_second"] / previous["items_per_second"]
+        if speed < 1 - threshold:
+            regressions.append(f"{key}: throughput {speed:.2f}x of baseline")
+        growth = result["peak_bytes"] - previous["peak_bytes"]
+        if growth > MEMORY_NOISE_BYTES and result["peak_bytes"] > previous["peak_bytes"] * (1 + memory_threshold):
+            regressions.append(f"{key}: peak memory {result['peak_bytes'] / previous['peak_bytes']:.2f}x of baseline")
+    return regressions
+
+def print_results(current: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    """Print a table of throughput and peak memory, with the change from the baseline."""
+    print(f"{'benchmark':<40} {'items/s':>14} {'peak KiB':>10} {'vs baseline':>12}")
+    for key, result in current["results"].items():
+        previous = baseline["results"].get(key) if baseline else None
+        change = f"{result['items_per_second'] / previous['items_per_second']:.2f}x" if previous else "-"
+        print(f"{key:<40} {result['items_per_second']:>14,.0f} {result['peak_bytes'] / 1024:>10,.1f} {change:>12}")
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the suite, write results and return 1 if any benchmark regressed."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="workload sizes")
+    parser.add_argument("--only", nargs="+", help="workload names to run")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS,
+                        help="passes over the matrix, each in a fresh process; the median is kept")
+    parser.add_argument("--output", type=Path, help="file to write the JSON results to")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed throughput drop")
+    parser.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                        help="allowed peak memory growth")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker:
+        print(json.dumps(run_matrix(args.sizes, args.only)))
+        return 0
+
+    current = run_suite(args.sizes, args.only, args.rounds)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.is_file() else None
+    print_results(current, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2))
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline on this machine to record one")
+        return 0
+
+    regressions = compare(current, baseline, args.threshold, args.memory_threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
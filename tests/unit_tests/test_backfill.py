@@ -0,0 +1,123 @@
+"""Tests for backfill utilities."""
+import threading
+import time
+import pytest
+from src.rsq_utils.backfill import Backfill, BackfillCheckpoint
+from src.rsq_utils.time import DateRange
+
+def make_date_range(start="2024-01-01", end="2024-01-11"):
+    """Build a DateRange of daily dates."""
+    date_range = DateRange()
+    date_range.generate_date_range(start, end)
+    return date_range
+
+def format_interval(start, end):
+    """Return the interval as a string, picklable for process pools."""
+    return f"{start}/{end}"
+
+def test_checkpoint_merges_and_persists(tmp_path):
+    """Test intervals merge into ranges that survive reloading and compaction."""
+    path = tmp_path / "checkpoints" / "job.txt"
+    checkpoint = BackfillCheckpoint(path)
+    checkpoint.add("2024-01-03", "2024-01-04")
+    checkpoint.add("2024-01-01", "2024-01-02")
+    checkpoint.add("2024-01-02", "2024-01-03")
+    checkpoint.add("2024-02-01", "2024-02-02")
+    checkpoint.close()
+
+    assert checkpoint.ranges == [("2024-01-01", "2024-01-04"), ("2024-02-01", "2024-02-02")]
+    assert len(path.read_text().splitlines()) == 4
+    reloaded = BackfillCheckpoint(path)
+    assert reloaded.ranges == checkpoint.ranges
+    assert reloaded.is_completed("2024-01-02", "2024-01-03")
+    assert not reloaded.is_completed("2024-01-03", "2024-01-05")
+    assert not reloaded.is_completed("2023-12-31", "2024-01-01")
+    reloaded.compact()
+    assert path.read_text() == "2024-01-01 2024-01-04\n2024-02-01 2024-02-02\n"
+    with pytest.raises(ValueError):
+        reloaded.add("2024-01-02", "2024-01-01")
+
+def test_checkpoint_ignores_partial_lines(tmp_path):
+    """Test a line cut short by a crash is ignored when loading."""
+    path = tmp_path / "job.txt"
+    path.write_text("2024-01-01 2024-01-02\n2024-01-02 2024-01")
+    assert BackfillCheckpoint(path).ranges == [("2024-01-01", "2024-01-02")]
+
+def test_run_resumes_after_failure(tmp_path):
+    """Test failed intervals are reported and only they run again on restart."""
+    calls = []
+    lock = threading.Lock()
+
+    def work(start, end):
+        with lock:
+            calls.append(start)
+        if start == "2024-01-05" and len(calls) < 11:
+            raise RuntimeError("source unavailable")
+        return end
+
+    path = tmp_path / "job.txt"
+    first = Backfill(work, make_date_range(), path, max_workers=3)
+    results = first.run()
+    failures = [result for result in results if result.error]
+
+    assert len(results) == 10
+    assert [result.interval for result in failures] == [("2024-01-05", "2024-01-06")]
+    assert first.progress.completed == 9 and first.progress.failed == 1
+    assert path.read_text() == "2024-01-01 2024-01-05\n2024-01-06 2024-01-11\n"
+
+    second = Backfill(work, make_date_range(), path)
+    assert second.get_pending() == [("2024-01-05", "2024-01-06")]
+    results = second.run()
+    assert [(result.interval, result.value) for result in results] == [(("2024-01-05", "2024-01-06"), "2024-01-06")]
+    assert second.progress.skipped == 9 and second.progress.remaining == 0
+    assert path.read_text() == "2024-01-01 2024-01-11\n"
+    assert Backfill(work, make_date_range(), path).run() == []
+
+def test_progress_reports_eta(tmp_path):
+    """Test every finished interval reports throughput and an ETA."""
+    updates = []
+    backfill = Backfill(format_interval, make_date_range(), tmp_path / "job.txt", max_workers=1,
+                        on_progress=updates.append)
+    backfill.run()
+
+    assert [progress.completed for progress in updates] == list(range(1, 11))
+    assert all(progress.total == 10 and progress.rate > 0 for progress in updates)
+    assert all(progress.eta is not None for progress in updates)
+    assert updates[-1].eta == 0.0 and updates[-1].remaining == 0
+    assert backfill.progress.elapsed == backfill.stopwatch.time_elapsed
+
+def test_process_pool(tmp_path):
+    """Test intervals run on a process pool and return their values."""
+    backfill = Backfill(format_interval, make_date_range(end="2024-01-04"), tmp_path / "job.txt",
+                        executor="process", max_workers=2)
+    values = sorted(result.value for result in backfill.run())
+    assert values == ["2024-01-01/2024-01-02", "2024-01-02/2024-01-03", "2024-01-03/2024-01-04"]
+
+def test_invalid_arguments(tmp_path):
+    """Test unknown executors and worker counts are rejected."""
+    with pytest.raises(ValueError):
+        Backfill(format_interval, make_date_range(), tmp_path / "job.txt", executor="fiber")
+    with pytest.raises(ValueError):
+        Backfill(format_interval, make_date_range(), tmp_path / "job.txt", max_workers=0)
+
+def test_interrupted_run_checkpoints_in_flight_intervals(tmp_path):
+    """Test intervals that finish after an interruption are still checkpointed, and unstarted ones are not."""
+    finished = []
+    lock = threading.Lock()
+
+    def work(start, end):
+        time.sleep(0.02)
+        with lock:
+            finished.append((start, end))
+
+    def interrupt(progress):
+        raise KeyboardInterrupt
+
+    path = tmp_path / "job.txt"
+    backfill = Backfill(work, make_date_range(), path, max_workers=2, on_progress=interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        backfill.run()
+    pending = Backfill(work, make_date_range(), path).get_pending()
+
+    assert 2 <= len(finished) < 10
+    assert sorted(set(make_date_range().pair_dates()) - set(pending)) == sorted(finished)
@@ -0,0 +1,143 @@
+"""Tests for configuration utilities."""
+import os
+import time
+from datetime import timedelta
+import pytest
+from src.rsq_utils.config import (
+    ConfigLoader, ConfigSnapshot, ConfigWatcher, load_config, parse_duration, read_dotenv
+)
+
+def write(path, text):
+    """Write a file and move its mtime forward so the change is always visible."""
+    path.write_text(text)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_read_dotenv_is_cached_until_the_file_changes(tmp_path):
+    """Test an unchanged file is parsed once and a changed one again."""
+    path = tmp_path / ".env"
+    write(path, "A=1\nB=two\n")
+    first = read_dotenv(path)
+    assert dict(first) == {"A": "1", "B": "two"}
+    assert read_dotenv(path) is first
+
+    write(path, "A=2\n")
+    assert dict(read_dotenv(path)) == {"A": "2"}
+
+def test_read_dotenv_missing_file(tmp_path):
+    """Test a missing file raises ValueError."""
+    with pytest.raises(ValueError):
+        read_dotenv(tmp_path / "missing.env")
+
+def test_layers_merge_in_precedence_order(tmp_path, monkeypatch):
+    """Test later files override earlier ones and the environment overrides both."""
+    write(tmp_path / "base.env", "A=base\nB=base\nC=base\n")
+    write(tmp_path / "local.env", "B=local\nC=local\n")
+    monkeypatch.setenv("C", "environ")
+
+    config = ConfigLoader([tmp_path / "base.env", tmp_path / "missing.env", tmp_path / "local.env"]).load()
+    assert dict(config) == {"A": "base", "B": "local", "C": "environ"}
+    assert len(config.sources) == 2
+
+    files_only = ConfigLoader([tmp_path / "base.env", tmp_path / "local.env"], include_environ=False).load()
+    assert files_only["C"] == "local"
+
+def test_required_files(tmp_path):
+    """Test missing files raise when required."""
+    with pytest.raises(ValueError):
+        ConfigLoader([tmp_path / "missing.env"], required=True).load()
+
+def test_loader_reuses_snapshot_until_something_changes(tmp_path, monkeypatch):
+    """Test the same snapshot is returned until a file or overriding variable changes."""
+    path = tmp_path / ".env"
+    write(path, "RSQ_TEST_A=1\n")
+    monkeypatch.delenv("RSQ_TEST_A", raising=False)
+    loader = ConfigLoader([path])
+    first = loader.load()
+    assert loader.load() is first
+
+    monkeypatch.setenv("RSQ_TEST_A", "2")
+    second = loader.load()
+    assert second is not first and second["RSQ_TEST_A"] == "2"
+
+    write(path, "RSQ_TEST_A=1\nRSQ_TEST_B=3\n")
+    assert loader.load()["RSQ_TEST_B"] == "3"
+
+def test_load_config_is_cached(tmp_path):
+    """Test load_config returns the same snapshot for unchanged files."""
+    write(tmp_path / ".env", "RSQ_TEST_C=1\n")
+    assert load_config(tmp_path / ".env") is load_config(tmp_path / ".env")
+
+def test_typed_accessors():
+    """Test values are converted to int, float, bool, list and duration."""
+    config = ConfigSnapshot({"N": "8", "F": "0.5", "B": "Off", "L": "a, b,,c", "D": "2m30s", "BAD": "x"})
+    assert config.get_int("N") == 8
+    assert config.get_float("F") == 0.5
+    assert config.get_bool("B") is False
+    assert config.get_list("L") == ["a", "b", "c"]
+    assert config.get_list("L", separator=";") == ["a, b,,c"]
+    assert config.get_duration("D") == timedelta(seconds=150)
+    assert config.get_str("N") == "8"
+
+    assert config.get_int("MISSING", 3) == 3
+    assert config.get_list("MISSING", []) == []
+    with pytest.raises(KeyError):
+        config.get_int("MISSING")
+    with pytest.raises(ValueError, match="BAD"):
+        config.get_bool("BAD")
+
+def test_converted_values_are_remembered():
+    """Test each value is converted once and lists are returned as copies."""
+    config = ConfigSnapshot({"L": "a,b"})
+    first = config.get_list("L")
+    first.append("c")
+    assert config.get_list("L") == ["a", "b"]
+    assert config.get_duration("MISSING", timedelta(0)) == timedelta(0)
+
+def test_snapshot_is_immutable():
+    """Test snapshots cannot be modified."""
+    config = ConfigSnapshot({"A": "1"})
+    with pytest.raises(TypeError):
+        config["A"] = "2"
+    with pytest.raises(AttributeError):
+        config.other = 1
+
+def test_parse_duration():
+    """Test durations with and without units."""
+    assert parse_duration("90") == timedelta(seconds=90)
+    assert parse_duration("1.5s") == timedelta(seconds=1.5)
+    assert parse_duration("250ms") == timedelta(milliseconds=250)
+    assert parse_duration("1h 30m") == timedelta(minutes=90)
+    assert parse_duration("2d") == timedelta(days=2)
+    for text in ["", "abc", "5 parsecs", "1h x"]:
+        with pytest.raises(ValueError):
+            parse_duration(text)
+
+def test_watcher_reloads_only_on_change(tmp_path):
+    """Test the watcher reloads and calls back only when a file changes."""
+    path = tmp_path / ".env"
+    write(path, "WORKERS=2\n")
+    changes = []
+    watcher = ConfigWatcher(ConfigLoader([path], include_environ=False), on_change=changes.append)
+    assert watcher.snapshot.get_int("WORKERS") == 2
+    assert not watcher.check()
+
+    write(path, "WORKERS=4\n")
+    assert watcher.check()
+    assert not watcher.check()
+    assert watcher.snapshot.get_int("WORKERS") == 4
+    assert [snapshot.get_int("WORKERS") for snapshot in changes] == [4]
+
+def test_watcher_thread(tmp_path):
+    """Test the polling thread picks up changes and stops cleanly."""
+    path = tmp_path / ".env"
+    write(path, "WORKERS=2\n")
+    watcher = ConfigWatcher(ConfigLoader([path], include_environ=False), interval=0.01)
+    with watcher:
+        assert watcher.is_running
+        write(path, "WORKERS=3\n")
+        deadline = time.monotonic() + 2.0
+        while watcher.reload_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert not watcher.is_running
+    assert watcher.snapshot["WORKERS"] == "3"
@@ -0,0 +1,159 @@
+"""Tests for disk spill utilities."""
+import numpy as np
+import pandas as pd
+import pytest
+from src.rsq_utils.disk_spill import (
+    DiskSpillTier,
+    SpillingCache,
+    read_pickle_out_of_band,
+    write_pickle_out_of_band,
+)
+
+@pytest.fixture
+def tier(tmp_path):
+    """Create a spill tier in a temporary directory."""
+    spill_tier = DiskSpillTier(directory=tmp_path / "spill", max_bytes=1024 ** 2)
+    yield spill_tier
+    spill_tier.close()
+
+def test_pickle_out_of_band_round_trip(tmp_path):
+    """Test protocol 5 files rebuild values with their buffers."""
+    df = pd.DataFrame({"numbers": np.arange(100), "labels": ["a"] * 100})
+    path = tmp_path / "value.pkl"
+
+    write_pickle_out_of_band(path, {"df": df, "array": np.arange(10.0)})
+    loaded = read_pickle_out_of_band(path)
+
+    pd.testing.assert_frame_equal(loaded["df"], df)
+    np.testing.assert_array_equal(loaded["array"], np.arange(10.0))
+
+def test_pickle_out_of_band_is_writable(tmp_path):
+    """Test reloaded arrays are writable without modifying the file."""
+    path = tmp_path / "value.pkl"
+    write_pickle_out_of_band(path, np.arange(10))
+
+    loaded = read_pickle_out_of_band(path)
+    loaded[0] = 100
+
+    assert read_pickle_out_of_band(path)[0] == 0
+
+def test_tier_arrays_are_memory_mapped(tier):
+    """Test arrays are written as .npy files and reloaded with mmap_mode."""
+    assert tier.put("array", np.arange(10.0)) is True
+
+    loaded = tier.get("array")
+    assert isinstance(loaded, np.memmap)
+    np.testing.assert_array_equal(loaded, np.arange(10.0))
+    assert len(list(tier.directory.glob("*.npy"))) == 1
+
+def test_tier_objects_are_pickled(tier):
+    """Test other values are pickled."""
+    tier.put("nested", {"a": [1, 2, 3]})
+
+    assert tier.get("nested") == {"a": [1, 2, 3]}
+    assert len(list(tier.directory.glob("*.pkl"))) == 1
+
+def test_tier_pop_removes_file(tier):
+    """Test popping returns the value and deletes it from disk."""
+    tier.put("array", np.arange(5))
+    value = tier.pop("array")
+
+    np.testing.assert_array_equal(value, np.arange(5))
+    assert "array" not in tier
+    assert tier.size_bytes == 0
+    assert list(tier.directory.iterdir()) == []
+
+def test_tier_missing_key(tier):
+    """Test reading a missing key raises KeyError."""
+    with pytest.raises(KeyError):
+        tier.get("missing")
+
+def test_tier_evicts_least_recently_used(tmp_path):
+    """Test the tier deletes its least recently used entries past max_bytes."""
+    spill_tier = DiskSpillTier(directory=tmp_path, max_bytes=2500)
+    spill_tier.put("first", np.zeros(100))
+    spill_tier.put("second", np.zeros(100))
+    spill_tier.get("first")
+    spill_tier.put("third", np.zeros(100))
+
+    assert spill_tier.keys() == ["first", "third"]
+    assert spill_tier.size_bytes <= 2500
+
+def test_tier_rejects_oversized_value(tmp_path):
+    """Test a value larger than max_bytes is not stored."""
+    spill_tier = DiskSpillTier(directory=tmp_path, max_bytes=100)
+
+    assert spill_tier.put("big", np.zeros(1000)) is False
+    assert len(spill_tier) == 0
+
+def test_tier_invalid_max_bytes():
+    """Test invalid size limits are rejected."""
+    with pytest.raises(ValueError, match="max_bytes must be at least 1"):
+        DiskSpillTier(max_bytes=0)
+
+def test_tier_close_removes_owned_directory():
+    """Test closing a tier removes the temporary directory it created."""
+    spill_tier = DiskSpillTier()
+    spill_tier.put("value", 1)
+    spill_tier.close()
+
+    assert not spill_tier.directory.exists()
+
+def test_spilling_cache_spills_least_recently_used(tier):
+    """Test values past the memory limit are spilled, oldest first."""
+    cache = SpillingCache({"a": 1, "b": 2, "c": 3}, max_memory_entries=2, spill_tier=tier)
+
+    assert list(cache.keys()) == ["b", "c"]
+    assert cache.spilled_keys() == ["a"]
+    assert "a" in cache
+
+def test_spilling_cache_promotes_on_access(tier):
+    """Test reading a spilled key moves it back into memory."""
+    cache = SpillingCache({"a": [1, 2], "b": 2}, max_memory_entries=1, spill_tier=tier)
+
+    assert cache["a"] == [1, 2]
+    assert list(cache.keys()) == ["a"]
+    assert cache.spilled_keys() == ["b"]
+    assert cache.get("b") == 2
+    assert cache.get("missing") is None
+    with pytest.raises(KeyError):
+        cache["missing"]
+
+def test_spilling_cache_access_refreshes_recency(tier):
+    """Test reading an in-memory key protects it from the next spill."""
+    cache = SpillingCache({"a": 1, "b": 2}, max_memory_entries=2, spill_tier=tier)
+    cache["a"]
+    cache.update_variables({"c": 3})
+
+    assert cache.spilled_keys() == ["b"]
+
+def test_spilling_cache_update_replaces_spilled_value(tier):
+    """Test updating a spilled key discards the stale copy on disk."""
+    cache = SpillingCache({"a": 1, "b": 2}, max_memory_entries=1, spill_tier=tier)
+    cache.update_variables({"a": 10})
+
+    assert cache["a"] == 10
+    assert cache.spilled_keys() == ["b"]
+
+def test_spilling_cache_setitem(tier):
+    """Test direct assignment respects the memory limit."""
+    cache = SpillingCache(max_memory_entries=1, spill_tier=tier)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    assert list(cache.keys()) == ["b"]
+    assert cache.spilled_keys() == ["a"]
+
+def test_spilling_cache_manual_spill(tier):
+    """Test spilling on demand, for example from a memory-pressure callback."""
+    df = pd.DataFrame({"numbers": np.arange(10)})
+    cache = SpillingCache({"df": df, "array": np.arange(3)}, spill_tier=tier)
+
+    assert cache.spill(2) == ["df", "array"]
+    assert len(cache) == 0
+    pd.testing.assert_frame_equal(cache["df"], df)
+
+def test_spilling_cache_invalid_limit():
+    """Test invalid memory limits are rejected."""
+    with pytest.raises(ValueError, match="max_memory_entries must be at least 1"):
+        SpillingCache(max_memory_entries=0)
@@ -0,0 +1,215 @@
+"""Tests for fetch utilities."""
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from src.rsq_utils.fetch import FetchEngine, RetryPolicy
+from src.rsq_utils.parameter_space import ParameterSpace
+from src.rsq_utils.rate_limit import HostRateLimiter
+from src.rsq_utils.url import url_encode
+
+NO_BACKOFF = RetryPolicy(max_attempts=3, backoff_seconds=0.0, jitter=0.0)
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local stand-in API: /echo, /status/<code>, /flaky/<key>, /drop and /slow."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        """Serve a response based on the path."""
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.ports.add(self.client_address[1])
+        try:
+            parts = urlsplit(self.path)
+            if parts.path.startswith("/status/"):
+                self.respond(int(parts.path.rsplit("/", 1)[1]), b"status")
+            elif parts.path.startswith("/flaky/"):
+                with server.lock:
+                    server.calls[parts.path] = server.calls.get(parts.path, 0) + 1
+                    calls = server.calls[parts.path]
+                self.respond(503 if calls < 3 else 200, f"call {calls}".encode())
+            elif parts.path == "/drop":
+                self.respond(200, b"dropped")
+                self.close_connection = True
+            elif parts.path == "/slow":
+                threading.Event().wait(0.05)
+                self.respond(200, b"slow")
+            else:
+                query = parse_qs(parts.query)
+                self.respond(200, repr(sorted(query.items())).encode())
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def respond(self, status, body):
+        """Send a keep-alive response."""
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+@pytest.fixture
+def server():
+    """Run the stand-in API on a free local port."""
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    http_server.daemon_threads = True
+    http_server.lock = threading.Lock()
+    http_server.active = http_server.max_active = 0
+    http_server.ports = set()
+    http_server.calls = {}
+    thread = threading.Thread(target=http_server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    http_server.base_url = f"http://127.0.0.1:{http_server.server_address[1]}"
+    yield http_server
+    http_server.shutdown()
+    http_server.server_close()
+
+def test_fetch_single_url(server):
+    """Test a single fetch returns status, headers and body."""
+    with FetchEngine(retry=NO_BACKOFF) as engine:
+        result = engine.fetch(f"{server.base_url}/echo?a=1")
+
+    assert result.ok
+    assert result.status == 200
+    assert result.body == b"[('a', ['1'])]"
+    assert result.headers["content-length"] == str(len(result.body))
+    assert result.attempts == 1
+
+def test_fetch_many_streams_every_url(server):
+    """Test every URL is fetched once and results carry their input index."""
+    urls = [f"{server.base_url}/echo?i={i}" for i in range(50)]
+    with FetchEngine(max_workers=8, retry=NO_BACKOFF) as engine:
+        results = list(engine.fetch_many(urls))
+
+    assert sorted(result.index for result in results) == list(range(50))
+    assert all(result.ok and result.url == urls[result.index] for result in results)
+
+def test_connections_are_kept_alive(server):
+    """Test sequential requests reuse pooled connections."""
+    with FetchEngine(max_workers=2, max_connections_per_host=2, retry=NO_BACKOFF) as engine:
+        list(engine.fetch_many(f"{server.base_url}/echo?i={i}" for i in range(40)))
+        assert engine.pool.connections_created <= 2
+    assert len(server.ports) <= 2
+
+def test_stale_keep_alive_connection_is_replaced(server):
+    """Test a pooled connection closed by the server is replaced without a retry."""
+    with FetchEngine(max_workers=1, max_connections_per_host=1, retry=NO_BACKOFF) as engine:
+        first = engine.fetch(f"{server.base_url}/drop")
+        threading.Event().wait(0.05)
+        second = engine.fetch(f"{server.base_url}/echo")
+
+    assert first.ok and second.ok
+    assert second.attempts == 1
+    assert engine.pool.connections_created == 1
+
+def test_concurrency_is_bounded_per_host(server):
+    """Test no more than max_connections_per_host requests run at once."""
+    with FetchEngine(max_workers=16, max_connections_per_host=3, retry=NO_BACKOFF) as engine:
+        list(engine.fetch_many(f"{server.base_url}/slow" for _ in range(20)))
+    assert server.max_active <= 3
+
+def test_retries_with_backoff(server):
+    """Test retryable statuses are retried until they succeed or attempts run out."""
+    with FetchEngine(retry=NO_BACKOFF) as engine:
+        flaky = engine.fetch(f"{server.base_url}/flaky/a")
+        failing = engine.fetch(f"{server.base_url}/status/500")
+        not_retried = engine.fetch(f"{server.base_url}/status/404")
+
+    assert flaky.ok and flaky.attempts == 3 and flaky.body == b"call 3"
+    assert failing.status == 500 and failing.attempts == 3
+    assert not_retried.status == 404 and not_retried.attempts == 1
+
+def test_connection_errors_are_reported(server):
+    """Test unreachable hosts produce a result with the error instead of raising."""
+    server.shutdown()
+    server.server_close()
+    with FetchEngine(retry=RetryPolicy(max_attempts=2, backoff_seconds=0.0), timeout=1.0) as engine:
+        result = engine.fetch(f"{server.base_url}/echo")
+
+    assert not result.ok
+    assert result.status is None
+    assert isinstance(result.error, OSError)
+    assert result.attempts == 2
+
+def test_invalid_url():
+    """Test unsupported URLs are reported without a request."""
+    with FetchEngine() as engine:
+        result = engine.fetch("ftp://example.com/file")
+    assert isinstance(result.error, ValueError)
+
+def test_fetch_combos(server):
+    """Test combos are fetched with url_encode URLs and reported with their params."""
+    space = ParameterSpace({"q": ["a b", "c"], "page": [1, 2]})
+    with FetchEngine(retry=NO_BACKOFF) as engine:
+        results = sorted(engine.fetch_combos(f"{server.base_url}/echo", space), key=lambda result: result.index)
+
+    assert [result.params for result in results] == list(space)
+    assert [result.url for result in results] == [url_encode(f"{server.base_url}/echo", combo) for combo in space]
+    assert results[0].body == b"[('page', ['1']), ('q', ['a b'])]"
+
+def test_fetch_many_consumes_input_lazily(server):
+    """Test at most max_in_flight URLs are taken from the input ahead of the consumer."""
+    taken = []
+
+    def urls():
+        for i in range(100):
+            taken.append(i)
+            yield f"{server.base_url}/echo?i={i}"
+
+    with FetchEngine(max_workers=2, max_in_flight=4, retry=NO_BACKOFF) as engine:
+        results = engine.fetch_many(urls())
+        next(results)
+        assert len(taken) <= 5
+        results.close()
+
+def test_fetch_many_async(server):
+    """Test the asyncio interface streams every result."""
+    async def collect(engine):
+        return [result async for result in engine.fetch_many_async(f"{server.base_url}/echo?i={i}" for i in range(20))]
+
+    with FetchEngine(max_workers=4, max_in_flight=6, retry=NO_BACKOFF) as engine:
+        results = asyncio.run(collect(engine))
+
+    assert sorted(result.index for result in results) == list(range(20))
+    assert all(result.ok for result in results)
+
+def test_retry_after_header_overrides_backoff():
+    """Test Retry-After seconds are used and capped."""
+    policy = RetryPolicy(backoff_seconds=10.0, max_backoff_seconds=5.0, jitter=0.0)
+    assert policy.get_delay(1, "2") == 2.0
+    assert policy.get_delay(1, "60") == 5.0
+    assert policy.get_delay(1) == 5.0
+    assert RetryPolicy(backoff_seconds=1.0, jitter=0.0).get_delay(3) == 4.0
+
+def test_fetch_respects_rate_limiter(server):
+    """Test every attempt takes a token from the host's bucket."""
+    limiter = HostRateLimiter(rate=1000, host_limits={"127.0.0.1": (50, 1)})
+    with FetchEngine(max_workers=4, retry=NO_BACKOFF, rate_limiter=limiter) as engine:
+        results = list(engine.fetch_many(f"{server.base_url}/echo?i={i}" for i in range(6)))
+
+    assert all(result.ok for result in results)
+    assert limiter.get_bucket("127.0.0.1").total_acquired == 6
+def test_throttled_host_does_not_block_other_hosts(server):
+    """Test requests waiting on a throttled host hold no worker, so another host is fetched meanwhile."""
+    port = server.server_address[1]
+    limiter = HostRateLimiter(rate=1000, host_limits={"127.0.0.1": (4, 1)})
+    urls = [url for i in range(4)
+            for url in (f"http://127.0.0.1:{port}/echo?i={i}", f"http://localhost:{port}/echo?i={i}")]
+    start = time.monotonic()
+    arrivals = {}
+    with FetchEngine(max_workers=2, retry=NO_BACKOFF, rate_limiter=limiter) as engine:
+        for result in engine.fetch_many(urls):
+            arrivals[result.url] = time.monotonic() - start
+
+    assert len(arrivals) == 8
+    assert max(elapsed for url, elapsed in arrivals.items() if "localhost" in url) < 0.3
+    assert max(elapsed for url, elapsed in arrivals.items() if "127.0.0.1" in url) >= 0.7
+    assert limiter.get_bucket("127.0.0.1").total_acquired == 4
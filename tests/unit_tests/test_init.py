@@ -0,0 +1,40 @@
+"""Tests for the package's lazy exports."""
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import src.rsq_utils as rsq_utils
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = {"pandas", "numpy", "psutil", "dotenv"}
+
+def imported_modules(code):
+    """Run code in a fresh interpreter and return the names in its sys.modules afterwards."""
+    completed = subprocess.run(
+        [sys.executable, "-c", f"{code}; import sys; print(chr(10).join(sys.modules))"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    return set(completed.stdout.split())
+
+def test_import_does_not_load_heavy_dependencies():
+    """Test importing the package and light helpers loads no heavy dependencies."""
+    modules = imported_modules("import src.rsq_utils as r; r.camel_to_snake; r.today; r.url_encode; r.Variables; r.Memory")
+    assert "src.rsq_utils" in modules
+    assert HEAVY_MODULES.isdisjoint(modules)
+
+def test_heavy_dependencies_load_on_demand():
+    """Test names that need a heavy dependency still load it when accessed."""
+    modules = imported_modules("import src.rsq_utils as r; r.MemorySampler; r.load_dotenv")
+    assert {"pandas", "numpy", "dotenv"} <= modules
+
+def test_all_names_resolve():
+    """Test every name in __all__ is exported and listed by dir()."""
+    assert len(rsq_utils.__all__) == len(set(rsq_utils.__all__))
+    for name in rsq_utils.__all__:
+        assert getattr(rsq_utils, name) is not None
+    assert set(rsq_utils.__all__) <= set(dir(rsq_utils))
+
+def test_unknown_attribute():
+    """Test unknown names raise AttributeError."""
+    with pytest.raises(AttributeError, match="not_a_name"):
+        rsq_utils.not_a_name
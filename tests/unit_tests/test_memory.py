@@ -1,6 +1,7 @@
 """Tests for memory utilities."""
 import pytest
-from src.rsq_utils.memory import Memory
+from unittest.mock import Mock
+from src.rsq_utils.memory import Memory, MemorySample
 
 def test_memory_initialization():
     """Test Memory class initialization."""
@@ -78,3 +79,36 @@ def test_memory_error_handling():
     memory.get_current_memory()
     memory.append_memory_history()
     memory.reset_memory_data()
+
+def test_memory_sample_format():
+    """Test samples are compact tuples in MemoryData key order."""
+    memory = Memory()
+    sample = memory.sample()
+
+    assert isinstance(sample, MemorySample)
+    assert len(sample) == 5
+    assert list(sample.to_memory_data().keys()) == list(memory.get_current_memory().keys())
+    assert 0 <= sample.system_memory_used_percent <= 100
+    assert sample.process_memory_used_gb > 0
+
+def test_memory_sample_proc_matches_psutil():
+    """Test the /proc fast path agrees with psutil."""
+    fast = Memory(use_proc=True).sample()
+    fallback = Memory(use_proc=False).sample()
+
+    assert fast.system_memory_total_gb == pytest.approx(fallback.system_memory_total_gb)
+    assert fast.system_memory_available_gb == pytest.approx(fallback.system_memory_available_gb, rel=0.05)
+    assert fast.process_memory_used_gb == pytest.approx(fallback.process_memory_used_gb, rel=0.05)
+
+def test_memory_sample_falls_back_to_psutil():
+    """Test a failing /proc read switches to psutil."""
+    memory = Memory()
+    failing_reader = Mock()
+    failing_reader.read.side_effect = OSError("unavailable")
+    memory._proc_reader = failing_reader
+
+    sample = memory.sample()
+
+    assert isinstance(sample, MemorySample)
+    assert memory._proc_reader is None
+    failing_reader.close.assert_called_once()
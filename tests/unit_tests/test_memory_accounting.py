@@ -0,0 +1,157 @@
+"""Tests for memory accounting utilities."""
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from src.rsq_utils.memory_accounting import MemoryAccountant, deep_sizeof
+from src.rsq_utils.variables import Cache, Variables
+
+def test_deep_sizeof_fast_paths():
+    """Test numpy arrays, DataFrames and strings use their native sizes."""
+    array = np.zeros(1000)
+    df = pd.DataFrame({"numbers": np.arange(100), "strings": ["text"] * 100})
+
+    assert deep_sizeof(array) == sys.getsizeof(array)
+    assert deep_sizeof(array) >= array.nbytes
+    assert deep_sizeof(df) == int(df.memory_usage(index=True, deep=True).sum())
+    assert deep_sizeof("a" * 1000) == sys.getsizeof("a" * 1000)
+
+def test_deep_sizeof_containers():
+    """Test containers include the size of their contents."""
+    inner = [0.5] * 100
+    nested = {"inner": inner}
+
+    assert deep_sizeof(nested) > sys.getsizeof(nested) + sys.getsizeof(inner)
+
+def test_deep_sizeof_counts_shared_objects_once():
+    """Test an object referenced twice is only counted once."""
+    shared = list(range(1000))
+    assert deep_sizeof([shared, shared]) < 2 * deep_sizeof(shared)
+
+def test_deep_sizeof_cycles():
+    """Test self-referencing structures terminate."""
+    cycle = [1]
+    cycle.append(cycle)
+    assert deep_sizeof(cycle) > 0
+
+def test_deep_sizeof_objects_and_slots():
+    """Test object attributes and slots are walked."""
+    class WithSlots:
+        __slots__ = ("values",)
+
+        def __init__(self):
+            self.values = list(range(100))
+
+    class WithDict:
+        def __init__(self):
+            self.values = list(range(100))
+
+    assert deep_sizeof(WithSlots()) > deep_sizeof(list(range(100)))
+    assert deep_sizeof(WithDict()) > deep_sizeof(list(range(100)))
+
+def test_deep_sizeof_skips_modules():
+    """Test modules are treated as shared state."""
+    assert deep_sizeof({"np": np}) < 1000
+
+def test_accountant_invalid_arguments():
+    """Test invalid budgets and policies are rejected."""
+    with pytest.raises(ValueError, match="max_bytes"):
+        MemoryAccountant(max_bytes=-1)
+    with pytest.raises(ValueError, match="policy"):
+        MemoryAccountant(policy="drop")
+
+def test_accountant_tracks_and_forgets():
+    """Test sizes are tracked per key and totalled."""
+    accountant = MemoryAccountant()
+    size = accountant.track("array", np.zeros(100))
+
+    assert accountant.get_sizes() == {"array": size}
+    assert accountant.total_bytes == size
+
+    accountant.forget("array")
+    accountant.forget("missing")
+    assert accountant.total_bytes == 0
+
+def test_accountant_refresh_after_mutation():
+    """Test in-place mutation is picked up by refresh."""
+    accountant = MemoryAccountant()
+    values = [1]
+    before = accountant.track("values", values)
+    values.extend(range(1000))
+
+    assert accountant.get_sizes()["values"] == before
+    assert accountant.refresh("values") > before
+
+def test_variables_memory_usage_without_accountant():
+    """Test per-key sizes are measured on demand without an accountant."""
+    variables = Variables({"small": 1, "large": np.zeros(10_000)})
+    usage = variables.get_memory_usage()
+
+    assert set(usage) == {"small", "large"}
+    assert usage["large"] > usage["small"]
+    assert variables.get_largest_variables(1) == [("large", usage["large"])]
+
+def test_variables_incremental_tracking():
+    """Test updates only measure the new values and totals stay consistent."""
+    accountant = MemoryAccountant()
+    variables = Variables({"a": np.zeros(100)}, memory_accountant=accountant)
+    variables.update_variables({"b": np.zeros(200)})
+
+    sizes = accountant.get_sizes()
+    assert set(sizes) == {"a", "b"}
+    assert accountant.total_bytes == sum(sizes.values())
+    assert variables.get_memory_usage() == sizes
+
+def test_variables_reconcile_direct_changes():
+    """Test keys assigned or deleted directly are picked up on the next read."""
+    accountant = MemoryAccountant()
+    variables = Variables({"a": 1, "b": 2}, memory_accountant=accountant)
+    variables["c"] = np.zeros(100)
+    del variables["a"]
+
+    assert set(variables.get_memory_usage()) == {"b", "c"}
+
+def test_variables_budget_reject():
+    """Test the reject policy raises and leaves the variables unchanged."""
+    accountant = MemoryAccountant(max_bytes=10_000, policy="reject")
+    variables = Variables({"a": np.zeros(500)}, memory_accountant=accountant)
+
+    with pytest.raises(ValueError, match="exceed the memory budget"):
+        variables.update_variables({"b": np.zeros(1000)})
+    assert list(variables.keys()) == ["a"]
+
+def test_variables_budget_evict():
+    """Test the evict policy removes the oldest other keys to make room."""
+    accountant = MemoryAccountant(max_bytes=20_000, policy="evict")
+    cache = Cache({"first": np.zeros(1000), "second": np.zeros(1000)}, memory_accountant=accountant)
+    cache.update_variables({"third": np.zeros(1000)})
+
+    assert list(cache.keys()) == ["second", "third"]
+    assert accountant.total_bytes <= 20_000
+
+def test_variables_budget_replacing_key_frees_its_size():
+    """Test replacing a key counts only the new value against the budget."""
+    accountant = MemoryAccountant(max_bytes=10_000, policy="reject")
+    variables = Variables({"a": np.zeros(1000)}, memory_accountant=accountant)
+    variables.update_variables({"a": np.zeros(1000)})
+
+    assert list(variables.keys()) == ["a"]
+
+def test_variables_copy_keeps_the_budget():
+    """Test a copy of budgeted variables gets its own accountant with the same budget."""
+    accountant = MemoryAccountant(max_bytes=20_000, policy="evict")
+    cache = Cache({"first": np.zeros(1000), "second": np.zeros(1000)}, memory_accountant=accountant)
+    copied = cache.copy_variables()
+    copied.update_variables({"third": np.zeros(1000)})
+
+    assert copied.memory_accountant is not accountant
+    assert (copied.memory_accountant.max_bytes, copied.memory_accountant.policy) == (20_000, "evict")
+    assert list(copied.keys()) == ["second", "third"]
+    assert list(cache.keys()) == ["first", "second"]
+    assert accountant.total_bytes == copied.memory_accountant.total_bytes
+
+def test_variables_budget_value_too_large():
+    """Test a single value larger than the budget is rejected even when evicting."""
+    accountant = MemoryAccountant(max_bytes=1000, policy="evict")
+    with pytest.raises(ValueError, match="does not fit"):
+        Variables({"big": np.zeros(1000)}, memory_accountant=accountant)
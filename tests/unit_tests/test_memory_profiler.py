@@ -0,0 +1,170 @@
+"""Tests for memory profiler utilities."""
+import threading
+import time
+import tracemalloc
+from unittest.mock import Mock
+import pytest
+from src.rsq_utils.memory import MemorySample
+from src.rsq_utils import memory_profiler
+from src.rsq_utils.memory_profiler import MemoryProfile, MemoryProfiler, profile_memory
+
+def make_memory(rss_values):
+    """Build a Memory mock returning the given RSS values, repeating the last one."""
+    memory = Mock()
+    values = list(rss_values)
+
+    def sample():
+        value = values.pop(0) if len(values) > 1 else values[0]
+        return MemorySample(16.0, 8.0, 8.0, 50.0, value)
+
+    memory.sample.side_effect = sample
+    return memory
+
+def test_sampling_records_peak_between_start_and_end():
+    """Test a short spike seen by the sampler is reported as the peak."""
+    memory = make_memory([1.0, 3.0, 1.5])
+    with MemoryProfiler("spike", interval=0.001, memory=memory) as profiler:
+        time.sleep(0.05)
+
+    profile = profiler.profile
+    assert profile.label == "spike"
+    assert profile.start_rss_gb == 1.0
+    assert profile.peak_rss_gb == 3.0
+    assert profile.end_rss_gb == 1.5
+    assert profile.peak_growth_gb == 2.0
+    assert profile.sample_count >= 1
+    assert profile.duration_seconds > 0
+
+def test_peak_includes_end_rss():
+    """Test the end sample counts towards the peak."""
+    memory = make_memory([1.0, 2.0])
+    with MemoryProfiler(mode="high_water_mark", memory=memory) as profiler:
+        pass
+
+    assert profiler.profile.peak_rss_gb >= 2.0
+
+def test_high_water_mark_mode_sees_real_allocation():
+    """Test a real allocation shows up in the high water mark."""
+    with MemoryProfiler(mode="high_water_mark") as profiler:
+        data = bytearray(64 * 1024 ** 2)
+        del data
+
+    profile = profiler.profile
+    assert profile.sample_count == 0
+    assert profile.peak_rss_gb >= profile.start_rss_gb
+
+def test_trace_allocations_reports_sites():
+    """Test allocation sites are reported by file and line."""
+    with MemoryProfiler(mode="high_water_mark", trace_allocations=True, top_allocations=3) as profiler:
+        kept = [bytes(1024) for _ in range(1000)]
+
+    sites = profiler.profile.allocation_sites
+    assert 0 < len(sites) <= 3
+    assert sites[0].filename == "test_memory_profiler.py"
+    assert sites[0].size_bytes >= 1000 * 1024
+    assert sites == sorted(sites, key=lambda site: site.size_bytes, reverse=True)
+    assert profiler.profile.traced_peak_bytes >= 1000 * 1024
+    assert not tracemalloc.is_tracing()
+    del kept
+
+def test_trace_allocations_leaves_existing_tracing_running():
+    """Test tracing started elsewhere is not stopped by the profiler."""
+    tracemalloc.start()
+    try:
+        with MemoryProfiler(mode="high_water_mark", trace_allocations=True):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+def test_decorator_profiles_each_call():
+    """Test the decorator records one profile per call and passes through results."""
+    finished = []
+    profiler = profile_memory("add", mode="high_water_mark", on_exit=finished.append)
+
+    @profiler
+    def add(a, b):
+        return a + b
+
+    assert add(1, 2) == 3
+    assert add(2, 3) == 5
+    assert len(profiler.profiles) == 2
+    assert finished == list(profiler.profiles)
+    assert all(isinstance(profile, MemoryProfile) for profile in finished)
+
+def test_decorator_recursion_profiles_outer_call_only():
+    """Test recursive calls do not re-enter the profiler."""
+    profiler = MemoryProfiler(mode="high_water_mark")
+
+    @profiler
+    def countdown(n):
+        return 0 if n == 0 else countdown(n - 1)
+
+    countdown(3)
+    assert len(profiler.profiles) == 1
+
+def test_profile_recorded_when_block_raises():
+    """Test an exception inside the block still produces a profile."""
+    profiler = MemoryProfiler(interval=0.001)
+    with pytest.raises(KeyError):
+        with profiler:
+            raise KeyError("boom")
+
+    assert len(profiler.profiles) == 1
+    assert profiler.profile.end_rss_gb > 0
+
+def test_profiler_is_not_reentrant():
+    """Test entering an active profiler raises."""
+    profiler = MemoryProfiler(mode="high_water_mark")
+    with profiler:
+        with pytest.raises(RuntimeError):
+            profiler.__enter__()
+
+def test_peak_counter_is_reset_only_when_asked(monkeypatch):
+    """Test the process-wide peak RSS counter is left alone unless reset_peak is set."""
+    resets = []
+    monkeypatch.setattr(memory_profiler, "_reset_high_water_mark", lambda: resets.append(1) or True)
+    with MemoryProfiler(mode="high_water_mark"):
+        pass
+    assert resets == []
+    with MemoryProfiler(mode="high_water_mark", reset_peak=True) as profiler:
+        pass
+    assert resets == [1]
+    assert profiler.profile.peak_rss_gb >= profiler.profile.start_rss_gb
+
+def test_concurrent_calls_profile_one_at_a_time():
+    """Test a call from another thread while a profile is running runs unprofiled instead of racing."""
+    profiler = MemoryProfiler(mode="high_water_mark")
+    started, release, already_set = threading.Event(), threading.Event(), threading.Event()
+    already_set.set()
+
+    @profiler
+    def work(event):
+        started.set()
+        return event.wait(5)
+
+    first = threading.Thread(target=work, args=(release,))
+    first.start()
+    started.wait(5)
+    with pytest.raises(RuntimeError):
+        profiler.__enter__()
+    assert work(already_set) is True
+    release.set()
+    first.join()
+
+    assert len(profiler.profiles) == 1
+
+def test_format():
+    """Test the report mentions the label and peak."""
+    with MemoryProfiler("stage", mode="high_water_mark") as profiler:
+        pass
+
+    report = profiler.profile.format()
+    assert report.startswith("stage: peak")
+
+def test_invalid_arguments():
+    """Test invalid modes and intervals are rejected."""
+    with pytest.raises(ValueError):
+        MemoryProfiler(mode="unknown")
+    with pytest.raises(ValueError):
+        MemoryProfiler(interval=0)
@@ -0,0 +1,97 @@
+"""Tests for memory sampler utilities."""
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from src.rsq_utils.memory_sampler import MEMORY_METRICS, MemoryRingBuffer, MemorySampler
+
+def test_ring_buffer_append_and_export():
+    """Test samples are exported in chronological order."""
+    ring_buffer = MemoryRingBuffer(capacity=3, metrics=("a", "b"))
+    ring_buffer.append(1.0, (10.0, 20.0))
+    ring_buffer.append(2.0, (11.0, 21.0))
+
+    arrays = ring_buffer.to_arrays()
+    assert len(ring_buffer) == 2
+    np.testing.assert_array_equal(arrays["timestamp"], [1.0, 2.0])
+    np.testing.assert_array_equal(arrays["a"], [10.0, 11.0])
+    np.testing.assert_array_equal(arrays["b"], [20.0, 21.0])
+
+def test_ring_buffer_overwrites_oldest():
+    """Test a full buffer overwrites its oldest samples."""
+    ring_buffer = MemoryRingBuffer(capacity=3, metrics=("a",))
+    for value in range(5):
+        ring_buffer.append(float(value), (float(value),))
+
+    assert len(ring_buffer) == 3
+    np.testing.assert_array_equal(ring_buffer.to_arrays()["a"], [2.0, 3.0, 4.0])
+
+def test_ring_buffer_preallocated():
+    """Test appending does not replace the underlying arrays."""
+    ring_buffer = MemoryRingBuffer(capacity=2, metrics=("a",))
+    column = ring_buffer.values["a"]
+    for value in range(10):
+        ring_buffer.append(float(value), (float(value),))
+
+    assert ring_buffer.values["a"] is column
+
+def test_ring_buffer_clear():
+    """Test clearing discards every sample."""
+    ring_buffer = MemoryRingBuffer(capacity=2, metrics=("a",))
+    ring_buffer.append(1.0, (1.0,))
+    ring_buffer.clear()
+
+    assert len(ring_buffer) == 0
+    assert len(ring_buffer.to_arrays()["a"]) == 0
+
+def test_ring_buffer_to_dataframe():
+    """Test exporting samples as a time-indexed DataFrame."""
+    ring_buffer = MemoryRingBuffer(capacity=2, metrics=("a",))
+    ring_buffer.append(0.0, (1.0,))
+
+    df = ring_buffer.to_dataframe()
+    assert list(df.columns) == ["a"]
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert df.index[0] == pd.Timestamp("1970-01-01")
+
+def test_ring_buffer_invalid_capacity():
+    """Test invalid capacities are rejected."""
+    with pytest.raises(ValueError, match="capacity must be at least 1"):
+        MemoryRingBuffer(capacity=0)
+
+def test_sampler_sample_once():
+    """Test a manual sample records every memory metric."""
+    sampler = MemorySampler(capacity=10)
+    sampler.sample_once()
+
+    arrays = sampler.buffer.to_arrays()
+    assert len(sampler.buffer) == 1
+    for metric in MEMORY_METRICS:
+        assert not np.isnan(arrays[metric][0])
+
+def test_sampler_background_thread():
+    """Test the background thread samples until stopped."""
+    with MemorySampler(interval=0.01, capacity=1000) as sampler:
+        assert sampler.is_running is True
+        time.sleep(0.1)
+
+    assert sampler.is_running is False
+    count = len(sampler.buffer)
+    assert count >= 2
+    time.sleep(0.05)
+    assert len(sampler.buffer) == count
+
+def test_sampler_start_twice():
+    """Test starting a running sampler raises an error."""
+    sampler = MemorySampler(interval=0.01)
+    sampler.start()
+    try:
+        with pytest.raises(RuntimeError, match="already running"):
+            sampler.start()
+    finally:
+        sampler.stop()
+
+def test_sampler_invalid_interval():
+    """Test invalid intervals are rejected."""
+    with pytest.raises(ValueError, match="interval must be positive"):
+        MemorySampler(interval=0)
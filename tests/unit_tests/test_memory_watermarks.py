@@ -0,0 +1,108 @@
+"""Tests for memory watermark utilities."""
+import threading
+from unittest.mock import Mock
+import pytest
+from src.rsq_utils.memory import MemorySample
+from src.rsq_utils.memory_watermarks import MemoryPressureMonitor, MemoryWatermark
+
+def make_memory(values, metric="rss"):
+    """Build a Memory mock returning the given RSS or available values in turn."""
+    memory = Mock()
+    remaining = list(values)
+
+    def sample():
+        value = remaining.pop(0) if len(remaining) > 1 else remaining[0]
+        if metric == "rss":
+            return MemorySample(16.0, 8.0, 8.0, 50.0, value)
+        return MemorySample(16.0, 16.0 - value, value, 50.0, 1.0)
+
+    memory.sample.side_effect = sample
+    return memory
+
+def test_rss_watermark_hysteresis():
+    """Test RSS pressure starts at high and is only released at low."""
+    watermark = MemoryWatermark("rss", "process_rss_gb", low_gb=4.0, high_gb=8.0)
+    assert watermark.evaluate(7.0) is None
+    assert watermark.evaluate(8.0) is True
+    assert watermark.evaluate(9.0) is None
+    assert watermark.evaluate(6.0) is None
+    assert watermark.evaluate(4.0) is False
+    assert watermark.evaluate(7.0) is None
+
+def test_available_watermark_hysteresis():
+    """Test available memory pressure starts at low and is released at high."""
+    watermark = MemoryWatermark("system", "system_available_gb", low_gb=1.0, high_gb=2.0)
+    assert watermark.evaluate(1.5) is None
+    assert watermark.evaluate(0.9) is True
+    assert watermark.evaluate(1.5) is None
+    assert watermark.evaluate(2.5) is False
+
+def test_check_runs_callbacks_on_transitions():
+    """Test callbacks run once per crossing, not on every check."""
+    pressure, release = [], []
+    monitor = MemoryPressureMonitor(memory=make_memory([5.0, 9.0, 9.5, 7.0, 3.0]))
+    monitor.add_watermark("rss", "process_rss_gb", low_gb=4.0, high_gb=8.0,
+                          on_pressure=pressure.append, on_release=release.append)
+
+    for _ in range(5):
+        monitor.check()
+
+    assert [event.value_gb for event in pressure] == [9.0]
+    assert [event.value_gb for event in release] == [3.0]
+    assert pressure[0].under_pressure and not release[0].under_pressure
+    assert not monitor.is_under_pressure("rss")
+
+def test_check_system_available():
+    """Test watermarks on system available memory."""
+    monitor = MemoryPressureMonitor(memory=make_memory([0.5], metric="available"))
+    monitor.add_watermark("system", "system_available_gb", low_gb=1.0, high_gb=2.0)
+
+    events = monitor.check()
+    assert [(event.watermark, event.under_pressure) for event in events] == [("system", True)]
+    assert monitor.is_under_pressure()
+
+def test_register_callback_and_remove_watermark():
+    """Test callbacks can be added later and watermarks removed."""
+    monitor = MemoryPressureMonitor(memory=make_memory([9.0]))
+    monitor.add_watermark("rss", "process_rss_gb", low_gb=4.0, high_gb=8.0)
+    callback = Mock()
+    monitor.register_callback("rss", on_pressure=callback)
+    monitor.check()
+    callback.assert_called_once()
+
+    monitor.remove_watermark("rss")
+    assert monitor.check() == []
+    with pytest.raises(KeyError):
+        monitor.register_callback("rss", on_pressure=callback)
+
+def test_callback_error_does_not_stop_other_callbacks():
+    """Test a failing callback is recorded and the rest still run."""
+    called = Mock()
+    monitor = MemoryPressureMonitor(memory=make_memory([9.0]))
+    monitor.add_watermark("rss", "process_rss_gb", low_gb=4.0, high_gb=8.0, on_pressure=Mock(side_effect=ValueError("boom")))
+    monitor.register_callback("rss", on_pressure=called)
+
+    monitor.check()
+    called.assert_called_once()
+    assert isinstance(monitor.last_error, ValueError)
+
+def test_background_thread_fires_callback():
+    """Test the monitor thread checks watermarks without being polled."""
+    fired = threading.Event()
+    monitor = MemoryPressureMonitor(memory=make_memory([1.0, 9.0]), interval=0.01)
+    monitor.add_watermark("rss", "process_rss_gb", low_gb=4.0, high_gb=8.0, on_pressure=lambda event: fired.set())
+
+    with monitor:
+        assert monitor.is_running
+        assert fired.wait(2.0)
+    assert not monitor.is_running
+
+def test_invalid_watermarks():
+    """Test invalid metrics and thresholds are rejected."""
+    monitor = MemoryPressureMonitor(memory=make_memory([1.0]))
+    with pytest.raises(ValueError):
+        monitor.add_watermark("rss", "unknown", low_gb=1.0, high_gb=2.0)
+    with pytest.raises(ValueError):
+        monitor.add_watermark("rss", "process_rss_gb", low_gb=2.0, high_gb=2.0)
+    with pytest.raises(ValueError):
+        MemoryPressureMonitor(interval=0)
@@ -0,0 +1,185 @@
+"""Tests for metrics utilities."""
+import json
+import math
+import threading
+import pytest
+from src.rsq_utils.memory import Memory
+from src.rsq_utils.metrics import Counter, Gauge, Histogram, JsonLinesExporter, Metric, MetricsRegistry, get_registry
+from src.rsq_utils.time import Stopwatch
+
+def test_counter_sums_increments_across_threads():
+    """Test per-thread increments from many threads add up exactly."""
+    counter = Counter("operations_total")
+
+    def work():
+        for _ in range(10_000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value == 80_000
+
+def test_cells_of_finished_threads_are_retired():
+    """Test threads that end fold their updates into a shared total instead of keeping a cell."""
+    counter = Counter("operations_total")
+    histogram = Histogram("latency_seconds", buckets=[1.0])
+
+    def work():
+        counter.inc()
+        histogram.observe(0.5)
+
+    for _ in range(50):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    assert counter.value == 50 and histogram.count == 50
+    assert histogram.get_bucket_counts()[1.0] == 50
+    assert len(counter._cells._cells) == 0 and len(histogram._cells._cells) == 0
+def test_counter_rejects_negative_increments():
+    """Test counters cannot decrease."""
+    with pytest.raises(ValueError):
+        Counter("operations_total").inc(-1)
+
+def test_labels():
+    """Test labelled metrics are updated through their children."""
+    counter = Counter("requests_total", "Requests", ["host", "status"])
+    counter.labels("a.com", 200).inc()
+    counter.labels(host="a.com", status="200").inc(2)
+    counter.labels(host="b.com", status="500").inc()
+
+    assert counter.labels("a.com", "200").value == 3
+    assert [(sample.labels, sample.value) for sample in counter.collect().samples] == [
+        ({"host": "a.com", "status": "200"}, 3),
+        ({"host": "b.com", "status": "500"}, 1),
+    ]
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        counter.labels(host="a.com")
+
+def test_metric_subclasses_must_implement_samples():
+    """Test a Metric subclass missing its abstract methods cannot be instantiated."""
+    class Incomplete(Metric):
+        type = "counter"
+
+    with pytest.raises(TypeError, match="abstract"):
+        Incomplete("incomplete_total")
+
+def test_invalid_names():
+    """Test metric and label names are validated."""
+    with pytest.raises(ValueError):
+        Counter("bad-name")
+    with pytest.raises(ValueError):
+        Histogram("latency_seconds", labelnames=["le"])
+
+def test_gauge():
+    """Test gauges set, move both ways and read functions."""
+    gauge = Gauge("queue_length")
+    gauge.set(5)
+    gauge.inc(2)
+    gauge.dec(4)
+    assert gauge.value == 3
+    gauge.set_function(lambda: 42)
+    assert gauge.value == 42
+
+def test_histogram_buckets():
+    """Test values are counted into cumulative buckets with a sum and count."""
+    histogram = Histogram("latency_seconds", buckets=[0.1, 1.0])
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(value)
+
+    assert histogram.get_bucket_counts() == {0.1: 2, 1.0: 3, math.inf: 4}
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+    with pytest.raises(ValueError):
+        Histogram("latency_seconds", buckets=[1.0, 0.5])
+
+def test_histogram_timing_helpers():
+    """Test time() works as a context manager and decorator, and stopwatches are observed."""
+    histogram = Histogram("latency_seconds")
+
+    @histogram.time()
+    def work():
+        return 1
+
+    with histogram.time():
+        work()
+    stopwatch = Stopwatch()
+    stopwatch.start()
+    stopwatch.stop()
+    histogram.observe_stopwatch(stopwatch)
+
+    assert histogram.count == 3
+    assert 0 <= histogram.sum < 1
+
+def test_registry_get_or_create():
+    """Test metrics are shared by name and type conflicts are rejected."""
+    registry = MetricsRegistry()
+    assert registry.counter("rows_total") is registry.counter("rows_total")
+    with pytest.raises(ValueError):
+        registry.gauge("rows_total")
+    with pytest.raises(ValueError):
+        registry.counter("rows_total", labelnames=["table"])
+    with pytest.raises(ValueError):
+        registry.register(Counter("rows_total"))
+    assert isinstance(get_registry(), MetricsRegistry)
+
+def test_prometheus_text():
+    """Test the exposition format of counters, labels and histograms."""
+    registry = MetricsRegistry()
+    registry.counter("rows_total", "Rows written").inc(500)
+    registry.gauge("ratio", "A \"quoted\"\nhelp", ["path"]).labels('a"b').set(0.5)
+    registry.histogram("latency_seconds", "Latency", buckets=[0.1]).observe(0.05)
+
+    assert registry.to_prometheus() == (
+        "# HELP rows_total Rows written\n"
+        "# TYPE rows_total counter\n"
+        "rows_total 500\n"
+        '# HELP ratio A "quoted"\\nhelp\n'
+        "# TYPE ratio gauge\n"
+        'ratio{path="a\\"b"} 0.5\n'
+        "# HELP latency_seconds Latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="+Inf"} 1\n'
+        "latency_seconds_sum 0.05\n"
+        "latency_seconds_count 1\n"
+    )
+
+def test_write_prometheus(tmp_path):
+    """Test the text file is written in full."""
+    registry = MetricsRegistry()
+    registry.counter("rows_total").inc()
+    registry.write_prometheus(tmp_path / "job.prom")
+    assert (tmp_path / "job.prom").read_text() == registry.to_prometheus()
+    assert [path.name for path in tmp_path.iterdir()] == ["job.prom"]
+
+def test_memory_gauges():
+    """Test Memory fields are exported as gauges on every collection."""
+    registry = MetricsRegistry()
+    registry.register_memory_gauges(Memory(), prefix="job_")
+    families = {family.name: family for family in registry.collect()}
+
+    assert set(families) == {f"job_{name}" for name in Memory().sample()._fields}
+    assert families["job_process_memory_used_gb"].samples[0].value > 0
+    assert families["job_process_memory_used_gb"].type == "gauge"
+
+def test_json_lines_exporter(tmp_path):
+    """Test each export appends one line per sample and stop writes a final export."""
+    registry = MetricsRegistry()
+    registry.counter("rows_total", labelnames=["table"]).labels("a").inc(3)
+    path = tmp_path / "metrics" / "job.jsonl"
+    exporter = JsonLinesExporter(path, registry, interval=60.0)
+
+    assert exporter.export() == 1
+    with exporter:
+        assert exporter.is_running
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+
+    assert len(lines) == 2
+    assert lines[0]["name"] == "rows_total" and lines[0]["labels"] == {"table": "a"}
+    assert lines[0]["type"] == "counter" and lines[0]["value"] == 3
@@ -0,0 +1,88 @@
+"""Tests for parameter space utilities."""
+import pytest
+from src.rsq_utils.parameter_space import ParameterSpace
+from src.rsq_utils.url import generate_parameter_combos
+
+PARAMETERS = {"type": ["A", "B", "C"], "status": [1, 2], "flag": [True, False, 0, 1]}
+
+def test_matches_generate_parameter_combos():
+    """Test iteration and indexing follow generate_parameter_combos order."""
+    expected = generate_parameter_combos(PARAMETERS)
+    space = ParameterSpace(PARAMETERS)
+
+    assert len(space) == len(expected) == 24
+    assert list(space) == expected
+    assert [space[index] for index in range(len(space))] == expected
+    assert space[-1] == expected[-1]
+
+def test_values_compare_equal_keep_their_position():
+    """Test equal values such as True and 1 are decoded by position, not equality."""
+    space = ParameterSpace({"flag": [True, 1, 1.0]})
+    assert [type(combo["flag"]) for combo in space] == [bool, int, float]
+    assert [type(combo["flag"]) for combo in space[1:]] == [int, float]
+
+def test_empty_spaces():
+    """Test empty parameters or empty value lists produce no combinations."""
+    assert len(ParameterSpace({})) == 0
+    assert list(ParameterSpace({"a": [1], "b": []})) == []
+
+def test_large_space_is_lazy():
+    """Test a huge space supports len and random access without materializing."""
+    space = ParameterSpace({f"p{position}": list(range(100)) for position in range(6)})
+    assert len(space) == 100 ** 6
+    assert space[123_456_789_012] == {"p0": 12, "p1": 34, "p2": 56, "p3": 78, "p4": 90, "p5": 12}
+    assert space.index_of(space[123_456_789_012]) == 123_456_789_012
+
+def test_slicing_returns_views():
+    """Test slices keep global indices and support steps."""
+    space = ParameterSpace(PARAMETERS)
+    expected = generate_parameter_combos(PARAMETERS)
+
+    view = space[5:17:3]
+    assert isinstance(view, ParameterSpace)
+    assert list(view) == expected[5:17:3]
+    assert [index for index, _ in view.items()] == [5, 8, 11, 14]
+    assert list(space[::-1]) == expected[::-1]
+
+def test_shards_cover_space_once():
+    """Test shards are contiguous, balanced and cover every combination."""
+    space = ParameterSpace(PARAMETERS)
+    shards = space.shards(5)
+
+    assert [len(shard) for shard in shards] == [5, 5, 5, 5, 4]
+    assert [combo for shard in shards for combo in shard] == list(space)
+    assert list(space.shard(1, 5).indices) == list(range(5, 10))
+    with pytest.raises(ValueError):
+        space.shard(5, 5)
+
+def test_resume_from_global_index():
+    """Test resuming skips everything before a checkpointed global index."""
+    space = ParameterSpace(PARAMETERS)
+    shard = space.shard(2, 3)
+
+    resumed = shard.resume(19)
+    assert [index for index, _ in resumed.items()] == [19, 20, 21, 22, 23]
+    assert len(shard.resume(0)) == len(shard)
+    assert len(shard.resume(100)) == 0
+    assert [index for index, _ in space[::-2].resume(20).items()] == [19, 17, 15, 13, 11, 9, 7, 5, 3, 1]
+
+def test_contains_and_index_of():
+    """Test membership and encoding of combinations."""
+    space = ParameterSpace(PARAMETERS)
+    combo = {"type": "B", "status": 2, "flag": False}
+
+    assert space.index_of(combo) == generate_parameter_combos(PARAMETERS).index(combo)
+    assert combo in space
+    assert combo not in space[:1]
+    assert {"type": "Z", "status": 2, "flag": False} not in space
+    assert "type" not in space
+
+def test_out_of_range_and_invalid_parameters():
+    """Test invalid indices and parameter values raise."""
+    space = ParameterSpace(PARAMETERS)
+    with pytest.raises(IndexError):
+        space[24]
+    with pytest.raises(IndexError):
+        space.combo_at(-1)
+    with pytest.raises(ValueError):
+        ParameterSpace({"a": "not a list"})
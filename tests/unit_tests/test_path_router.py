@@ -0,0 +1,81 @@
+"""Tests for path router utilities."""
+import pytest
+from src.rsq_utils.path_router import PathRouter, RouteMatch
+from src.rsq_utils.path_templates import PathTemplate
+
+TEMPLATES = [
+    "/api/{version}/users/{id}",
+    "/api/{version}/users/me",
+    "/api/{version}/users/{id}/friends",
+    "/files/{name}.json",
+    "/files/{name}",
+    "/reports/{year}-{month}/summary",
+    "/",
+]
+
+@pytest.fixture
+def router():
+    """Build a router over the test templates."""
+    return PathRouter(TEMPLATES)
+
+def test_match_extracts_params(router):
+    """Test parameters are extracted from whole and mixed segments."""
+    assert router.match("/api/v1/users/42") == RouteMatch("/api/{version}/users/{id}", {"version": "v1", "id": "42"})
+    assert router.match("/files/report.json") == RouteMatch("/files/{name}.json", {"name": "report"})
+    assert router.match("reports/2024-05/summary/").params == {"year": "2024", "month": "05"}
+
+def test_literals_take_priority(router):
+    """Test literal segments win over parameters at the same position."""
+    assert router.match("/api/v1/users/me") == RouteMatch("/api/{version}/users/me", {"version": "v1"})
+    assert router.match("/api/v1/users/me/friends").params == {"version": "v1", "id": "me"}
+
+def test_falls_back_to_wildcard(router):
+    """Test a mixed segment that does not match falls back to a whole-segment parameter."""
+    assert router.match("/files/report.csv") == RouteMatch("/files/{name}", {"name": "report.csv"})
+
+def test_normalization_and_query(router):
+    """Test slashes, query strings and fragments do not affect matching."""
+    assert router.match("api/v2/users/7/?page=2#top").params == {"version": "v2", "id": "7"}
+    assert router.match("/").template == "/"
+
+def test_no_match(router):
+    """Test unknown and partial paths do not match."""
+    assert router.match("/api/v1") is None
+    assert router.match("/api/v1/users/1/unknown") is None
+    assert router.match("/api/v1/users//friends") is None
+
+def test_round_trip_with_path_template(router):
+    """Test rendered templates route back to themselves with the same params."""
+    for template in TEMPLATES:
+        compiled = PathTemplate(template)
+        params = {name: f"x{position}" for position, name in enumerate(compiled.params)}
+        assert router.match(compiled.render(params)) == RouteMatch(template, params)
+
+def test_first_template_with_same_shape_wins():
+    """Test templates differing only in parameter names keep the first."""
+    router = PathRouter(["/items/{id}", "/items/{slug}"])
+    assert router.match("/items/a") == RouteMatch("/items/{id}", {"id": "a"})
+    assert len(router) == 2
+
+def test_match_many_and_count_matches(router):
+    """Test bulk matching caches repeated paths and counts per template."""
+    paths = ["/api/v1/users/1", "/api/v1/users/1", "/files/a.json", "/nope"]
+    results = list(router.match_many(paths))
+
+    assert results[0] == results[1] == router.match(paths[0])
+    assert results[3] is None
+    assert router.count_matches(paths) == {
+        "/api/{version}/users/{id}": 2,
+        "/files/{name}.json": 1,
+        None: 1,
+    }
+
+def test_cache_is_bounded_and_cleared_on_add():
+    """Test the match cache never exceeds its size and resets when templates change."""
+    router = PathRouter(["/items/{id}"], cache_size=2)
+    list(router.match_many(["/items/1", "/items/2", "/items/3"]))
+    assert len(router._cache) <= 2
+
+    router.add("/items/special")
+    assert router._cache == {}
+    assert next(router.match_many(["/items/special"])).template == "/items/special"
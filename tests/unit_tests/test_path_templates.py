@@ -0,0 +1,49 @@
+"""Tests for path template utilities."""
+import pytest
+from src.rsq_utils.parameter_space import ParameterSpace
+from src.rsq_utils.path_templates import PathTemplate
+from src.rsq_utils.paths import clean_path, find_template_params
+
+TEMPLATES = [
+    "/api/{version}/{resource}",
+    "/api/v1/",
+    "{root}/files/{name}.json",
+    "/{a}{b}/mixed-{c}-end",
+    "/users/{id}/friends/{id}",
+]
+
+@pytest.mark.parametrize("template", TEMPLATES)
+def test_params_match_find_template_params(template):
+    """Test parameters are found like find_template_params."""
+    assert PathTemplate(template).params == find_template_params(template)
+
+@pytest.mark.parametrize("template", TEMPLATES)
+def test_render_matches_format_of_clean_path(template):
+    """Test rendering equals formatting the cleaned template."""
+    params = {name: f"value_{name}" for name in find_template_params(template)}
+    assert PathTemplate(template).render(params) == clean_path(template).format(**params)
+
+def test_render_without_clean():
+    """Test the template is used verbatim when clean is False."""
+    template = PathTemplate("/api/{version}", clean=False)
+    assert template.path == "/api/{version}"
+    assert template.render({"version": 2}) == "/api/2"
+
+def test_render_ignores_extra_and_requires_missing():
+    """Test extra parameters are ignored and missing ones raise KeyError."""
+    template = PathTemplate("/api/{version}")
+    assert template.render({"version": "v1", "unused": 1}) == "api/v1/"
+    with pytest.raises(KeyError):
+        template.render({})
+
+def test_render_static_template():
+    """Test a template without parameters renders to its cleaned path."""
+    assert PathTemplate("/health").render({}) == "health/"
+
+def test_render_many():
+    """Test bulk rendering from a combo iterator."""
+    template = PathTemplate("/api/{version}/{resource}")
+    space = ParameterSpace({"version": ["v1", "v2"], "resource": ["users", "orders"]})
+    assert list(template.render_many(space)) == [
+        "api/v1/users/", "api/v1/orders/", "api/v2/users/", "api/v2/orders/"
+    ]
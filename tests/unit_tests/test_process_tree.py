@@ -0,0 +1,90 @@
+"""Tests for process tree memory utilities."""
+import os
+import subprocess
+import sys
+import time
+import pytest
+from src.rsq_utils.process_tree import ProcessMemory, ProcessTreeMemory, ProcessTreeSample
+
+@pytest.fixture
+def sleeping_children():
+    """Start a child that itself starts a grandchild, and stop both afterwards."""
+    script = (
+        "import subprocess, sys, time; "
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); "
+        "print(child.pid, flush=True); time.sleep(30)"
+    )
+    child = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True)
+    grandchild_pid = int(child.stdout.readline())
+    yield child.pid, grandchild_pid
+    os.kill(grandchild_pid, 9)
+    child.kill()
+    child.wait()
+
+def test_sample_without_children():
+    """Test a lone process is measured on its own."""
+    sample = ProcessTreeMemory().sample()
+    assert sample.root.pid == os.getpid()
+    assert sample.root.rss_gb > 0
+    assert sample.total_rss_gb >= sample.root.rss_gb
+
+def test_children_discovered_recursively(sleeping_children):
+    """Test children and grandchildren are found and measured."""
+    child_pid, grandchild_pid = sleeping_children
+    tree = ProcessTreeMemory()
+
+    assert {child_pid, grandchild_pid} <= set(tree.get_children_pids())
+    sample = tree.sample()
+    pids = {process.pid for process in sample.children}
+    assert {child_pid, grandchild_pid} <= pids
+    assert sample.total_rss_gb > sample.root.rss_gb
+    assert len(sample.processes) == len(sample.children) + 1
+
+def test_exited_children_dropped(sleeping_children):
+    """Test children that exit are no longer reported on the next sample."""
+    child_pid, grandchild_pid = sleeping_children
+    tree = ProcessTreeMemory()
+    tree.sample()
+
+    os.kill(grandchild_pid, 9)
+    deadline = time.time() + 5
+    while grandchild_pid in tree.get_children_pids() and time.time() < deadline:
+        time.sleep(0.01)
+    assert grandchild_pid not in {process.pid for process in tree.sample().children}
+
+def test_psutil_fallback(sleeping_children):
+    """Test discovery without the /proc children files."""
+    child_pid, grandchild_pid = sleeping_children
+    tree = ProcessTreeMemory()
+    tree._use_proc_children = False
+    assert {child_pid, grandchild_pid} <= set(tree.get_children_pids())
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="PSS is only reported on Linux")
+def test_detailed_sample_reports_uss_and_pss():
+    """Test USS and PSS are collected in detailed mode."""
+    sample = ProcessTreeMemory(detailed=True).sample()
+    assert sample.root.uss_gb is not None and sample.root.uss_gb > 0
+    assert sample.total_pss_gb is not None
+    assert "process_tree_pss_gb" in sample.to_memory_data()
+
+def test_totals_and_memory_data():
+    """Test totals add up and missing USS or PSS is reported as unavailable."""
+    sample = ProcessTreeSample(
+        root=ProcessMemory(1, "root", 1.0, uss_gb=0.5, pss_gb=0.75),
+        children=(ProcessMemory(2, "worker", 0.5, uss_gb=0.25),),
+    )
+    assert sample.total_rss_gb == 1.5
+    assert sample.total_uss_gb == 0.75
+    assert sample.total_pss_gb is None
+    assert sample.to_memory_data() == {
+        "process_tree_memory_used_gb": 1.5,
+        "process_tree_process_count": 2.0,
+        "process_tree_uss_gb": 0.75,
+    }
+
+def test_missing_root_raises():
+    """Test sampling a process that does not exist raises RuntimeError."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    with pytest.raises(RuntimeError):
+        ProcessTreeMemory(pid=process.pid).sample()
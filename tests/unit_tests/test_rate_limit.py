@@ -0,0 +1,167 @@
+"""Tests for rate limiting utilities."""
+import asyncio
+import threading
+import time
+import pytest
+from src.rsq_utils.rate_limit import HostRateLimiter, HostScheduler, TokenBucket, get_host
+
+def test_bucket_allows_burst_then_limits():
+    """Test a full bucket allows a burst and then refuses."""
+    bucket = TokenBucket(rate=1, burst=5)
+    assert all(bucket.try_acquire() for _ in range(5))
+    assert not bucket.try_acquire()
+    assert bucket.time_until_available() > 0.5
+
+def test_bucket_refills_over_time():
+    """Test tokens come back at the configured rate."""
+    bucket = TokenBucket(rate=100, burst=1)
+    assert bucket.try_acquire()
+    time.sleep(0.03)
+    assert bucket.try_acquire()
+
+def test_acquire_waits_exactly_for_the_rate():
+    """Test blocking acquires are paced at the rate without oversleeping."""
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+    assert 0.19 <= elapsed < 0.35
+
+def test_acquire_timeout():
+    """Test an acquire that would wait too long takes nothing."""
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.acquire()
+    assert not bucket.acquire(timeout=0.01)
+    assert bucket.total_acquired == 1
+
+def test_acquire_from_threads_respects_rate():
+    """Test concurrent threads share the bucket without exceeding the rate."""
+    bucket = TokenBucket(rate=100, burst=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(10)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start >= 0.38
+    assert bucket.total_acquired == 40
+
+def test_acquire_async():
+    """Test asyncio callers are paced at the rate."""
+    bucket = TokenBucket(rate=50, burst=1)
+
+    async def run():
+        await asyncio.gather(*(bucket.acquire_async() for _ in range(6)))
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - start >= 0.09
+
+def test_observed_rate():
+    """Test the observed rate reflects recent grants."""
+    bucket = TokenBucket(rate=200, burst=1, window_seconds=1.0)
+    for _ in range(20):
+        bucket.acquire()
+    assert 100 < bucket.observed_rate <= 260
+
+def test_invalid_bucket_arguments():
+    """Test invalid rates, bursts and token counts are rejected."""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=0.5)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=2).try_acquire(3)
+
+def test_get_host():
+    """Test hosts are taken from URLs or used as-is."""
+    assert get_host("https://API.example.com:8443/items?page=2") == "api.example.com"
+    assert get_host("API.example.com") == "api.example.com"
+
+def test_host_rate_limiter_per_host_limits():
+    """Test hosts get their own buckets with overrides."""
+    limiter = HostRateLimiter(rate=10, host_limits={"slow.com": (1, 1)})
+    assert limiter.get_bucket("https://slow.com/a").rate == 1
+    assert limiter.get_bucket("fast.com").rate == 10
+    assert limiter.get_bucket("https://fast.com/b") is limiter.get_bucket("fast.com")
+
+    assert limiter.try_acquire("https://slow.com/a")
+    assert not limiter.try_acquire("https://slow.com/b")
+    assert limiter.try_acquire("https://fast.com/b")
+
+    limiter.set_limit("slow.com", 100, 5)
+    assert limiter.get_bucket("slow.com").burst == 5
+    assert set(limiter.get_observed_rates()) == {"slow.com", "fast.com"}
+
+def test_scheduler_slow_host_does_not_block_others():
+    """Test a rate-limited host only delays its own items."""
+    limiter = HostRateLimiter(rate=1000, host_limits={"slow.com": (5, 1)})
+    items = [f"https://slow.com/{i}" for i in range(4)] + [f"https://fast.com/{i}" for i in range(20)]
+    scheduler = HostScheduler(limiter, max_workers=4, max_concurrency_per_host=2)
+
+    hosts = [result.host for result in scheduler.map(lambda url: url, items)]
+    assert sorted(hosts) == ["fast.com"] * 20 + ["slow.com"] * 4
+    assert hosts.index("fast.com") < 2
+    last_fast = len(hosts) - 1 - hosts[::-1].index("fast.com")
+    assert last_fast < hosts.index("slow.com", hosts.index("slow.com") + 1)
+
+def test_scheduler_limits_concurrency_per_host():
+    """Test no host has more than max_concurrency_per_host items running."""
+    lock = threading.Lock()
+    active = {}
+    peaks = {}
+
+    def work(item):
+        host = item.split("/")[2]
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            peaks[host] = max(peaks.get(host, 0), active[host])
+        time.sleep(0.01)
+        with lock:
+            active[host] -= 1
+        return item
+
+    items = [f"https://host{i % 3}.com/{i}" for i in range(30)]
+    scheduler = HostScheduler(HostRateLimiter(rate=10_000), max_workers=8, max_concurrency_per_host=2)
+    results = list(scheduler.map(work, items))
+
+    assert sorted(result.index for result in results) == list(range(30))
+    assert all(result.value == result.item for result in results)
+    assert max(peaks.values()) <= 2
+
+def test_scheduler_reports_errors():
+    """Test exceptions are returned in the result instead of raised."""
+    def work(item):
+        if item.endswith("bad"):
+            raise ValueError(item)
+        return item
+
+    results = list(HostScheduler(HostRateLimiter(rate=1000)).map(work, ["https://a.com/ok", "https://a.com/bad"]))
+    errors = [result for result in results if result.error is not None]
+    assert len(errors) == 1 and isinstance(errors[0].error, ValueError)
+
+def test_scheduler_custom_host_key():
+    """Test items that are not URLs can be mapped to hosts."""
+    items = [("a.com", 1), ("b.com", 2)]
+    results = HostScheduler(HostRateLimiter(rate=1000)).map(lambda item: item[1] * 2, items, get_item_host=lambda item: item[0])
+    assert sorted((result.host, result.value) for result in results) == [("a.com", 2), ("b.com", 4)]
+
+def test_scheduler_map_async():
+    """Test the asyncio scheduler processes every item and respects the rate."""
+    limiter = HostRateLimiter(rate=1000, host_limits={"slow.com": (20, 1)})
+    items = [f"https://slow.com/{i}" for i in range(5)] + [f"https://fast.com/{i}" for i in range(10)]
+
+    async def work(url):
+        await asyncio.sleep(0)
+        return url.upper()
+
+    async def collect():
+        scheduler = HostScheduler(limiter, max_workers=4, max_concurrency_per_host=2)
+        return [result async for result in scheduler.map_async(work, items)]
+
+    start = time.monotonic()
+    results = asyncio.run(collect())
+    assert time.monotonic() - start >= 0.19
+    assert sorted(result.index for result in results) == list(range(15))
+    assert all(result.value == result.item.upper() for result in results)
@@ -0,0 +1,192 @@
+"""Tests for response cache utilities."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import pytest
+from src.rsq_utils.fetch import FetchEngine, RetryPolicy
+from src.rsq_utils.response_cache import ResponseCache, get_cache_ttl
+
+NO_BACKOFF = RetryPolicy(max_attempts=1, backoff_seconds=0.0, jitter=0.0)
+
+class ValidatingHandler(BaseHTTPRequestHandler):
+    """Local API answering /etag with an ETag, /short with max-age=0 and /nostore with no-store."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        """Serve a response based on the path, answering 304 to a matching If-None-Match."""
+        server = self.server
+        path = urlsplit(self.path).path
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("If-None-Match")))
+        headers = {"ETag": '"v1"'}
+        if path == "/short":
+            headers["Cache-Control"] = "max-age=0"
+        elif path == "/nostore":
+            headers["Cache-Control"] = "no-store"
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.respond(304, b"", headers)
+        else:
+            self.respond(200, f"body of {self.path}".encode(), headers)
+
+    def respond(self, status, body, headers):
+        """Send a keep-alive response."""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+@pytest.fixture
+def server():
+    """Run the validating API on a free local port."""
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), ValidatingHandler)
+    http_server.daemon_threads = True
+    http_server.lock = threading.Lock()
+    http_server.requests = []
+    threading.Thread(target=http_server.serve_forever, args=(0.05,), daemon=True).start()
+    http_server.base_url = f"http://127.0.0.1:{http_server.server_address[1]}"
+    yield http_server
+    http_server.shutdown()
+    http_server.server_close()
+
+def test_put_and_get(tmp_path):
+    """Test a stored response is read back under its canonical URL."""
+    with ResponseCache(tmp_path) as cache:
+        assert cache.put("https://example.com/items?b=2&a=1", 200, {"etag": '"x"'}, b"data")
+        cached = cache.get("https://EXAMPLE.com/items", {"a": 1, "b": 2})
+
+    assert cached.url == "https://example.com/items?a=1&b=2"
+    assert cached.status == 200
+    assert cached.body == b"data"
+    assert cached.etag == '"x"'
+    assert cached.is_fresh
+
+def test_responses_persist_across_instances(tmp_path):
+    """Test a new cache on the same directory sees earlier responses."""
+    with ResponseCache(tmp_path) as cache:
+        cache.put("https://example.com/a", 200, {}, b"data")
+    with ResponseCache(tmp_path) as cache:
+        assert cache.get("https://example.com/a").body == b"data"
+        assert "https://example.com/a" in cache
+
+def test_ttl_expiry(tmp_path):
+    """Test stale responses are only returned when allowed."""
+    with ResponseCache(tmp_path, default_ttl=0.05) as cache:
+        cache.put("https://example.com/a", 200, {}, b"data")
+        assert cache.get("https://example.com/a") is not None
+        time.sleep(0.06)
+        assert cache.get("https://example.com/a") is None
+        assert cache.get("https://example.com/a", allow_stale=True).body == b"data"
+
+def test_cache_control(tmp_path):
+    """Test max-age sets the TTL and no-store responses are not stored."""
+    assert get_cache_ttl({"cache-control": "max-age=60"}, 5.0) == 60.0
+    assert get_cache_ttl({"cache-control": "no-cache"}, 5.0) == 0.0
+    assert get_cache_ttl({}, 5.0) == 5.0
+    with ResponseCache(tmp_path) as cache:
+        assert not cache.put("https://example.com/a", 200, {"cache-control": "no-store"}, b"data")
+        assert len(cache) == 0
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    """Test bodies are content-addressed and deleted with their last entry."""
+    with ResponseCache(tmp_path) as cache:
+        cache.put("https://example.com/a", 200, {}, b"same")
+        cache.put("https://example.com/b", 200, {}, b"same")
+        assert cache.size_bytes == 4
+        assert len(list((tmp_path / "objects").rglob("*"))) == 2
+
+        cache.remove("https://example.com/a")
+        assert cache.get("https://example.com/b").body == b"same"
+        cache.remove("https://example.com/b")
+        assert cache.size_bytes == 0
+        assert not [path for path in (tmp_path / "objects").rglob("*") if path.is_file()]
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Test entries are evicted by last access once bodies exceed max_bytes."""
+    with ResponseCache(tmp_path, max_bytes=25) as cache:
+        cache.put("https://example.com/a", 200, {}, b"a" * 10)
+        cache.put("https://example.com/b", 200, {}, b"b" * 10)
+        cache.get("https://example.com/a")
+        cache.put("https://example.com/c", 200, {}, b"c" * 10)
+
+        assert "https://example.com/a" in cache
+        assert "https://example.com/b" not in cache
+        assert cache.size_bytes == 20
+        assert not cache.put("https://example.com/d", 200, {}, b"d" * 26)
+
+def test_size_is_shared_by_instances_on_one_directory(tmp_path):
+    """Test the stored size stays exact when several caches write to one directory."""
+    with ResponseCache(tmp_path, max_bytes=35) as first, ResponseCache(tmp_path, max_bytes=35) as second:
+        first.put("https://example.com/a", 200, {}, b"a" * 10)
+        second.put("https://example.com/b", 200, {}, b"b" * 10)
+        first.put("https://example.com/a", 200, {}, b"c" * 10)
+        second.put("https://example.com/d", 200, {}, b"d" * 10)
+        assert first.size_bytes == second.size_bytes == 30
+
+        first.put("https://example.com/e", 200, {}, b"e" * 10)
+        assert second.size_bytes == 30 and len(second) == 3
+        second.clear()
+        assert first.size_bytes == 0
+    with ResponseCache(tmp_path) as reopened:
+        assert reopened.size_bytes == 0
+
+def test_large_bodies_are_memory_mapped(tmp_path):
+    """Test bodies from mmap_threshold bytes are read as memory-mapped views."""
+    with ResponseCache(tmp_path, mmap_threshold=100) as cache:
+        cache.put("https://example.com/small", 200, {}, b"x" * 99)
+        cache.put("https://example.com/large", 200, {}, b"y" * 100)
+        small = cache.get("https://example.com/small").body
+        large = cache.get("https://example.com/large").body
+
+    assert isinstance(small, bytes)
+    assert isinstance(large, memoryview)
+    assert large.readonly and bytes(large) == b"y" * 100
+
+def test_fetch_serves_fresh_responses_from_disk(server, tmp_path):
+    """Test a fresh response is served without a request."""
+    with ResponseCache(tmp_path) as cache, FetchEngine(retry=NO_BACKOFF) as engine:
+        first = cache.fetch(engine, f"{server.base_url}/etag", {"page": 1})
+        second = cache.fetch(engine, f"{server.base_url}/etag?page=1")
+
+    assert not first.from_cache and first.ok
+    assert second.from_cache and second.attempts == 0
+    assert second.body == first.body == b"body of /etag?page=1"
+    assert len(server.requests) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_fetch_revalidates_stale_responses(server, tmp_path):
+    """Test a stale response is revalidated with If-None-Match and served after a 304."""
+    with ResponseCache(tmp_path) as cache, FetchEngine(retry=NO_BACKOFF) as engine:
+        cache.fetch(engine, f"{server.base_url}/short")
+        result = cache.fetch(engine, f"{server.base_url}/short")
+
+    assert result.from_cache and result.status == 200
+    assert result.body == b"body of /short"
+    assert server.requests == [("/short", None), ("/short", '"v1"')]
+    assert cache.revalidations == 1
+
+def test_fetch_does_not_store_no_store_responses(server, tmp_path):
+    """Test no-store responses are fetched every time."""
+    with ResponseCache(tmp_path) as cache, FetchEngine(retry=NO_BACKOFF) as engine:
+        cache.fetch(engine, f"{server.base_url}/nostore")
+        result = cache.fetch(engine, f"{server.base_url}/nostore")
+
+    assert result.ok and not result.from_cache
+    assert len(server.requests) == 2
+def test_fetch_sends_ignored_params_to_the_server(server, tmp_path):
+    """Test ignored parameters are left out of the cache key but still sent with the request."""
+    with ResponseCache(tmp_path, ignore_params=["api_key"]) as cache, FetchEngine(retry=NO_BACKOFF) as engine:
+        first = cache.fetch(engine, f"{server.base_url}/etag?api_key=SECRET", {"page": 1})
+        second = cache.fetch(engine, f"{server.base_url}/etag?api_key=OTHER&page=1")
+        stored = cache.get(f"{server.base_url}/etag?page=1")
+
+    assert server.requests == [("/etag?api_key=SECRET&page=1", None)]
+    assert first.body == b"body of /etag?api_key=SECRET&page=1"
+    assert second.from_cache and second.body == first.body
+    assert stored is not None and stored.body == first.body
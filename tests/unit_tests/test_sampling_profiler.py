@@ -0,0 +1,91 @@
+"""Tests for sampling profiler utilities."""
+import threading
+import time
+import pytest
+from src.rsq_utils.sampling_profiler import SamplingProfiler
+from src.rsq_utils.time import Stopwatch
+
+def busy_loop(seconds):
+    """Keep the CPU busy for a number of seconds."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def nested(depth, seconds):
+    """Recurse to a depth, then spin."""
+    if depth:
+        nested(depth - 1, seconds)
+    else:
+        busy_loop(seconds)
+
+def test_samples_running_code():
+    """Test the profiled function appears in the collapsed stacks under the thread name."""
+    with SamplingProfiler(interval=0.001) as profiler:
+        assert profiler.is_running
+        busy_loop(0.2)
+    lines = profiler.to_collapsed().splitlines()
+
+    assert not profiler.is_running
+    assert profiler.sample_count > 0
+    assert any(line.startswith("MainThread;") and "busy_loop (test_sampling_profiler.py:" in line for line in lines)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    assert profiler.get_top_functions(1)[0][0].startswith("busy_loop")
+    assert not any("rsq-sampling-profiler" in line for line in lines)
+
+def test_sample_counts_other_threads():
+    """Test a single sample records every other thread's stack."""
+    release = threading.Event()
+    worker = threading.Thread(target=release.wait, name="worker")
+    worker.start()
+    profiler = SamplingProfiler(group_by_thread=True)
+    profiler.sample()
+    release.set()
+    worker.join()
+    stacks = profiler.get_stack_counts()
+
+    assert profiler.sample_count == 1
+    assert any(stack.startswith("worker;") for stack in stacks)
+    assert not any(stack.startswith("MainThread;") for stack in stacks)
+
+def test_memory_is_bounded():
+    """Test new stacks beyond max_stacks are dropped and deep stacks are truncated."""
+    profiler = SamplingProfiler(interval=0.001, max_stacks=1, max_depth=3, group_by_thread=False)
+    with profiler:
+        nested(20, 0.1)
+    stacks = profiler.get_stack_counts()
+
+    assert len(stacks) == 1
+    stack = next(iter(stacks))
+    assert stack.startswith("[truncated];") and len(stack.split(";")) == 4
+    assert profiler.dropped_samples + sum(stacks.values()) >= profiler.sample_count
+
+def test_stopwatch_times_the_region():
+    """Test a shared stopwatch is started and stopped with the profiler."""
+    stopwatch = Stopwatch()
+    profiler = SamplingProfiler(interval=0.001, stopwatch=stopwatch)
+    profiler.start()
+    with pytest.raises(RuntimeError):
+        profiler.start()
+    busy_loop(0.05)
+    profiler.stop()
+
+    assert stopwatch.time_elapsed is not None and stopwatch.time_elapsed >= 0.05
+    assert 0 <= profiler.overhead < 1
+
+def test_write_and_clear(tmp_path):
+    """Test collapsed stacks are written to a file and clear forgets them."""
+    with SamplingProfiler(interval=0.001) as profiler:
+        busy_loop(0.05)
+    path = tmp_path / "profiles" / "run.folded"
+    profiler.write_collapsed(path)
+
+    assert path.read_text() == profiler.to_collapsed() != ""
+    profiler.clear()
+    assert profiler.to_collapsed() == "" and profiler.sample_count == 0
+
+def test_invalid_arguments():
+    """Test non-positive settings are rejected."""
+    with pytest.raises(ValueError):
+        SamplingProfiler(interval=0)
+    with pytest.raises(ValueError):
+        SamplingProfiler(max_stacks=0)
@@ -0,0 +1,211 @@
+"""Tests for shared memory utilities."""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import pytest
+from src.rsq_utils.shared_memory import SharedMemoryStore, SharedCache, is_shareable
+
+def _read_from_worker(store, queue):
+    """Attach to the shared cache from a child process and report what it sees."""
+    cache = SharedCache(store=store)
+    queue.put((
+        cache["array"].tolist(),
+        cache["df"]["numbers"].tolist(),
+        cache.is_shared("array"),
+        store.get_reference_count("array"),
+    ))
+
+def _attach_in_pool_worker(store):
+    """Pool initializer that attaches the worker to the shared cache."""
+    global _worker_cache
+    _worker_cache = SharedCache(store=store)
+
+def _sum_shared_array(_):
+    """Sum the shared array from a pool worker."""
+    return int(_worker_cache["array"].sum())
+
+def _attach_and_hold_lock(store, queue):
+    """Pool initializer that attaches, then never releases the store's lock."""
+    _attach_in_pool_worker(store)
+    store._lock.acquire()
+    queue.put(True)
+    time.sleep(60)
+
+@pytest.fixture
+def store():
+    """Create a store and destroy its segments after the test."""
+    shared_store = SharedMemoryStore()
+    yield shared_store
+    shared_store.unlink()
+
+def test_is_shareable():
+    """Test detection of shareable values."""
+    assert is_shareable(np.arange(3)) is True
+    assert is_shareable(np.array([True, False])) is True
+    assert is_shareable(pd.DataFrame({"a": [1, 2]})) is True
+    assert is_shareable(np.array(["a", "b"], dtype=object)) is False
+    assert is_shareable([1, 2, 3]) is False
+
+def test_store_put_and_get_array(store):
+    """Test arrays are stored once and attached as read-only views."""
+    array = np.arange(10, dtype=np.float64)
+    assert store.put("array", array) is True
+
+    attached = store.get("array")
+    np.testing.assert_array_equal(attached, array)
+    assert attached.flags.writeable is False
+    assert np.shares_memory(attached, store.get("array"))
+    assert "array" in store
+    assert store.keys() == ["array"]
+
+def test_store_put_unshareable(store):
+    """Test values the store cannot share are rejected."""
+    assert store.put("text", "not shareable") is False
+    assert "text" not in store
+
+def test_store_dataframe_round_trip(store):
+    """Test DataFrames with mixed dtypes are rebuilt exactly."""
+    df = pd.DataFrame(
+        {
+            "numbers": [1, 2, 3],
+            "floats": [0.5, 1.5, 2.5],
+            "more_numbers": [4, 5, 6],
+            "labels": ["a", "b", "c"],
+            "dates": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+        },
+        index=["x", "y", "z"],
+    )
+    store.put("df", df)
+
+    attached = store.get("df")
+    pd.testing.assert_frame_equal(attached, df)
+    assert attached["numbers"].to_numpy().flags.writeable is False
+
+def test_store_reference_counting(store):
+    """Test segments are counted per holder and released on removal."""
+    store.put("array", np.arange(5))
+    assert store.get_reference_count("array") == 1
+
+    store.get("array")
+    assert store.get_reference_count("array") == 2
+
+    store.get("array")
+    assert store.get_reference_count("array") == 2
+
+    store.remove("array")
+    assert "array" not in store
+    with pytest.raises(KeyError):
+        store.get("array")
+
+def test_store_replace_releases_previous(store):
+    """Test replacing a key releases the previous segments."""
+    store.put("array", np.arange(5))
+    first = store.get("array")
+    store.put("array", np.arange(3))
+
+    np.testing.assert_array_equal(store.get("array"), np.arange(3))
+    np.testing.assert_array_equal(first, np.arange(5))
+    assert store.get_reference_count("array") == 2
+
+def test_views_outlive_store_close():
+    """Test attached views stay valid after the store releases its segments."""
+    shared_store = SharedMemoryStore()
+    shared_store.put("array", np.arange(5))
+    attached = shared_store.get("array")
+    shared_store.unlink()
+
+    np.testing.assert_array_equal(attached, np.arange(5))
+
+def test_store_registry_full():
+    """Test publishing fails cleanly when the registry is full."""
+    small_store = SharedMemoryStore(registry_bytes=200)
+    try:
+        with pytest.raises(ValueError, match="registry is full"):
+            for index in range(10):
+                small_store.put(f"array_{index}", np.arange(3))
+    finally:
+        small_store.unlink()
+
+def test_shared_cache_falls_back_to_per_process(store):
+    """Test unshareable values use the usual deep-copied storage."""
+    nested = {"inner": [1, 2, 3]}
+    cache = SharedCache({"array": np.arange(4), "nested": nested}, store=store)
+
+    nested["inner"].append(4)
+
+    assert cache.is_shared("array") is True
+    assert cache.is_shared("nested") is False
+    assert cache["nested"] == {"inner": [1, 2, 3]}
+
+def test_shared_cache_replace_with_unshareable(store):
+    """Test replacing a shared value with an unshareable one unpublishes it."""
+    cache = SharedCache({"value": np.arange(4)}, store=store)
+    cache.update_variables({"value": "text"})
+
+    assert cache["value"] == "text"
+    assert cache.is_shared("value") is False
+
+def test_shared_cache_remove_variable(store):
+    """Test removing a variable releases its shared segments."""
+    cache = SharedCache({"array": np.arange(4)}, store=store)
+    cache.remove_variable("array")
+
+    assert "array" not in cache
+    assert "array" not in store
+
+def test_shared_cache_attaches_in_worker():
+    """Test a child process attaches to the parent's values without copying."""
+    context = multiprocessing.get_context()
+    shared_store = SharedMemoryStore(lock=context.RLock())
+    try:
+        shared_store.put("array", np.arange(4))
+        shared_store.put("df", pd.DataFrame({"numbers": [1, 2]}))
+        queue = context.Queue()
+        worker = context.Process(target=_read_from_worker, args=(shared_store, queue))
+        worker.start()
+        array, numbers, is_shared, reference_count = queue.get(timeout=30)
+        worker.join(timeout=30)
+
+        assert array == [0, 1, 2, 3]
+        assert numbers == [1, 2]
+        assert is_shared is True
+        assert reference_count == 2
+        assert shared_store.get_reference_count("array") == 1
+    finally:
+        shared_store.unlink()
+
+def test_pool_workers_release_references_on_exit():
+    """Test pool workers release their references when the pool is closed and joined."""
+    context = multiprocessing.get_context()
+    shared_store = SharedMemoryStore(lock=context.RLock())
+    shared_store.put("array", np.arange(4))
+    segment_name = shared_store._read_registry()["array"].segment_name
+    with context.Pool(2, initializer=_attach_in_pool_worker, initargs=(shared_store,)) as pool:
+        assert pool.map(_sum_shared_array, range(4)) == [6, 6, 6, 6]
+        pool.close()
+        pool.join()
+
+    assert shared_store.get_reference_count("array") == 1
+    shared_store.unlink()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=segment_name)
+
+def test_lock_held_by_terminated_worker_times_out():
+    """Test a lock left held by a terminated worker raises instead of hanging, and unlink still cleans up."""
+    context = multiprocessing.get_context()
+    shared_store = SharedMemoryStore(lock=context.RLock(), lock_timeout=0.2)
+    shared_store.put("array", np.arange(4))
+    segment_name = shared_store._read_registry()["array"].segment_name
+    queue = context.Queue()
+    with context.Pool(1, initializer=_attach_and_hold_lock, initargs=(shared_store, queue)):
+        queue.get(timeout=30)
+
+    with pytest.raises(TimeoutError, match="Pool.terminate"):
+        shared_store.keys()
+    shared_store._lock = context.RLock()
+    assert shared_store.get_reference_count("array") == 2
+    shared_store.unlink()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=segment_name)
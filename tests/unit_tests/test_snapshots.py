@@ -0,0 +1,155 @@
+"""Tests for snapshot utilities."""
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from src.rsq_utils.snapshots import SnapshotHistory, fingerprint
+from src.rsq_utils.variables import GlobalVariables, LocalVariables, Variables
+
+def test_fingerprint_stable_and_content_sensitive():
+    """Test equal content gives equal fingerprints and changes are detected."""
+    assert fingerprint({"a": [1, 2]}) == fingerprint({"a": [1, 2]})
+    assert fingerprint({"a": [1, 2]}) != fingerprint({"a": [1, 3]})
+    assert fingerprint(1) != fingerprint("1")
+    assert fingerprint({1, 2, 3}) == fingerprint({3, 2, 1})
+    assert len(fingerprint(None)) == 16
+
+def test_fingerprint_arrays_and_dataframes():
+    """Test arrays and DataFrames are fingerprinted by shape, dtype and content."""
+    array = np.arange(10)
+    assert fingerprint(array) == fingerprint(array.copy())
+    assert fingerprint(array) != fingerprint(array.astype(np.float64))
+
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    changed = df.copy()
+    changed.loc[1, "a"] = 20
+    assert fingerprint(df) == fingerprint(df.copy())
+    assert fingerprint(df) != fingerprint(changed)
+
+def test_fingerprint_samples_large_values_only_when_asked():
+    """Test large values are hashed in full unless sampling is requested."""
+    array = np.zeros(100_000)
+    changed = array.copy()
+    changed[1] = 1.0
+    values = list(range(1000))
+
+    assert fingerprint(array) != fingerprint(changed)
+    assert fingerprint(values) != fingerprint(values[:5] + [-1] + values[6:])
+    assert fingerprint(array, sample_bytes=80) == fingerprint(changed, sample_bytes=80)
+
+def test_fingerprint_dataframes_with_unhashable_objects():
+    """Test DataFrames holding lists or dicts are fingerprinted by content."""
+    df = pd.DataFrame({"a": [[1], [2]], "b": [{"x": 1}, {"y": 2}]})
+    changed = df.copy()
+    changed.loc[1, "a"] = [3]
+
+    assert fingerprint(df) == fingerprint(df.copy())
+    assert fingerprint(df) != fingerprint(changed)
+    assert fingerprint(df, sample_bytes=8) == fingerprint(df, sample_bytes=8)
+
+def test_fingerprint_unpicklable_values_always_differ():
+    """Test values that cannot be hashed by content never look unchanged."""
+    lock = threading.Lock()
+    assert fingerprint(lock) != fingerprint(lock)
+
+def test_capture_first_checkpoint_is_full():
+    """Test the first checkpoint records every key."""
+    history = SnapshotHistory()
+    delta = history.capture(LocalVariables({"a": 1, "b": [1, 2]}))
+
+    assert delta.is_full is True
+    assert delta.added == {"a": 1, "b": [1, 2]}
+    assert len(history) == 1
+
+def test_capture_records_only_changes():
+    """Test later checkpoints record added, changed and removed keys only."""
+    history = SnapshotHistory()
+    local_variables = LocalVariables({"a": 1, "b": [1, 2], "c": "unchanged"})
+    history.capture(local_variables)
+
+    local_variables.update_variables({"a": 2, "d": 4})
+    local_variables["b"].append(3)
+    del local_variables["c"]
+    delta = history.capture(local_variables)
+
+    assert delta.is_full is False
+    assert delta.added == {"d": 4}
+    assert delta.changed == {"a": 2, "b": [1, 2, 3]}
+    assert delta.removed == ["c"]
+
+def test_capture_unchanged_is_empty():
+    """Test a checkpoint with no changes stores nothing."""
+    history = SnapshotHistory()
+    local_variables = LocalVariables({"a": 1, "df": pd.DataFrame({"x": [1, 2]})})
+    history.capture(local_variables)
+
+    assert history.capture(local_variables).is_empty() is True
+    assert history.capture(local_variables.copy_variables()).is_empty() is True
+
+def test_capture_detects_in_place_edits_in_large_values():
+    """Test edits anywhere in a large list or array are recorded and rebuilt."""
+    history = SnapshotHistory()
+    local_variables = LocalVariables({"l": list(range(1000)), "a": np.zeros(100_000)})
+    history.capture(local_variables)
+    local_variables["l"][5] = -1
+    local_variables["a"][3] = 7
+    delta = history.capture(local_variables)
+
+    assert set(delta.changed) == {"l", "a"}
+    assert history.rebuild()["l"][5] == -1
+    assert history.rebuild()["a"][3] == 7.0
+    assert history.rebuild(0)["l"][5] == 5
+
+def test_capture_copies_values():
+    """Test recorded values are isolated from later mutation."""
+    history = SnapshotHistory()
+    local_variables = LocalVariables({"values": [1, 2]})
+    history.capture(local_variables)
+    local_variables["values"].append(3)
+
+    assert history.rebuild(0)["values"] == [1, 2]
+
+def test_rebuild_each_checkpoint():
+    """Test every checkpoint is rebuilt from the base and its deltas."""
+    history = SnapshotHistory()
+    global_variables = GlobalVariables({"a": 1, "b": 2})
+    history.capture(global_variables)
+    global_variables.update_variables({"a": 10})
+    history.capture(global_variables)
+    del global_variables["b"]
+    history.capture(global_variables)
+
+    assert history.rebuild(0) == {"a": 1, "b": 2}
+    assert history.rebuild(1) == {"a": 10, "b": 2}
+    assert history.rebuild(2) == {"a": 10}
+    assert history.rebuild() == {"a": 10}
+    assert isinstance(history.rebuild(), GlobalVariables)
+
+def test_rebuild_plain_mapping():
+    """Test plain dictionaries are rebuilt as Variables."""
+    history = SnapshotHistory()
+    history.capture({"a": 1})
+
+    assert type(history.rebuild()) is Variables
+
+def test_rebuild_invalid_index():
+    """Test rebuilding a missing checkpoint raises IndexError."""
+    history = SnapshotHistory()
+    with pytest.raises(IndexError):
+        history.rebuild(0)
+
+def test_full_snapshot_interval():
+    """Test periodic full snapshots bound the rebuild chain."""
+    history = SnapshotHistory(full_snapshot_interval=2)
+    local_variables = LocalVariables({"a": 1})
+    for value in range(5):
+        local_variables.update_variables({"a": value})
+        history.capture(local_variables)
+
+    assert [delta.is_full for delta in history.checkpoints] == [True, False, True, False, True]
+    assert history.rebuild(3) == {"a": 3}
+
+def test_full_snapshot_interval_invalid():
+    """Test invalid full snapshot intervals are rejected."""
+    with pytest.raises(ValueError, match="full_snapshot_interval must be a positive integer"):
+        SnapshotHistory(full_snapshot_interval=0)
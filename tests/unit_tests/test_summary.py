@@ -0,0 +1,153 @@
+"""Tests for summary utilities."""
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from src.rsq_utils.summary import SummaryBudget, SummaryEngine, estimate_distinct_count
+from src.rsq_utils.variables import Variables
+
+@pytest.fixture
+def large_df():
+    """Create a DataFrame larger than the test row budget."""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "category": rng.integers(0, 10, 5000),
+        "identifier": np.arange(5000),
+        "label": rng.integers(0, 100, 5000).astype(str).astype(object),
+    })
+
+def test_estimate_distinct_count_exact_without_sampling():
+    """Test the estimate is exact when the sample is the whole column."""
+    assert estimate_distinct_count(pd.Series([1, 2, 2, None]), 4) == 2
+    assert estimate_distinct_count(pd.Series([], dtype=float), 0) == 0
+
+def test_estimate_distinct_count_scales_unique_columns():
+    """Test a sample with no repeats is estimated as fully distinct."""
+    assert estimate_distinct_count(pd.Series(range(100)), 10_000) == 10_000
+
+def test_estimate_distinct_count_low_cardinality():
+    """Test a sample that sees every value repeatedly is not scaled up."""
+    sample = pd.Series([1, 2, 3] * 50)
+    assert estimate_distinct_count(sample, 1_000_000) == 3
+
+def test_engine_matches_exact_summary_for_small_data():
+    """Test small variables get the same summary as Variables.get_summary."""
+    df = pd.DataFrame({"numbers": [1, 2, 2], "strings": ["a", "b", "c"]})
+    variables = Variables({"df": df, "number": 42, "list": [1, 2, 3], "dict": {"key": "value"}})
+
+    exact = variables.get_summary()
+    estimated = variables.get_summary(summary_engine=SummaryEngine())
+
+    assert estimated["df"]["number_of_unique_values"] == exact["df"]["number_of_unique_values"]
+    assert estimated["df"]["memory_usage"] == exact["df"]["memory_usage"]
+    assert estimated["df"]["is_estimate"] is False
+    for key in ["number", "list", "dict"]:
+        assert estimated[key] == exact[key]
+
+def test_engine_samples_large_dataframes(large_df):
+    """Test DataFrames over the row budget are summarized from a sample."""
+    engine = SummaryEngine(SummaryBudget(max_rows=1000))
+    summary = engine.summarize_value(large_df)
+
+    assert summary["type"] == "pandas.DataFrame"
+    assert summary["shape"] == str(large_df.shape)
+    assert summary["sampled_rows"] == 1000
+    assert summary["is_estimate"] is True
+    assert summary["number_of_unique_values"]["category"] == 10
+    assert summary["number_of_unique_values"]["identifier"] == 5000
+    exact_memory = float(large_df.memory_usage(deep=True).sum())
+    assert summary["memory_usage"] == pytest.approx(exact_memory, rel=0.1)
+
+def test_engine_max_depth():
+    """Test nesting past max_depth is described by type and length only."""
+    engine = SummaryEngine(SummaryBudget(max_depth=1))
+    summary = engine.summarize_value({"outer": {"inner": [1, 2, 3]}, "items": [[1, 2]]})
+
+    assert summary["summary"]["outer"] == {"type": "dict", "keys": ["inner"], "length": 1}
+    assert summary["summary"]["items"] == {"type": "list", "length": 1}
+
+def test_engine_max_items():
+    """Test only max_items keys and elements are summarized."""
+    engine = SummaryEngine(SummaryBudget(max_items=2))
+    summary = engine.summarize_value({"values": list(range(10))})
+
+    assert len(summary["summary"]["values"]["first_elements"]) == 2
+    assert summary["summary"]["values"]["length"] == 10
+
+def test_engine_time_budget_truncates():
+    """Test values not reached within the time budget are truncated and not cached."""
+    engine = SummaryEngine(SummaryBudget(max_seconds=0))
+    summary = engine.summarize({"value": [1, 2, 3]})
+
+    assert summary["value"] == {"type": "list", "truncated": True}
+
+    engine.budget = SummaryBudget()
+    assert engine.summarize({"value": [1, 2, 3]})["value"]["length"] == 3
+
+class SlowSummary:
+    """Value whose summary takes longer than a small time budget."""
+
+    def get_summary(self):
+        """Return a summary after a delay."""
+        time.sleep(0.05)
+        return "slow"
+
+def test_engine_nested_truncation_is_not_cached():
+    """Test a key with a truncated nested value is marked truncated and retried."""
+    engine = SummaryEngine(SummaryBudget(max_seconds=0.01))
+    value = {"slow": SlowSummary(), "later": [1, 2]}
+    summary = engine.summarize({"value": value})["value"]
+
+    assert summary["truncated"] is True
+    assert summary["summary"]["slow"] == {"type": "SlowSummary", "summary": "slow"}
+    assert summary["summary"]["later"] == {"type": "list", "truncated": True}
+
+    engine.budget = SummaryBudget()
+    retried = engine.summarize({"value": value})["value"]
+    assert "truncated" not in retried
+    assert retried["summary"]["later"]["length"] == 2
+    assert engine.summarize({"value": value})["value"] is retried
+
+def test_engine_caches_unchanged_keys(large_df):
+    """Test unchanged keys reuse their cached summary."""
+    engine = SummaryEngine()
+    variables = Variables({"df": large_df, "number": 1})
+
+    first = variables.get_summary(summary_engine=engine)
+    second = variables.get_summary(summary_engine=engine)
+
+    assert second["df"] is first["df"]
+
+def test_engine_invalidates_replaced_keys():
+    """Test replacing a key recomputes its summary."""
+    engine = SummaryEngine()
+    variables = Variables({"values": [1, 2, 3]})
+    first = variables.get_summary(summary_engine=engine)
+
+    variables.update_variables({"values": [1, 2, 3, 4]})
+    second = variables.get_summary(summary_engine=engine)
+
+    assert first["values"]["length"] == 3
+    assert second["values"]["length"] == 4
+
+def test_engine_drops_removed_keys():
+    """Test keys removed from the variables are dropped from the cache."""
+    engine = SummaryEngine()
+    variables = Variables({"a": 1, "b": 2})
+    variables.get_summary(summary_engine=engine)
+
+    del variables["a"]
+    assert list(variables.get_summary(summary_engine=engine)) == ["b"]
+
+def test_engine_invalidate():
+    """Test manual invalidation forces recomputation."""
+    engine = SummaryEngine()
+    variables = Variables({"values": [1, 2, 3]})
+    first = variables.get_summary(summary_engine=engine)
+
+    variables["values"].append(4)
+    assert variables.get_summary(summary_engine=engine)["values"] is first["values"]
+
+    engine.invalidate("values")
+    assert variables.get_summary(summary_engine=engine)["values"]["length"] == 4
+    engine.invalidate()
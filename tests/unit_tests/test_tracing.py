@@ -0,0 +1,143 @@
+"""Tests for tracing utilities."""
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import pytest
+from src.rsq_utils.tracing import Tracer, get_tracer, merge_chrome_traces
+
+def complete_events(tracer):
+    """Get the recorded spans, without metadata events."""
+    return [event for event in tracer.get_events() if event["ph"] == "X"]
+
+def test_nested_spans():
+    """Test nested spans are recorded inside their parent with thread and process IDs."""
+    tracer = Tracer()
+    with tracer.span("outer", "job", day="2024-01-01") as outer:
+        with tracer.span("inner"):
+            pass
+        outer.set(rows=3)
+    inner, outer = complete_events(tracer)
+
+    assert (inner["name"], outer["name"]) == ("inner", "outer")
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"] + 1
+    assert outer["args"] == {"day": "2024-01-01", "rows": 3}
+    assert outer["cat"] == "job"
+    assert outer["pid"] == os.getpid() and outer["tid"] == threading.get_native_id()
+
+def test_trace_decorator_and_errors():
+    """Test decorated calls are recorded and exceptions are noted on the span."""
+    tracer = Tracer()
+
+    @tracer.trace()
+    def work(fail):
+        if fail:
+            raise KeyError("x")
+
+    work(False)
+    with pytest.raises(KeyError):
+        work(True)
+    events = complete_events(tracer)
+
+    assert [event["name"] for event in events] == [work.__wrapped__.__qualname__] * 2
+    assert "args" not in events[0]
+    assert events[1]["args"] == {"error": "KeyError"}
+
+def test_thread_names_are_recorded():
+    """Test spans from several threads carry their thread's ID and name metadata."""
+    tracer = Tracer()
+
+    def work():
+        with tracer.span("work"):
+            pass
+
+    threads = [threading.Thread(target=work, name=f"worker-{i}") for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    names = {event["args"]["name"] for event in tracer.get_events() if event["name"] == "thread_name"}
+
+    assert len(complete_events(tracer)) == 3
+    assert names == {"worker-0", "worker-1", "worker-2"}
+
+def test_sampling_applies_to_whole_trees():
+    """Test unsampled top-level spans drop their children too."""
+    never = Tracer(sample_rate=0.0)
+    with never.span("a"):
+        pass
+    assert len(never) == 0
+    tracer = Tracer(sample_rate=0.5)
+    for _ in range(200):
+        with tracer.span("root"):
+            with tracer.span("child"):
+                pass
+    names = [event["name"] for event in complete_events(tracer)]
+
+    assert names.count("root") == names.count("child")
+    assert 40 < names.count("root") < 160
+
+def test_disabled_tracer_records_nothing():
+    """Test a disabled tracer records no spans."""
+    tracer = Tracer(enabled=False)
+    with tracer.span("a"):
+        pass
+    assert len(tracer) == 0
+
+def test_max_events_keeps_most_recent():
+    """Test the buffer keeps the newest spans and counts the dropped ones."""
+    tracer = Tracer(max_events=3)
+    for i in range(5):
+        with tracer.span(f"span {i}"):
+            pass
+
+    assert [event["name"] for event in complete_events(tracer)] == ["span 2", "span 3", "span 4"]
+    assert tracer.dropped_events == 2
+    assert tracer.to_chrome_trace()["otherData"]["dropped_events"] == 2
+
+def test_write_and_merge(tmp_path):
+    """Test traces are written as Chrome trace JSON and merged across files."""
+    first, second = Tracer(), Tracer()
+    with first.span("a"):
+        pass
+    with second.span("b"):
+        pass
+    first.write(tmp_path / "traces" / "first.json", clear=True)
+    second.write(tmp_path / "traces" / "second.json")
+
+    trace = json.loads((tmp_path / "traces" / "first.json").read_text())
+    assert trace["displayTimeUnit"] == "ms"
+    assert [event["name"] for event in trace["traceEvents"] if event["ph"] == "X"] == ["a"]
+    assert len(first) == 0
+
+    count = merge_chrome_traces([tmp_path / "traces" / "first.json", tmp_path / "traces" / "second.json"],
+                                tmp_path / "merged.json")
+    merged = json.loads((tmp_path / "merged.json").read_text())["traceEvents"]
+    assert count == len(merged)
+    assert {event["name"] for event in merged if event["ph"] == "X"} == {"a", "b"}
+
+def report_child_buffer(queue):
+    """Record one span in a forked child and report what the buffer holds."""
+    tracer = get_tracer()
+    before = len(tracer)
+    with tracer.span("child"):
+        pass
+    queue.put((before, complete_events(tracer)[0]["pid"]))
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fork is not available")
+def test_forked_child_starts_with_empty_buffer():
+    """Test a forked child does not inherit the parent's spans and records its own PID."""
+    tracer = get_tracer()
+    with tracer.span("parent"):
+        pass
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=report_child_buffer, args=(queue,))
+    process.start()
+    before, pid = queue.get(timeout=10)
+    process.join()
+    tracer.clear()
+
+    assert before == 0
+    assert pid == process.pid
@@ -0,0 +1,110 @@
+"""Tests for URL canonicalization utilities."""
+import pytest
+from src.rsq_utils.url import url_encode
+from src.rsq_utils.url_canonicalization import (
+    BloomFilter, UrlDeduplicator, canonicalize_url, url_fingerprint
+)
+
+@pytest.mark.parametrize("url,expected", [
+    ("HTTPS://Example.COM:443/a/./b/../c?z=1&a=2#top", "https://example.com/a/c?a=2&z=1"),
+    ("http://example.com:80", "http://example.com/"),
+    ("http://example.com:8080/x/", "http://example.com:8080/x/"),
+    ("https://example.com/a/..", "https://example.com/"),
+    ("https://example.com/%7euser/a%20b", "https://example.com/~user/a%20b"),
+    ("https://example.com/a%2fb", "https://example.com/a%2Fb"),
+    ("https://example.com/?q=a%20b&q=a+b&q=a b", "https://example.com/?q=a+b&q=a+b&q=a+b"),
+    ("https://example.com/?empty=&b=2", "https://example.com/?b=2&empty="),
+    ("https://user:pw@Example.com./", "https://user:pw@example.com/"),
+    ("http://[::1]:80/x", "http://[::1]/x"),
+    ("https://bücher.de/", "https://xn--bcher-kva.de/"),
+])
+def test_canonicalize_url(url, expected):
+    """Test scheme, host, path and query normalization."""
+    assert canonicalize_url(url) == expected
+
+def test_canonicalize_url_with_params():
+    """Test params are merged with the query, sanitized and sorted."""
+    assert canonicalize_url("https://example.com/search?b=2", {"a": 1, "skip": None}) == "https://example.com/search?a=1&b=2"
+
+def test_equivalent_url_encode_outputs_share_canonical_form():
+    """Test url_encode outputs that differ in parameter order canonicalize the same."""
+    first = url_encode("https://example.com/search", {"q": "red shoes", "page": 2, "x": None})
+    second = url_encode("https://EXAMPLE.com/search", {"page": "2", "q": "red shoes"})
+    assert first != second
+    assert canonicalize_url(first) == canonicalize_url(second)
+
+def test_ignore_params():
+    """Test ignored parameters are dropped."""
+    url = "https://example.com/?utm_source=mail&id=1"
+    assert canonicalize_url(url, ignore_params={"utm_source"}) == "https://example.com/?id=1"
+
+def test_invalid_url():
+    """Test invalid URLs raise ValueError like url_encode."""
+    with pytest.raises(ValueError):
+        canonicalize_url("not a url")
+
+def test_url_fingerprint():
+    """Test fingerprints are stable 16-byte digests of the canonical form."""
+    fingerprint = url_fingerprint("https://example.com/?b=2&a=1")
+    assert len(fingerprint) == 16
+    assert fingerprint == url_fingerprint("https://EXAMPLE.com?a=1&b=2")
+    assert fingerprint != url_fingerprint("https://example.com/?a=1&b=3")
+    assert url_fingerprint("https://example.com", {"a": 1}) == url_fingerprint("https://example.com/?a=1")
+
+def test_bloom_filter_add_and_contains():
+    """Test single adds report new items and membership."""
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+    fingerprint = url_fingerprint("https://example.com/a")
+    assert fingerprint not in bloom_filter
+    assert bloom_filter.add(fingerprint)
+    assert not bloom_filter.add(fingerprint)
+    assert fingerprint in bloom_filter
+    assert len(bloom_filter) == 1
+
+def test_bloom_filter_add_many_matches_add():
+    """Test batch adds agree with single adds and handle repeats in the batch."""
+    fingerprints = [url_fingerprint(f"https://example.com/?i={i % 500}") for i in range(1000)]
+    batch_filter = BloomFilter(capacity=10_000)
+    single_filter = BloomFilter(capacity=10_000)
+
+    is_new = batch_filter.add_many(fingerprints)
+    assert is_new.tolist() == [single_filter.add(fingerprint) for fingerprint in fingerprints]
+    assert is_new.sum() == 500
+    assert all(fingerprint in batch_filter for fingerprint in fingerprints)
+    assert (batch_filter._bits == single_filter._bits).all()
+    assert not batch_filter.add_many(fingerprints[:10]).any()
+
+def test_bloom_filter_false_positive_rate():
+    """Test the false positive rate stays near the configured rate at capacity."""
+    bloom_filter = BloomFilter(capacity=20_000, error_rate=0.01)
+    bloom_filter.add_many([url_fingerprint(f"https://example.com/?i={i}") for i in range(20_000)])
+    false_positives = sum(url_fingerprint(f"https://other.com/?i={i}") in bloom_filter for i in range(20_000))
+    assert false_positives / 20_000 < 0.02
+
+@pytest.mark.parametrize("mode", ["exact", "bloom"])
+def test_deduplicator_filter(mode):
+    """Test equivalent URLs are let through once, in order."""
+    deduplicator = UrlDeduplicator(capacity=1000, mode=mode)
+    urls = ["https://a.com/?x=1&y=2", "https://A.com/?y=2&x=1", "https://a.com/b", "https://a.com/?x=1&y=2#frag"]
+    assert list(deduplicator.filter(urls)) == ["https://a.com/?x=1&y=2", "https://a.com/b"]
+    assert "https://a.com:443/b" in deduplicator
+    assert not deduplicator.add("https://a.com/b")
+    assert deduplicator.add("https://a.com/", {"z": 1})
+
+def test_exact_deduplicator_is_bounded():
+    """Test the exact filter forgets its oldest URLs beyond capacity."""
+    deduplicator = UrlDeduplicator(capacity=2, mode="exact")
+    for url in ["https://a.com/1", "https://a.com/2", "https://a.com/3"]:
+        assert deduplicator.add(url)
+    assert len(deduplicator._seen) == 2
+    assert "https://a.com/1" not in deduplicator
+    assert deduplicator.add("https://a.com/1")
+
+def test_invalid_arguments():
+    """Test invalid modes and sizes are rejected."""
+    with pytest.raises(ValueError):
+        UrlDeduplicator(mode="unknown")
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=0)
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=10, error_rate=1.5)